@@ -0,0 +1,221 @@
+"""
+async_engine.py - موتور asyncio برای دریافت و پردازش همزمان آپدیت‌ها
+
+- دریافت getUpdates بدون مسدود کردن حلقه رویداد
+- اجرای همزمان هندلرها با سقف قابل تنظیم
+- حفظ ترتیب دقیق آپدیت‌های هر چت/کاربر
+"""
+
+import asyncio
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from dispatcher import get_update_key
+from polling_state import AdaptiveBackoff
+
+
+class AsyncUpdateEngine:
+    """موتور دریافت و توزیع آپدیت‌ها با asyncio"""
+
+    def __init__(self, fetch_updates, handle_update, max_concurrency: int = 32,
+                 max_pending: int = None, offset_store=None):
+        """
+        Args:
+            fetch_updates: تابع همگام get_updates(last_update_id) -> dict
+            handle_update: تابع همگام پردازش یک آپدیت (مثل process_update)
+            max_concurrency: حداکثر هندلرهای همزمان
+            max_pending: حداکثر آپدیت‌های در صف پیش از دریافت دسته بعدی
+            offset_store: OffsetStore برای ذخیره offset و حذف آپدیت‌های تکراری
+        """
+        self.fetch_updates = fetch_updates
+        self.handle_update = handle_update
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_pending = max_pending or self.max_concurrency * 4
+        self.offset_store = offset_store
+        self.backoff = AdaptiveBackoff()
+
+        self.last_update_id = offset_store.offset if offset_store else 0
+        self.stats = {
+            "processed": 0,
+            "failed": 0,
+            "duplicates": 0,
+            "batches": 0,
+            "max_in_flight": 0
+        }
+
+        self._in_flight = 0
+        self._loop = None
+        self._executor = None
+        self._semaphore = None
+        self._chat_tails = {}
+        self._pending = set()
+
+    # ---------- اجرای هندلرها ----------
+
+    def _safe_handle(self, update):
+        """اجرای هندلر در thread با گزارش خطا"""
+        try:
+            self.handle_update(update)
+            return True
+        except Exception as e:
+            print(f"⚠️ خطا در پردازش آپدیت {update.get('update_id')}: {e}")
+            traceback.print_exc()
+            return False
+
+    async def _run_update(self, previous, update):
+        # صبر برای پایان آپدیت قبلی همین چت
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        async with self._semaphore:
+            self._in_flight += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+            try:
+                loop = asyncio.get_running_loop()
+                ok = await loop.run_in_executor(self._executor, self._safe_handle, update)
+            finally:
+                self._in_flight -= 1
+
+        if self.offset_store:
+            self.offset_store.done(update["update_id"])
+
+        if ok:
+            self.stats["processed"] += 1
+        else:
+            self.stats["failed"] += 1
+
+    def _release_tail(self, key, task):
+        if self._chat_tails.get(key) is task:
+            del self._chat_tails[key]
+        self._pending.discard(task)
+
+    async def dispatch(self, update):
+        """زمان‌بندی یک آپدیت پشت آخرین آپدیت همان چت (آپدیت تکراری نادیده گرفته می‌شود)"""
+        if self.offset_store and not self.offset_store.begin(update["update_id"]):
+            self.stats["duplicates"] += 1
+            return None
+
+        key = get_update_key(update)
+        previous = self._chat_tails.get(key)
+
+        task = asyncio.ensure_future(self._run_update(previous, update))
+        self._chat_tails[key] = task
+        self._pending.add(task)
+        task.add_done_callback(lambda t, k=key: self._release_tail(k, t))
+        return task
+
+    # ---------- حلقه دریافت ----------
+
+    async def _fetch(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.fetch_updates, self.last_update_id)
+
+    async def _commit_after(self, previous, tasks, offset):
+        """ذخیره offset پس از پایان دسته (و پس از commit دسته قبلی، برای حفظ ترتیب)"""
+        waiting = [task for task in tasks if task is not None]
+        if previous is not None:
+            waiting.append(previous)
+        if waiting:
+            await asyncio.wait(waiting)
+        self.offset_store.commit(offset)
+
+    async def _poll_forever(self):
+        commit_tail = None
+
+        while True:
+            # فشار معکوس: تا خالی شدن بخشی از صف، دسته جدید نگیر
+            while len(self._pending) >= self.max_pending:
+                await asyncio.wait(list(self._pending), return_when=asyncio.FIRST_COMPLETED)
+
+            started = time.time()
+            updates = await self._fetch()
+
+            if not updates.get("ok"):
+                await asyncio.sleep(self.backoff.failure())
+                continue
+
+            result = updates.get("result") or []
+            if result:
+                self.stats["batches"] += 1
+
+            tasks = []
+            for update in result:
+                self.last_update_id = max(self.last_update_id, update["update_id"])
+                tasks.append(await self.dispatch(update))
+
+            if result and self.offset_store:
+                commit_tail = asyncio.ensure_future(
+                    self._commit_after(commit_tail, tasks, self.last_update_id)
+                )
+
+            delay = self.backoff.success(len(result), time.time() - started)
+            if delay:
+                await asyncio.sleep(delay)
+
+    def _setup(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # یک thread اضافه برای long-polling تا هندلرها منتظر نمانند
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency + 1,
+            thread_name_prefix="update-worker"
+        )
+
+    async def _main(self):
+        self._setup()
+        try:
+            await self._poll_forever()
+        finally:
+            if self._pending:
+                await asyncio.wait(list(self._pending))
+            self._executor.shutdown(wait=False)
+
+    def run(self):
+        """اجرای موتور تا زمان توقف (Ctrl+C)"""
+        started = time.time()
+        try:
+            asyncio.run(self._main())
+        finally:
+            elapsed = time.time() - started
+            print(f"📊 موتور asyncio: {self.stats['processed']} آپدیت پردازش شد "
+                  f"({self.stats['failed']} خطا) در {elapsed:.0f} ثانیه")
+
+    # ---------- اجرا در پس‌زمینه (حالت webhook) ----------
+
+    def start_background(self):
+        """اجرای حلقه رویداد در یک thread جداگانه؛ آپدیت‌ها با submit وارد می‌شوند"""
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def runner():
+            asyncio.set_event_loop(self._loop)
+            self._setup()
+            ready.set()
+            self._loop.run_forever()
+
+        thread = threading.Thread(target=runner, name="update-engine", daemon=True)
+        thread.start()
+        ready.wait()
+        return thread
+
+    def submit(self, update):
+        """ارسال یک آپدیت از thread دیگر (مثلاً سرور webhook) به موتور"""
+        asyncio.run_coroutine_threadsafe(self.dispatch(update), self._loop)
+
+    def stop_background(self, timeout: float = 10):
+        """پایان پردازش‌های در جریان و توقف حلقه پس‌زمینه"""
+        if self._loop is None:
+            return
+
+        async def drain():
+            if self._pending:
+                await asyncio.wait(list(self._pending), timeout=timeout)
+
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), self._loop).result(timeout + 1)
+        except Exception as e:
+            print(f"⚠️ خطا در توقف موتور: {e}")
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False)
\ No newline at end of file
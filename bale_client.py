@@ -0,0 +1,140 @@
+"""
+bale_client.py - کلاینت API بله با اتصال‌های ماندگار (keep-alive)
+
+همه درخواست‌های ربات از یک Session مشترک عبور می‌کنند تا اتصال TCP+TLS
+به tapi.bale.ai دوباره استفاده شود.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_URL = "https://tapi.bale.ai"
+
+# timeout هر متد (ثانیه)؛ getUpdates باید از timeout خود long-polling بیشتر باشد
+DEFAULT_TIMEOUTS = {
+    "getUpdates": 35,
+    "getMe": 10,
+    "answerCallbackQuery": 5,
+    "setWebhook": 10,
+    "deleteWebhook": 10
+}
+DEFAULT_TIMEOUT = 30
+
+
+def decode_envelope(response):
+    """
+    تبدیل پاسخ HTTP به پاکت استاندارد {"ok": ..., "result" | "error_code", "description"}
+
+    پاسخ‌های غیر JSON (مثلاً صفحه خطای 502) هم به پاکت ناموفق تبدیل می‌شوند.
+    """
+    try:
+        envelope = response.json()
+    except ValueError:
+        return {
+            "ok": False,
+            "error_code": response.status_code,
+            "description": response.text[:200]
+        }
+
+    if not isinstance(envelope, dict):
+        return {"ok": False, "error_code": response.status_code, "description": str(envelope)[:200]}
+
+    if not envelope.get("ok"):
+        envelope.setdefault("error_code", response.status_code)
+        envelope.setdefault("description", "")
+
+    return envelope
+
+
+def get_retry_after(envelope) -> float:
+    """زمان انتظار پیشنهادی بله در پاسخ 429 (ثانیه)"""
+    if not envelope or envelope.get("error_code") != 429:
+        return 0
+    parameters = envelope.get("parameters") or {}
+    return float(parameters.get("retry_after", 1))
+
+
+class BaleClient:
+    """کلاینت API بله با Session مشترک و آمار تأخیر هر متد"""
+
+    def __init__(self, token: str, api_url: str = DEFAULT_API_URL, pool_size: int = 32,
+                 timeouts: dict = None):
+        """
+        Args:
+            token: توکن ربات
+            api_url: آدرس پایه API (برای تست می‌تواند سرور محلی باشد)
+            pool_size: حداکثر اتصال‌های باز همزمان
+            timeouts: timeout اختصاصی متدها (روی مقادیر پیش‌فرض اعمال می‌شود)
+        """
+        self.base_url = f"{api_url.rstrip('/')}/bot{token}"
+        self.pool_size = pool_size
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def get_timeout(self, method: str) -> float:
+        return self.timeouts.get(method, DEFAULT_TIMEOUT)
+
+    def call(self, method: str, data: dict = None, params: dict = None, timeout: float = None) -> dict:
+        """
+        فراخوانی یک متد API
+
+        Returns:
+            dict: پاکت پاسخ (همیشه کلید ok دارد)
+
+        Raises:
+            requests.exceptions.RequestException: خطای شبکه یا timeout
+        """
+        url = f"{self.base_url}/{method}"
+        timeout = timeout or self.get_timeout(method)
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            if params is not None:
+                response = self.session.get(url, params=params, timeout=timeout)
+            else:
+                response = self.session.post(url, json=data, timeout=timeout)
+            envelope = decode_envelope(response)
+            ok = bool(envelope.get("ok"))
+            return envelope
+        finally:
+            self._record(method, time.perf_counter() - started, ok)
+
+    def _record(self, method, elapsed, ok):
+        with self._stats_lock:
+            stat = self._stats.get(method)
+            if stat is None:
+                stat = self._stats[method] = {"calls": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0}
+            stat["calls"] += 1
+            stat["total_time"] += elapsed
+            stat["max_time"] = max(stat["max_time"], elapsed)
+            if not ok:
+                stat["errors"] += 1
+
+    def get_stats(self) -> dict:
+        """آمار تأخیر هر متد (میانگین و بیشینه بر حسب میلی‌ثانیه)"""
+        with self._stats_lock:
+            return {
+                method: {
+                    "calls": stat["calls"],
+                    "errors": stat["errors"],
+                    "avg_ms": round(stat["total_time"] / stat["calls"] * 1000, 1),
+                    "max_ms": round(stat["max_time"] * 1000, 1)
+                }
+                for method, stat in self._stats.items()
+            }
+
+    def close(self):
+        self.session.close()
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+benchmark_polling.py - بنچمارک سرتاسری ربات با API جعلی بله
+
+ربات بدون تغییر (start_polling، حالت asyncio یا webhook) به سرور محلی
+fake_bale_api وصل می‌شود و پس از پردازش همه آپدیت‌های مصنوعی، این
+معیارها گزارش می‌شوند: آپدیت در ثانیه، p50/p99 زمان اجرای هندلر و
+تأخیر سرتاسری، و تعداد درخواست API به ازای هر آپدیت.
+
+    python benchmark_polling.py --users 200 --latency 0.05 --mode polling
+    python benchmark_polling.py --users 200 --latency 0.05 --rate 20 --mode webhook
+
+در حالت webhook سرور جعلی پس از setWebhook آپدیت‌ها را به سرور Flask
+ربات روی یک پورت محلی آزاد POST می‌کند. تأخیر سرتاسری از زمان رسیدن
+آپدیت به بله اندازه‌گیری می‌شود؛ بدون --rate همه آپدیت‌ها از ابتدا موجودند
+و این عدد بیشتر زمان ماندن در صف را نشان می‌دهد، پس برای مقایسه تأخیر
+polling و webhook نرخی کمتر از ظرفیت ربات بدهید.
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from fake_bale_api import FakeBaleAPI, DEFAULT_SCENARIO
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_benchmark(users=100, scenario=None, latency=0.0, mode="polling", timeout=300, rate=0.0):
+    """اجرای یک دور بنچمارک و برگرداندن نتایج"""
+    api = FakeBaleAPI(users, scenario, api_latency=latency, arrival_rate=rate).start()
+    total = len(api.updates)
+
+    # تنظیمات باید پیش از import ربات اعمال شوند
+    os.environ["BALE_BOT_TOKEN"] = "benchmark"
+    os.environ["BALE_API_URL"] = api.url
+    os.environ["BOT_DATA_DIR"] = tempfile.mkdtemp(prefix="bot_bench_")
+    os.environ.pop("OFFSET_FILE", None)
+
+    if mode == "webhook":
+        port = get_free_port()
+        os.environ["WEBHOOK_URL"] = f"http://127.0.0.1:{port}/webhook"
+        os.environ["WEBHOOK_HOST"] = "127.0.0.1"
+        os.environ["WEBHOOK_PORT"] = str(port)
+        os.environ["SECRET_KEY"] = "benchmark-secret"
+        # لاگ هر درخواست سرور توسعه Flask
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    import polling_bot
+
+    # اندازه‌گیری زمان هر هندلر بدون تغییر کد ربات
+    timings = {}
+    original = polling_bot.process_update
+
+    def timed_process_update(update):
+        started = time.perf_counter()
+        try:
+            original(update)
+        finally:
+            timings[update["update_id"]] = (started, time.perf_counter())
+
+    polling_bot.process_update = timed_process_update
+
+    runner = {
+        "polling": polling_bot.start_polling,
+        "async": polling_bot.start_async_polling,
+        "webhook": polling_bot.start_webhook
+    }[mode]
+    log = io.StringIO()
+
+    with contextlib.redirect_stdout(log):
+        thread = threading.Thread(target=runner, name="bot", daemon=True)
+        thread.start()
+
+        deadline = time.monotonic() + timeout
+        while len(timings) < total and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        polling_bot.outbound.flush(timeout=30)
+        # تأییدهای callback در پس‌زمینه ارسال می‌شوند
+        expected_acks = sum(1 for update in api.updates if "callback_query" in update)
+        while api.count_calls("answerCallbackQuery") < expected_acks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    polling_bot.process_update = original
+
+    first_arrival = api.started_at or 0
+    last_event = max([end for _, end in timings.values()] + [call[0] for call in api.calls] or [first_arrival])
+    elapsed = max(last_event - first_arrival, 1e-9)
+
+    handler_times = [end - start for start, end in timings.values()]
+    end_to_end = [end - api.arrival_time(uid) for uid, (_, end) in timings.items()] if api.started_at else []
+
+    by_method = {}
+    for _, method, _ in api.calls:
+        by_method[method] = by_method.get(method, 0) + 1
+
+    api.stop()
+
+    return {
+        "mode": mode,
+        "rate": rate,
+        "users": users,
+        "updates": total,
+        "processed": len(timings),
+        "elapsed": elapsed,
+        "updates_per_sec": len(timings) / elapsed,
+        "handler_p50_ms": percentile(handler_times, 50) * 1000,
+        "handler_p99_ms": percentile(handler_times, 99) * 1000,
+        "e2e_p50_ms": percentile(end_to_end, 50) * 1000,
+        "e2e_p99_ms": percentile(end_to_end, 99) * 1000,
+        "calls_per_update": len(api.calls) / max(len(timings), 1),
+        "calls_by_method": by_method
+    }
+
+
+def print_report(result):
+    print("=" * 50)
+    print(f"🧪 بنچمارک ربات - حالت {result['mode']}")
+    print("=" * 50)
+    print(f"کاربران: {result['users']}  آپدیت‌ها: {result['processed']}/{result['updates']}"
+          f"  نرخ ورود: {result['rate'] or 'یکجا'}")
+    print(f"مدت: {result['elapsed']:.2f} ثانیه")
+    print(f"آپدیت در ثانیه: {result['updates_per_sec']:.1f}")
+    print(f"زمان هندلر p50/p99: {result['handler_p50_ms']:.1f} / {result['handler_p99_ms']:.1f} ms")
+    print(f"تأخیر سرتاسری p50/p99: {result['e2e_p50_ms']:.1f} / {result['e2e_p99_ms']:.1f} ms")
+    print(f"درخواست API به ازای هر آپدیت: {result['calls_per_update']:.2f}")
+    for method, count in sorted(result["calls_by_method"].items()):
+        print(f"   {method}: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="بنچمارک سرتاسری ربات با API جعلی بله")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="تأخیر شبیه‌سازی‌شده هر درخواست API (ثانیه)")
+    parser.add_argument("--scenario", default=",".join(DEFAULT_SCENARIO))
+    parser.add_argument("--mode", choices=["polling", "async", "webhook"], default="polling")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--rate", type=float, default=0.0, help="آپدیت در ثانیه (پیش‌فرض: همه از ابتدا)")
+    args = parser.parse_args()
+
+    print_report(run_benchmark(args.users, args.scenario.split(","), args.latency, args.mode, args.timeout,
+                               args.rate))
+    sys.exit(0)
\ No newline at end of file
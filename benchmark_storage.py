@@ -0,0 +1,257 @@
+"""
+benchmark_storage.py - بنچمارک عملیات پرتکرار مدیرهای ذخیره‌سازی
+
+عملیات UserProgressManager، DailyResetManager و TimeManager روی داده‌ای
+با N کاربر اندازه‌گیری می‌شوند: عملیات در ثانیه، بایت نوشته‌شده و تعداد
+باز شدن فایل به ازای هر عملیات. daily_reset با store پیش‌فرض JSON در هر
+دسترسی کل فایل مشترک را بازنویسی می‌کند، بنابراین هزینه هر درخواست با
+تعداد کل کاربران رشد می‌کند؛ time_manager فقط به لاگ اضافه می‌کند.
+
+LogStore فایل لاگ را یک بار باز نگه می‌دارد؛ نوشتن روی همان handle هم
+شمرده می‌شود. کش نوشتن تأخیری (پشتوانه json) در همان بازه اندازه‌گیری
+flush می‌شود تا نوشتن‌های دسته‌ای آن هم در زمان و بایت‌ها حساب شوند.
+
+    python benchmark_storage.py --sizes 1000,100000,1000000 --ops 200
+
+بدون --backends پشتوانه انتخاب‌شده با STORAGE_BACKEND (پیش‌فرض json) سنجیده
+می‌شود. مقایسه پشتوانه‌های storage.py با همان عملیات (برای sqlite شمارش open
+و بایت فقط فایل‌های پایتونی را می‌بیند، نه نوشتن‌های داخلی SQLite؛ برای mmap
+تغییر صفحه‌های نگاشت‌شده هم دیده نمی‌شود):
+
+    python benchmark_storage.py --backends memory,json,mmap,sqlite,user --sizes 1000,100000
+"""
+
+import argparse
+import builtins
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+# ==================== شمارش I/O ====================
+
+class _CountingFile:
+    """پوشش فایل برای شمردن بایت‌های نوشته‌شده"""
+
+    def __init__(self, f, counters):
+        self._f = f
+        self._counters = counters
+
+    def write(self, data):
+        self._counters["bytes"] += len(data.encode("utf-8") if isinstance(data, str) else data)
+        return self._f.write(data)
+
+    def __enter__(self):
+        self._f.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._f.__exit__(*exc)
+
+    def __iter__(self):
+        return iter(self._f)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+@contextmanager
+def count_io(counters, log_stores=()):
+    """
+    شمردن open و بایت‌های نوشته‌شده در طول بلوک
+
+    Args:
+        log_stores: LogStore هایی که handle لاگ باز دارند؛ نوشتن روی آن هم شمرده می‌شود
+    """
+    original_open = builtins.open
+
+    def counting_open(file, mode="r", *args, **kwargs):
+        counters["opens"] += 1
+        f = original_open(file, mode, *args, **kwargs)
+        if any(flag in mode for flag in "wa+"):
+            return _CountingFile(f, counters)
+        return f
+
+    builtins.open = counting_open
+    for store in log_stores:
+        store._log = _CountingFile(store._log, counters)
+    try:
+        yield counters
+    finally:
+        builtins.open = original_open
+        # فشرده‌سازی ممکن است handle را عوض کرده باشد؛ در هر حال پوشش برداشته می‌شود
+        for store in log_stores:
+            if isinstance(store._log, _CountingFile):
+                store._log = store._log._f
+
+
+# ==================== آماده‌سازی داده ====================
+
+def populate(data_dir, users, progress_files=True):
+    """ساخت داده‌های نمونه با همان قالب فایل‌های ربات"""
+    now = time.time()
+
+    progress_dir = os.path.join(data_dir, "user_progress")
+    os.makedirs(progress_dir, exist_ok=True)
+    if progress_files:
+        sample = {"1": {"current_day": 5, "started": True, "completed_days": [1, 2, 3, 4]}}
+        for i in range(users):
+            with open(os.path.join(progress_dir, f"u{i}.json"), "w", encoding="utf-8") as f:
+                json.dump(sample, f, ensure_ascii=False, indent=2)
+
+    access = {
+        f"u{i}_1": {
+            "last_access": now - 86400,
+            "last_day": 4,
+            "last_access_human": "2025-01-01 07:00:00",
+            "next_reset_at": now - 3600,
+            "next_reset_human": "2025-01-02 06:00:00"
+        }
+        for i in range(users)
+    }
+    os.makedirs(os.path.join(data_dir, "daily_reset"), exist_ok=True)
+    with open(os.path.join(data_dir, "daily_reset", "user_access.json"), "w", encoding="utf-8") as f:
+        json.dump(access, f, ensure_ascii=False, indent=2)
+
+    with open(os.path.join(data_dir, "user_next_day_times.json"), "w", encoding="utf-8") as f:
+        json.dump({f"u{i}_1": now for i in range(users)}, f, ensure_ascii=False, indent=2)
+
+
+def populate_storage(storage, users):
+    """ساخت همان داده نمونه از طریق رابط پشتوانه (همه به جز json)"""
+    now = time.time()
+    times = storage.keyed("next_day")
+    for i in range(users):
+        uid = f"u{i}"
+        storage.progress.set_topic_day(uid, 1, 5)
+        for day in range(1, 5):
+            storage.progress.complete_day(uid, 1, day)
+        storage.access.put(uid, 1, {"last_access": now - 86400, "last_day": 4, "next_reset_at": now - 3600})
+        times.set(f"{uid}_1", now)
+    storage.flush()
+
+
+# ==================== عملیات ====================
+
+def build_operations(storage):
+    """
+    عملیات مورد سنجش؛ هر کدام تابعی از user_id است
+
+    Returns:
+        (operations, log_stores): log_stores تابعی است که LogStore های باز را برمی‌گرداند
+    """
+    from daily_reset import DailyResetManager
+    from log_store import LogStore
+    from time_manager import TimeManager
+
+    progress = storage.progress
+    reset = DailyResetManager(store=storage.access)
+    # TimeManager پشتوانه را از STORAGE_BACKEND می‌گیرد (همان نمونه get_storage)
+    times = TimeManager()
+
+    def log_stores():
+        # TimeManager فایل‌ها را در اولین استفاده باز می‌کند
+        return [store for store in (times._times, times._locks) if isinstance(store, LogStore)]
+
+    operations = [
+        ("get_topic_progress", lambda uid: progress.get_topic_progress(uid, 1)),
+        ("set_topic_day", lambda uid: progress.set_topic_day(uid, 1, 5)),
+        ("complete_day", lambda uid: progress.complete_day(uid, 1, random.randint(1, 28))),
+        ("can_access_today", lambda uid: reset.can_access_today(uid, 1)),
+        ("record_access", lambda uid: reset.record_access(uid, 1, 5)),
+        ("get_access_info", lambda uid: reset.get_access_info(uid, 1)),
+        ("set_next_day_time", lambda uid: times.set_next_day_time(uid, 1)),
+    ]
+    return operations, log_stores
+
+
+def measure(operation, users, ops, flush=None, log_stores=None):
+    """
+    اجرای یک عملیات روی کاربران تصادفی: (عملیات در ثانیه، بایت/عملیات، open/عملیات)
+
+    Args:
+        flush: نوشتن تغییرات معوق (کش write-behind) در پایان هر دور
+        log_stores: تابع برگرداننده LogStore های باز برای شمارش نوشتن روی handle آن‌ها
+    """
+    sample = [f"u{random.randrange(users)}" for _ in range(ops)]
+
+    started = time.perf_counter()
+    for uid in sample:
+        operation(uid)
+    if flush:
+        flush()
+    elapsed = time.perf_counter() - started
+
+    # دور دوم با شمارش I/O (جدا از زمان‌سنجی)
+    counters = {"opens": 0, "bytes": 0}
+    io_sample = sample[:max(1, ops // 10)]
+    with count_io(counters, log_stores() if log_stores else ()):
+        for uid in io_sample:
+            operation(uid)
+        if flush:
+            flush()
+
+    return ops / elapsed, counters["bytes"] / len(io_sample), counters["opens"] / len(io_sample)
+
+
+def run(sizes, ops, keep=False, backends=None):
+    """
+    Args:
+        backends: نام پشتوانه‌های storage.py؛ None یعنی پشتوانه انتخاب‌شده با STORAGE_BACKEND
+    """
+    from storage import get_backend_name, get_storage
+
+    results = []
+    for backend in backends or [get_backend_name()]:
+        os.environ["STORAGE_BACKEND"] = backend
+
+        for users in sizes:
+            data_dir = tempfile.mkdtemp(prefix=f"bot_storage_{backend}_{users}_")
+            os.environ["BOT_DATA_DIR"] = data_dir
+
+            print(f"\n⏳ آماده‌سازی {users:,} کاربر ({backend}) در {data_dir} ...")
+            started = time.perf_counter()
+            if backend == "json":
+                # فایل‌ها پیش از باز شدن پشتوانه نوشته می‌شوند (سریع‌تر از رابط برای میلیون‌ها کاربر)
+                populate(data_dir, users)
+                storage = get_storage()
+            else:
+                storage = get_storage()
+                populate_storage(storage, users)
+            print(f"   {time.perf_counter() - started:.1f} ثانیه")
+
+            operations, log_stores = build_operations(storage)
+            for name, operation in operations:
+                ops_per_sec, bytes_per_op, opens_per_op = measure(operation, users, ops, storage.flush, log_stores)
+                results.append((backend, name, users, ops_per_sec, bytes_per_op, opens_per_op))
+                print(f"   {name:<20} {ops_per_sec:>10.1f} ops/s {bytes_per_op:>14,.0f} B/op {opens_per_op:>6.1f} open/op")
+
+            storage.close()
+            if not keep:
+                shutil.rmtree(data_dir, ignore_errors=True)
+
+    return results
+
+
+def print_table(results):
+    print("\n" + "=" * 88)
+    print(f"{'backend':<9} {'operation':<20} {'users':>10} {'ops/sec':>12} {'bytes/op':>16} {'opens/op':>10}")
+    print("-" * 88)
+    for backend, name, users, ops_per_sec, bytes_per_op, opens_per_op in results:
+        print(f"{backend:<9} {name:<20} {users:>10,} {ops_per_sec:>12.1f} {bytes_per_op:>16,.0f} {opens_per_op:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="بنچمارک ذخیره‌سازی JSON ربات")
+    parser.add_argument("--sizes", default="1000,100000", help="تعداد کاربران، جدا با کاما (مثلاً 1000,100000,1000000)")
+    parser.add_argument("--ops", type=int, default=200, help="تعداد عملیات هر سنجش")
+    parser.add_argument("--keep", action="store_true", help="نگه داشتن پوشه‌های داده")
+    parser.add_argument("--backends", default="", help="مقایسه پشتوانه‌های storage.py (مثلاً memory,json,mmap,sqlite,user)")
+    args = parser.parse_args()
+
+    backends = [name for name in args.backends.split(",") if name] or None
+    print_table(run([int(size) for size in args.sizes.split(",")], args.ops, args.keep, backends))
\ No newline at end of file
@@ -0,0 +1,331 @@
+"""
+benchmark_templates.py - مقایسه پیام‌های templates با ساخت متن به روش قبلی
+
+نسخه قبلی هر پیام (f-string چندخطی و += پشت سر هم) با همان ورودی‌ها
+در کنار templates اجرا می‌شود؛ ابتدا یکسان بودن خروجی‌ها بررسی و سپس
+زمان هر ساخت بر حسب نانوثانیه گزارش می‌شود.
+
+    python benchmark_templates.py --number 20000
+"""
+
+import argparse
+import sys
+import timeit
+
+import templates
+
+
+SAMPLE_DAY = {
+    "topic_emoji": "💚",
+    "topic_name": "شکرگزاری برای سلامتی",
+    "week_title": "هفته اول: بیداری شکرگزاری",
+    "week_number": 1,
+    "day_number": 3,
+    "author_quote": "«شکرگزاری، درِ فراوانی را می‌گشاید» - راندا برن",
+    "intro": "امروز برای سلامتی بدنتان شکرگزار باشید.",
+    "items": [f"برای مورد شماره {i} سلامتی‌ام سپاسگزارم" for i in range(1, 11)],
+    "exercise": "ده نفس عمیق با حس قدردانی بکشید.",
+    "affirmation": "بدن من هر روز سالم‌تر می‌شود.",
+    "reflection": "امروز کدام بخش بدنتان بیشتر به شما کمک کرد؟"
+}
+
+SAMPLE_TOPICS = [
+    {"id": i, "emoji": emoji, "name": f"موضوع {i}"}
+    for i, emoji in enumerate(["💚", "💰", "💖", "🏠", "🎯", "🌿", "🕊️", "😊", "🙏", "✨", "💫", "🌟"], 1)
+]
+SAMPLE_COMPLETED = [28, 21, 14, 7, 3, 0, 0, 0, 1, 2, 0, 0]
+
+
+# ==================== روش قبلی ====================
+
+def legacy_day_page(content, is_completed):
+    message = f"""
+{content['topic_emoji'] * 3}
+<b>{content['week_title']}</b>
+📖 {content.get('author_quote', '')}
+
+<b>{content['topic_name']}</b>
+📅 روز {content['day_number']} از ۲۸ • هفته {content['week_number']}
+🕕 بازنشانی بعدی: ساعت ۶ صبح
+
+<i>{content['intro']}</i>
+
+──────────────
+{content['topic_emoji']} <b>۱۰ شکرگزاری امروز:</b>
+"""
+
+    for i, item in enumerate(content['items'][:10], 1):
+        message += f"\n{i}. {item}"
+
+    message += "\n──────────────\n"
+
+    if content.get('exercise'):
+        message += f"💡 <b>تمرین امروز:</b> {content['exercise']}\n\n"
+
+    if content.get('affirmation'):
+        message += f"🌟 <b>تأکید مثبت:</b> <i>{content['affirmation']}</i>\n\n"
+
+    if content.get('reflection'):
+        message += f"💭 <b>بازتاب:</b> {content['reflection']}\n\n"
+
+    if is_completed:
+        message += "✅ <b>این روز قبلاً تکمیل شده است.</b>"
+    else:
+        message += "🙏 پس از خواندن، دکمه 'امروز شکرگزار بودم' را فشار دهید."
+
+    return message
+
+
+def legacy_topic_progress(topic_info, completed, current_day):
+    percentage = (completed / 28) * 100
+
+    text = f"""
+{topic_info['emoji']} <b>پیشرفت در {topic_info['name']}</b>
+
+✅ روزهای تکمیل‌شده: {completed} از ۲۸
+📅 روز جاری: {current_day}
+📈 پیشرفت: {percentage:.1f}%
+"""
+
+    progress_bar_length = 10
+    filled = int((current_day / 28) * progress_bar_length)
+    progress_bar = "█" * filled + "░" * (progress_bar_length - filled)
+    text += f"\n{progress_bar}\n"
+
+    if completed == 28:
+        text += "\n🎊 <b>تبریک! شما این موضوع را کامل کردید!</b>"
+    elif completed >= 20:
+        text += "\n🌟 <b>عالی! نزدیک به پایان هستید.</b>"
+    elif completed >= 10:
+        text += "\n💪 <b>خوب پیش می‌روید! ادامه دهید.</b>"
+    elif completed > 0:
+        text += "\n🚀 <b>شروع خوبی داشته‌اید!</b>"
+    else:
+        text += "\n🎯 <b>هنوز شروع نکرده‌اید. همین حالا شروع کنید!</b>"
+
+    return text
+
+
+def legacy_overall_progress(topics, completed_counts):
+    text = "<b>📊 پیشرفت کلی شما</b>\n\n"
+
+    total_completed = 0
+
+    for topic, completed in zip(topics, completed_counts):
+        total_completed += completed
+
+        progress_bar_length = 5
+        filled = int((completed / 28) * progress_bar_length)
+        progress_bar = "█" * filled + "░" * (progress_bar_length - filled)
+
+        text += f"{topic['emoji']} {topic['name']}: {progress_bar} {completed}/۲۸\n"
+
+    total_days = len(topics) * 28
+    total_percentage = (total_completed / total_days) * 100 if total_days > 0 else 0
+
+    text += f"\n✅ کل روزهای تکمیل‌شده: {total_completed} از {total_days}"
+    text += f"\n📈 درصد کلی: {total_percentage:.1f}%"
+
+    if total_percentage > 70:
+        text += "\n\n🌟 <b>عالی! شما در مسیر تحول کامل هستید.</b>"
+    elif total_percentage > 40:
+        text += "\n\n💪 <b>خوب پیش می‌روید! ادامه دهید.</b>"
+    elif total_percentage > 0:
+        text += "\n\n🚀 <b>شروع خوبی داشته‌اید!</b>"
+
+    return text
+
+
+def legacy_day_completed(topic_emoji, topic_name, day_number, next_reset_human):
+    return f"""
+{topic_emoji} <b>تبریک! روز {day_number} {topic_name} را کامل کردید!</b>
+
+✅ <b>تمرین امروز ثبت شد</b>
+✨ شما یک گام دیگر به سوی تحول زندگی برداشتید
+
+🎯 <b>سیستم روزانه شکرگزاری (ساعت ۶ صبح):</b>
+<i>برای بهترین نتیجه، این روند را دنبال کنید:</i>
+
+1️⃣ <b>فردا ساعت {next_reset_human} به ربات مراجعه کنید</b>
+2️⃣ موضوع "{topic_name}" را انتخاب کنید  
+3️⃣ محتوای روز {day_number + 1} برای شما نمایش داده می‌شود
+
+⏰ <i>این سیستم به شما کمک می‌کند:</i>
+• شکرگزاری صبحگاهی را به عادت تبدیل کنید
+• روز خود را با انرژی مثبت شروع کنید
+• نتایج پایدار و ماندگار بگیرید
+
+🌟 <b>تا فردا صبح، تأثیرات شکرگزاری امروز را در زندگی خود مشاهده کنید...</b>
+"""
+
+
+# ==================== قالب‌ها (مثل polling_bot) ====================
+
+def template_day_page(content, is_completed):
+    parts = [templates.day_page(
+        topic_emojis=content['topic_emoji'] * 3,
+        week_title=content['week_title'],
+        author_quote=content.get('author_quote', ''),
+        topic_name=content['topic_name'],
+        day_number=content['day_number'],
+        week_number=content['week_number'],
+        intro=content['intro'],
+        topic_emoji=content['topic_emoji']
+    )]
+    parts.extend(f"\n{i}. {item}" for i, item in enumerate(content['items'][:10], 1))
+    parts.append("\n──────────────\n")
+
+    if content.get('exercise'):
+        parts.append(f"💡 <b>تمرین امروز:</b> {content['exercise']}\n\n")
+
+    if content.get('affirmation'):
+        parts.append(f"🌟 <b>تأکید مثبت:</b> <i>{content['affirmation']}</i>\n\n")
+
+    if content.get('reflection'):
+        parts.append(f"💭 <b>بازتاب:</b> {content['reflection']}\n\n")
+
+    if is_completed:
+        parts.append("✅ <b>این روز قبلاً تکمیل شده است.</b>")
+    else:
+        parts.append("🙏 پس از خواندن، دکمه 'امروز شکرگزار بودم' را فشار دهید.")
+
+    return "".join(parts)
+
+
+def template_topic_progress(topic_info, completed, current_day):
+    if completed == 28:
+        footer = "🎊 <b>تبریک! شما این موضوع را کامل کردید!</b>"
+    elif completed >= 20:
+        footer = "🌟 <b>عالی! نزدیک به پایان هستید.</b>"
+    elif completed >= 10:
+        footer = "💪 <b>خوب پیش می‌روید! ادامه دهید.</b>"
+    elif completed > 0:
+        footer = "🚀 <b>شروع خوبی داشته‌اید!</b>"
+    else:
+        footer = "🎯 <b>هنوز شروع نکرده‌اید. همین حالا شروع کنید!</b>"
+
+    return templates.topic_progress(
+        emoji=topic_info['emoji'],
+        name=topic_info['name'],
+        completed=completed,
+        current_day=current_day,
+        percentage=(completed / 28) * 100,
+        progress_bar=templates.progress_bar(current_day, 28, 10),
+        footer=footer
+    )
+
+
+def template_overall_progress(topics, completed_counts):
+    total_completed = 0
+    lines = []
+
+    for topic, completed in zip(topics, completed_counts):
+        total_completed += completed
+        lines.append(templates.overall_progress_line(
+            emoji=topic['emoji'],
+            name=topic['name'],
+            progress_bar=templates.progress_bar(completed, 28, 5),
+            completed=completed
+        ))
+
+    total_days = len(topics) * 28
+    total_percentage = (total_completed / total_days) * 100 if total_days > 0 else 0
+
+    if total_percentage > 70:
+        footer = "\n\n🌟 <b>عالی! شما در مسیر تحول کامل هستید.</b>"
+    elif total_percentage > 40:
+        footer = "\n\n💪 <b>خوب پیش می‌روید! ادامه دهید.</b>"
+    elif total_percentage > 0:
+        footer = "\n\n🚀 <b>شروع خوبی داشته‌اید!</b>"
+    else:
+        footer = ""
+
+    return templates.overall_progress(
+        lines="".join(lines),
+        total_completed=total_completed,
+        total_days=total_days,
+        total_percentage=total_percentage,
+        footer=footer
+    )
+
+
+def template_day_completed(topic_emoji, topic_name, day_number, next_reset_human):
+    return templates.day_completed(
+        topic_emoji=topic_emoji,
+        day_number=day_number,
+        topic_name=topic_name,
+        next_reset_human=next_reset_human,
+        next_day=day_number + 1
+    )
+
+
+# ==================== اجرا ====================
+
+CASES = [
+    ("day_page", legacy_day_page, template_day_page, (SAMPLE_DAY, False)),
+    ("topic_progress", legacy_topic_progress, template_topic_progress, (SAMPLE_TOPICS[0], 12, 13)),
+    ("overall_progress", legacy_overall_progress, template_overall_progress, (SAMPLE_TOPICS, SAMPLE_COMPLETED)),
+    ("day_completed", legacy_day_completed, template_day_completed, ("💚", "سلامتی", 3, "۶:۰۰ صبح")),
+]
+
+
+def check_parity() -> list:
+    """نام مواردی که خروجی قالب با روش قبلی یکسان نیست"""
+    mismatched = []
+    for name, legacy, template, args in CASES:
+        if legacy(*args) != template(*args):
+            mismatched.append(name)
+
+    # همه حالت‌های پیام پیشرفت
+    for completed in range(29):
+        for current_day in (max(1, completed), min(28, completed + 1)):
+            args = (SAMPLE_TOPICS[0], completed, current_day)
+            if legacy_topic_progress(*args) != template_topic_progress(*args):
+                mismatched.append(f"topic_progress[{completed}/{current_day}]")
+
+    for completed in (0, 5, 14, 28):
+        counts = [completed] * len(SAMPLE_TOPICS)
+        if legacy_overall_progress(SAMPLE_TOPICS, counts) != template_overall_progress(SAMPLE_TOPICS, counts):
+            mismatched.append(f"overall_progress[{completed}]")
+
+    return mismatched
+
+
+def run_benchmark(number=20000, repeat=5):
+    """زمان هر ساخت (نانوثانیه، بهترین تکرار) برای روش قبلی و قالب‌ها"""
+    results = []
+    for name, legacy, template, args in CASES:
+        legacy_ns = min(timeit.repeat(lambda: legacy(*args), number=number, repeat=repeat)) / number * 1e9
+        template_ns = min(timeit.repeat(lambda: template(*args), number=number, repeat=repeat)) / number * 1e9
+        results.append({
+            "name": name,
+            "legacy_ns": legacy_ns,
+            "template_ns": template_ns,
+            "speedup": legacy_ns / template_ns if template_ns else 0.0
+        })
+    return results
+
+
+def print_report(results):
+    print("=" * 60)
+    print("🧪 بنچمارک قالب‌های پیام")
+    print("=" * 60)
+    print(f"{'پیام':<20}{'قبلی (ns)':>12}{'قالب (ns)':>12}{'نسبت':>10}")
+    for row in results:
+        print(f"{row['name']:<20}{row['legacy_ns']:>12.0f}{row['template_ns']:>12.0f}{row['speedup']:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="مقایسه پیام‌های templates با ساخت متن به روش قبلی")
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    mismatched = check_parity()
+    if mismatched:
+        print(f"❌ خروجی متفاوت: {', '.join(mismatched)}")
+        sys.exit(1)
+    print("✅ خروجی قالب‌ها با روش قبلی یکسان است")
+
+    print_report(run_benchmark(args.number, args.repeat))
+    sys.exit(0)
\ No newline at end of file
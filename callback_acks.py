@@ -0,0 +1,139 @@
+"""
+callback_acks.py - پاسخ‌دهی پس‌زمینه به دکمه‌های Inline (answerCallbackQuery)
+
+تأیید دکمه همان لحظه دریافت در پس‌زمینه ارسال می‌شود و همزمان با اجرای
+هندلر به بله می‌رسد. فقط برای دکمه‌هایی که هندلرشان متن کوتاهی (toast)
+برمی‌گرداند تأیید تا پایان هندلر نگه داشته می‌شود تا متن همراه آن نمایش
+داده شود؛ اگر هندلر تا مهلت تعیین‌شده تمام نشود، تأیید بدون متن ارسال
+می‌شود تا دکمه منتظر نماند.
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CallbackAckPipeline:
+    """ارسال تأیید callback ها در پس‌زمینه با شمارنده تأخیر و خطا"""
+
+    def __init__(self, answer, workers: int = 4, deadline: float = 1.5, late_after: float = 5.0):
+        """
+        Args:
+            answer: تابع ارسال answer(callback_id, text) -> bool
+            workers: تعداد thread های ارسال
+            deadline: حداکثر انتظار برای هندلر toast دار پیش از تأیید بدون متن (ثانیه)
+            late_after: تأییدی که دیرتر از این پس از دریافت ارسال شود «دیر» شمرده می‌شود
+        """
+        self.answer = answer
+        self.deadline = deadline
+        self.late_after = late_after
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="callback-ack")
+        self._cond = threading.Condition()
+        self._received = {}     # callback_id -> زمان دریافت
+        self._deadlines = []    # heap: (deadline, callback_id)
+        self._pending_sends = 0
+        self._thread = None
+        self._running = False
+
+        self.stats = {"acked": 0, "failed": 0, "late": 0, "deadline": 0, "toasts": 0, "dropped_toasts": 0}
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._watch_deadlines, name="callback-ack", daemon=True)
+            self._thread.start()
+
+    def received(self, callback_id, hold: bool = False):
+        """
+        ثبت دریافت callback (پیش از اجرای هندلر)
+
+        Args:
+            hold: هندلر toast برمی‌گرداند؛ تأیید تا finish یا پایان مهلت نگه داشته می‌شود.
+                  در غیر این صورت تأیید بدون متن همین حالا ارسال می‌شود.
+        """
+        if not self._running:
+            self.start()
+
+        now = time.monotonic()
+        if not hold:
+            self._send(callback_id, None, now)
+            return
+
+        with self._cond:
+            self._received[callback_id] = now
+            heapq.heappush(self._deadlines, (now + self.deadline, callback_id))
+            self._cond.notify()
+
+    def finish(self, callback_id, text: str = None):
+        """پایان هندلر؛ تأیید (با toast اختیاری) در پس‌زمینه ارسال می‌شود"""
+        with self._cond:
+            received_at = self._received.pop(callback_id, None)
+            if received_at is None:
+                # تأیید بدون متن پیش‌تر ارسال شده است (بدون hold یا پایان مهلت)
+                if text:
+                    self.stats["dropped_toasts"] += 1
+                return
+        self._send(callback_id, text, received_at)
+
+    def _send(self, callback_id, text, received_at):
+        with self._cond:
+            self._pending_sends += 1
+        self._executor.submit(self._answer, callback_id, text, received_at)
+
+    def _answer(self, callback_id, text, received_at):
+        try:
+            ok = self.answer(callback_id, text)
+        except Exception as e:
+            print(f"⚠️ خطا در تأیید callback: {e}")
+            ok = False
+
+        with self._cond:
+            self._pending_sends -= 1
+            if ok:
+                self.stats["acked"] += 1
+                if text:
+                    self.stats["toasts"] += 1
+                if time.monotonic() - received_at > self.late_after:
+                    self.stats["late"] += 1
+            else:
+                self.stats["failed"] += 1
+            self._cond.notify_all()
+
+    def _watch_deadlines(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                if not self._deadlines:
+                    self._cond.wait()
+                    continue
+
+                deadline, callback_id = self._deadlines[0]
+                now = time.monotonic()
+                if deadline > now:
+                    self._cond.wait(deadline - now)
+                    continue
+
+                heapq.heappop(self._deadlines)
+                received_at = self._received.pop(callback_id, None)
+                if received_at is None:
+                    continue
+                self.stats["deadline"] += 1
+
+            self._send(callback_id, None, received_at)
+
+    def stop(self, timeout: float = 5):
+        """ارسال تأییدهای باقیمانده و توقف"""
+        with self._cond:
+            for callback_id, received_at in list(self._received.items()):
+                self._received.pop(callback_id)
+                self._pending_sends += 1
+                self._executor.submit(self._answer, callback_id, None, received_at)
+            self._cond.wait_for(lambda: self._pending_sends == 0, timeout)
+            self._running = False
+            self._cond.notify_all()
+        self._executor.shutdown(wait=False)
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+content_bundle.py - فایل فشرده محتوای همه روزها برای شروع سریع
+
+مرحله ساخت همه روزهای ۸ موضوع × ۴ هفته، TOPICS و WEEK_THEMES را در یک
+فایل با جدول offset می‌نویسد و همان‌جا بررسی می‌کند که هر موضوع ۲۸ روز و
+هر روز ۱۰ مورد شکرگزاری داشته باشد (به جای محتوای پیش‌فرض در زمان اجرا).
+در زمان اجرا فایل mmap می‌شود و فقط روزهای درخواست‌شده decode می‌شوند؛
+چند پروسه ربات صفحه‌های فایل را در page cache به اشتراک می‌گذارند.
+
+    python content_bundle.py build [data/content.bundle]
+    python content_bundle.py check [data/content.bundle]
+
+قالب فایل (little-endian):
+    header   magic "BCNT"، نسخه، بیشترین topic_id، روز هر موضوع، offset و طول metadata
+    table    (بیشترین topic_id + 1) × (روز + 1) خانه (offset، طول)؛ طول صفر یعنی خالی
+    data     JSON هر روز و JSON metadata (topics، week_themes)
+"""
+
+import importlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from content_index import DAYS_PER_TOPIC, DAYS_PER_WEEK, build_day, freeze_day
+
+MAGIC = b"BCNT"
+VERSION = 1
+ITEMS_PER_DAY = 10
+HEADER = struct.Struct("<4sHHHxxII")
+ENTRY = struct.Struct("<II")
+
+
+def get_bundle_path() -> str:
+    return os.getenv('CONTENT_BUNDLE', os.path.join(os.getenv('BOT_DATA_DIR', 'data'), "content.bundle"))
+
+
+# ==================== ساخت ====================
+
+def collect_days(topics: dict, week_themes: dict, package: str = "content",
+                 import_module=importlib.import_module):
+    """
+    خواندن همه روزها از ماژول‌های هفته
+
+    Returns:
+        ({topic_id: [محتوای روز ۱ … ۲۸]}, [مشکلات پیدا شده])
+    """
+    days = {}
+    problems = []
+
+    for topic_id, topic in topics.items():
+        topic_days = []
+        for week_number in range(1, DAYS_PER_TOPIC // DAYS_PER_WEEK + 1):
+            module_path = f"{package}.{topic['folder']}.week_{week_number}"
+            try:
+                module = import_module(module_path)
+            except ImportError as e:
+                problems.append(f"{module_path}: {e}")
+                continue
+
+            week_theme = week_themes.get(week_number, week_themes[1])
+            for day_in_week in range(1, DAYS_PER_WEEK + 1):
+                day_number = (week_number - 1) * DAYS_PER_WEEK + day_in_week
+                day_content = getattr(module, f"day_{day_in_week}", None)
+                if not isinstance(day_content, dict):
+                    problems.append(f"{module_path}.day_{day_in_week}: یافت نشد")
+                    continue
+
+                items = day_content.get("items") or []
+                if len(items) != ITEMS_PER_DAY or not all(isinstance(item, str) and item for item in items):
+                    problems.append(f"{module_path}.day_{day_in_week}: {len(items)} مورد (باید {ITEMS_PER_DAY} باشد)")
+                    continue
+
+                topic_days.append(build_day(topic_id, topic, week_theme, day_number, day_content))
+
+        if len(topic_days) == DAYS_PER_TOPIC:
+            days[topic_id] = topic_days
+
+    return days, problems
+
+
+def write_bundle(path: str, topics: dict, week_themes: dict, days: dict):
+    """نوشتن فایل (موقت + جایگزینی اتمیک)"""
+    max_topic = max(topics)
+    table = [(0, 0)] * ((max_topic + 1) * (DAYS_PER_TOPIC + 1))
+
+    chunks = []
+    offset = HEADER.size + ENTRY.size * len(table)
+    for topic_id, topic_days in sorted(days.items()):
+        for day_number, content in enumerate(topic_days, 1):
+            data = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            table[topic_id * (DAYS_PER_TOPIC + 1) + day_number] = (offset, len(data))
+            chunks.append(data)
+            offset += len(data)
+
+    meta = json.dumps({"topics": topics, "week_themes": week_themes},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, max_topic, DAYS_PER_TOPIC, offset, len(meta)))
+        f.write(b"".join(ENTRY.pack(*entry) for entry in table))
+        f.write(b"".join(chunks))
+        f.write(meta)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def build_bundle(path: str = None, topics: dict = None, week_themes: dict = None) -> dict:
+    """
+    ساخت فایل محتوا از ماژول‌های هفته
+
+    Raises:
+        ValueError: اگر روزی ناموجود باشد یا تعداد موارد آن ۱۰ نباشد (فایلی نوشته نمی‌شود)
+    """
+    if topics is None or week_themes is None:
+        from static.content.loader import TOPICS, WEEK_THEMES
+        topics = TOPICS if topics is None else topics
+        week_themes = WEEK_THEMES if week_themes is None else week_themes
+
+    path = path or get_bundle_path()
+    days, problems = collect_days(topics, week_themes)
+    if problems:
+        raise ValueError(f"{len(problems)} مشکل در محتوا:\n" + "\n".join(problems))
+
+    write_bundle(path, topics, week_themes, days)
+    return {"path": path, "topics": len(days), "days": sum(len(d) for d in days.values()),
+            "bytes": os.path.getsize(path)}
+
+
+# ==================== خواندن ====================
+
+class ContentBundle:
+    """خواننده mmap فایل محتوا با همان رابط ContentIndex (get و missing)"""
+
+    missing = ()
+
+    def __init__(self, path: str, version: int = 0):
+        self.path = path
+        self.version = version
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.max_topic, self.days_per_topic, meta_offset, meta_length = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or self.days_per_topic != DAYS_PER_TOPIC:
+            self._mm.close()
+            raise ValueError(f"فایل محتوای نامعتبر: {path}")
+
+        meta = json.loads(self._mm[meta_offset:meta_offset + meta_length])
+        self.topics = {int(topic_id): topic for topic_id, topic in meta["topics"].items()}
+        self.week_themes = {int(week): theme for week, theme in meta["week_themes"].items()}
+        self.default_topic = min(self.topics)
+
+        # روزهای decode شده (فقط روزهایی که درخواست شده‌اند)
+        self._decoded = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, topic_id, day_number):
+        if not isinstance(topic_id, int) or not 0 < topic_id <= self.max_topic:
+            return 0, 0
+        return ENTRY.unpack_from(self._mm, HEADER.size + ENTRY.size * (topic_id * (DAYS_PER_TOPIC + 1) + day_number))
+
+    def get(self, topic_id: int, day_number: int):
+        """محتوای یک روز؛ موضوع نامعتبر ← موضوع اول، روز نامعتبر ← روز ۱"""
+        if not 1 <= day_number <= DAYS_PER_TOPIC:
+            day_number = 1
+
+        content = self._decoded.get((topic_id, day_number))
+        if content is not None:
+            return content
+
+        offset, length = self._entry(topic_id, day_number)
+        if not length:
+            return self.get(self.default_topic, day_number)
+
+        content = freeze_day(json.loads(self._mm[offset:offset + length]), self.version)
+        with self._lock:
+            return self._decoded.setdefault((topic_id, day_number), content)
+
+    def __len__(self):
+        return len(self.topics) * DAYS_PER_TOPIC
+
+    def close(self):
+        self._mm.close()
+
+
+def check_bundle(path: str) -> dict:
+    """decode همه روزها و بررسی تعداد موارد"""
+    bundle = ContentBundle(path)
+    try:
+        for topic_id in bundle.topics:
+            for day_number in range(1, DAYS_PER_TOPIC + 1):
+                content = bundle.get(topic_id, day_number)
+                if content["topic_id"] != topic_id or content["day_number"] != day_number:
+                    raise ValueError(f"خانه اشتباه برای موضوع {topic_id} روز {day_number}")
+                if len(content["items"]) != ITEMS_PER_DAY:
+                    raise ValueError(f"موضوع {topic_id} روز {day_number}: {len(content['items'])} مورد")
+        return {"path": path, "topics": len(bundle.topics), "days": len(bundle), "bytes": os.path.getsize(path)}
+    finally:
+        bundle.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("build", "check"):
+        print("استفاده: python content_bundle.py build|check [مسیر فایل]")
+        sys.exit(1)
+
+    bundle_path = sys.argv[2] if len(sys.argv) > 2 else get_bundle_path()
+    try:
+        if sys.argv[1] == "build":
+            stats = build_bundle(bundle_path)
+            print(f"✅ فایل محتوا ساخته شد: {stats}")
+        else:
+            stats = check_bundle(bundle_path)
+            print(f"✅ فایل محتوا سالم است: {stats}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
\ No newline at end of file
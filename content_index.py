@@ -0,0 +1,132 @@
+"""
+content_index.py - ایندکس فقط‌خواندنی محتوای همه روزها
+
+محتوای ۸ موضوع × ۲۸ روز یک بار (هنگام شروع ربات) از ماژول‌های
+week_1 … week_4 هر موضوع خوانده و به شکل آرایه [topic][day] نگهداری
+می‌شود. هر خانه یک MappingProxyType مشترک است؛ دریافت محتوا فقط یک
+اندیس‌گذاری است، بدون import، کپی دیکشنری یا چاپ در مسیر درخواست.
+"""
+
+import importlib
+from types import MappingProxyType
+
+DAYS_PER_TOPIC = 28
+DAYS_PER_WEEK = 7
+
+
+def freeze_day(content: dict, version: int = 0) -> MappingProxyType:
+    """
+    نسخه فقط‌خواندنی محتوای یک روز (لیست موارد به tuple تبدیل می‌شود)
+
+    content_version نسخه محتوایی است که این روز از آن آمده (برای کش پیام‌ها).
+    """
+    frozen = dict(content)
+    frozen["items"] = tuple(frozen.get("items") or ())
+    frozen["content_version"] = version
+    return MappingProxyType(frozen)
+
+
+def build_day(topic_id, topic, week_theme, day_number, day_content) -> dict:
+    """ساخت محتوای کامل یک روز با همان کلیدهای load_day_content"""
+    week_number = (day_number - 1) // DAYS_PER_WEEK + 1
+    return {
+        "success": True,
+        "topic_id": topic_id,
+        "topic_name": topic["name"],
+        "topic_emoji": topic["emoji"],
+        "topic_color": topic["color"],
+        "day_number": day_number,
+        "week_number": week_number,
+        "day_in_week": (day_number - 1) % DAYS_PER_WEEK + 1,
+        "week_title": week_theme["title"],
+        "week_description": week_theme["description"],
+        "week_quote": week_theme["quote"],
+        "author_quote": topic.get("author_quote", ""),
+        "title": day_content.get("title", f"روز {day_number}: تمرین {topic['name']}"),
+        "intro": day_content.get("intro", ""),
+        "items": day_content.get("items", []),
+        "exercise": day_content.get("exercise", ""),
+        "affirmation": day_content.get("affirmation", ""),
+        "reflection": day_content.get("reflection", "")
+    }
+
+
+class ContentIndex:
+    """آرایه تغییرناپذیر محتوای روزها: index.get(topic_id, day_number)"""
+
+    __slots__ = ("_days", "default_topic", "missing", "version")
+
+    def __init__(self, days: dict, missing=(), version: int = 0):
+        """
+        Args:
+            days: {topic_id: [محتوای روز ۱ … روز ۲۸]}
+            missing: (topic_id, day_number) روزهایی که با محتوای پیش‌فرض پر شده‌اند
+            version: شماره نسخه محتوا (با هر بارگذاری دوباره افزایش می‌یابد)
+        """
+        size = max(days) + 1
+        table = [None] * size
+        for topic_id, topic_days in days.items():
+            # خانه صفر برای اندیس‌گذاری مستقیم با شماره روز
+            table[topic_id] = (None,) + tuple(freeze_day(content, version) for content in topic_days)
+        self._days = tuple(table)
+        self.default_topic = min(days)
+        self.missing = tuple(missing)
+        self.version = version
+
+    def get(self, topic_id: int, day_number: int) -> MappingProxyType:
+        """محتوای یک روز؛ موضوع نامعتبر ← موضوع اول، روز نامعتبر ← روز ۱"""
+        try:
+            topic_days = self._days[topic_id]
+        except (IndexError, TypeError):
+            topic_days = None
+        if topic_days is None:
+            topic_days = self._days[self.default_topic]
+
+        if not 1 <= day_number <= DAYS_PER_TOPIC:
+            day_number = 1
+        return topic_days[day_number]
+
+    def __len__(self):
+        return sum(len(topic_days) - 1 for topic_days in self._days if topic_days)
+
+
+def build_content_index(topics: dict, week_themes: dict, fallback, package: str = "content",
+                        import_module=importlib.import_module, version: int = 0) -> ContentIndex:
+    """
+    خواندن همه ماژول‌های هفته و ساخت ایندکس
+
+    Args:
+        topics: TOPICS (با کلید folder برای هر موضوع)
+        week_themes: WEEK_THEMES
+        fallback: fallback(topic_id, day_number) برای روزهای ناموجود
+        package: بسته پایه ماژول‌های محتوا
+        import_module: تابع import (بارگذاری دوباره از content_reload)
+        version: شماره نسخه محتوا
+    """
+    days = {}
+    missing = []
+
+    for topic_id, topic in topics.items():
+        topic_days = []
+        for week_number in range(1, DAYS_PER_TOPIC // DAYS_PER_WEEK + 1):
+            week_theme = week_themes.get(week_number, week_themes[1])
+            try:
+                module = import_module(f"{package}.{topic['folder']}.week_{week_number}")
+            except ImportError:
+                module = None
+
+            for day_in_week in range(1, DAYS_PER_WEEK + 1):
+                day_number = (week_number - 1) * DAYS_PER_WEEK + day_in_week
+                day_content = getattr(module, f"day_{day_in_week}", None)
+                if day_content is None and module is not None:
+                    # مثل قبل: روز ناموجود ← day_1 همان هفته
+                    day_content = getattr(module, "day_1", None)
+
+                if day_content is None:
+                    missing.append((topic_id, day_number))
+                    topic_days.append(fallback(topic_id, day_number))
+                else:
+                    topic_days.append(build_day(topic_id, topic, week_theme, day_number, day_content))
+        days[topic_id] = topic_days
+
+    return ContentIndex(days, missing, version)
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""
+content_reload.py - بارگذاری دوباره محتوا بدون ری‌استارت ربات
+
+یک thread پس‌زمینه زمان تغییر فایل‌های محتوا را بررسی می‌کند: ماژول‌های
+week_1 … week_4 همه موضوعات، یا فایل محتوا (content_bundle) اگر ربات از
+آن استفاده می‌کند. پس از ثابت ماندن تغییر در دو بررسی پشت سر هم، نسخه
+جدید محتوا بیرون از مسیر درخواست‌ها ساخته و به صورت اتمیک جایگزین
+می‌شود. کش پیام‌ها (render_cache) با اولین درخواست از نسخه جدید خالی
+می‌شود؛ درخواست‌های در جریان با نسخه قبلی کامل می‌شوند.
+
+اگر ساخت نسخه جدید خطا بدهد (مثلاً خطای نحوی در week_N.py) یا روزهای
+بیشتری به محتوای پیش‌فرض برسند، نسخه فعلی باقی می‌ماند.
+
+نسخه جایگزین‌شده (mmap فایل محتوا) پس از یک مهلت کوتاه برای درخواست‌های
+در جریان بسته می‌شود.
+
+تنظیمات:
+    CONTENT_RELOAD=0               فعال کردن بررسی تغییرات
+    CONTENT_RELOAD_INTERVAL=2      فاصله بررسی (ثانیه)
+    CONTENT_RELOAD_GRACE=10        مهلت پیش از بستن نسخه قبلی (ثانیه)
+"""
+
+import importlib.util
+import os
+import threading
+import time
+
+from static.content.loader import TOPICS, get_content_index, load_content_index, swap_content_index
+
+WEEKS = 4
+
+
+def import_fresh(name):
+    """
+    خواندن دوباره یک ماژول از فایل منبع
+
+    ماژول جدید در sys.modules ثبت نمی‌شود و از pyc استفاده نمی‌کند، پس
+    نسخه در حال استفاده دست نمی‌خورد و تغییرات هم‌ثانیه هم دیده می‌شوند.
+    """
+    spec = importlib.util.find_spec(name)
+    if spec is None or not spec.origin:
+        raise ImportError(f"ماژول {name} یافت نشد")
+
+    module = importlib.util.module_from_spec(spec)
+    with open(spec.origin, "rb") as f:
+        source = f.read()
+    exec(compile(source, spec.origin, "exec"), module.__dict__)
+    return module
+
+
+def get_content_files(index) -> list:
+    """فایل‌هایی که نسخه فعلی محتوا از آن‌ها ساخته شده است"""
+    path = getattr(index, "path", None)
+    if path:
+        return [path]
+
+    files = []
+    for topic in TOPICS.values():
+        for week_number in range(1, WEEKS + 1):
+            try:
+                spec = importlib.util.find_spec(f"content.{topic['folder']}.week_{week_number}")
+            except ImportError:
+                spec = None
+            if spec is not None and spec.origin:
+                files.append(spec.origin)
+    return files
+
+
+def snapshot(files) -> dict:
+    """(mtime, اندازه) هر فایل؛ None برای فایل حذف‌شده"""
+    result = {}
+    for path in files:
+        try:
+            stat = os.stat(path)
+            result[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            result[path] = None
+    return result
+
+
+class ContentWatcher:
+    """بررسی دوره‌ای فایل‌های محتوا و جایگزینی نسخه جدید"""
+
+    def __init__(self, interval: float = 2.0, grace: float = 10.0):
+        """
+        Args:
+            interval: فاصله بررسی فایل‌ها (ثانیه)
+            grace: مهلت درخواست‌های در جریان پیش از بستن نسخه جایگزین‌شده (ثانیه)
+        """
+        self.interval = interval
+        self.grace = grace
+        self._files = get_content_files(get_content_index())
+        self._current = snapshot(self._files)
+        self._pending = None
+        self._retired = []      # (زمان بستن، نسخه جایگزین‌شده)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.stats = {"checks": 0, "reloads": 0, "failed": 0, "closed": 0}
+
+    def close_retired(self, force: bool = False):
+        """بستن نسخه‌های جایگزین‌شده‌ای که مهلتشان گذشته است (mmap فایل محتوا)"""
+        now = time.monotonic()
+        keep = []
+        for deadline, index in self._retired:
+            if not force and deadline > now:
+                keep.append((deadline, index))
+                continue
+            try:
+                index.close()
+                self.stats["closed"] += 1
+            except Exception as e:
+                print(f"⚠️ خطا در بستن نسخه {index.version} محتوا: {e}")
+        self._retired = keep
+
+    def check(self) -> bool:
+        """
+        یک بار بررسی تغییرات
+
+        Returns:
+            True اگر نسخه جدید جایگزین شده باشد
+        """
+        self.stats["checks"] += 1
+        self.close_retired()
+        state = snapshot(self._files)
+        if state == self._current:
+            self._pending = None
+            return False
+
+        # صبر برای ثابت ماندن فایل‌ها (ویرایشگرها چند بار می‌نویسند)
+        if state != self._pending:
+            self._pending = state
+            return False
+
+        self._pending = None
+        self._current = state
+        return self.reload()
+
+    def reload(self) -> bool:
+        """ساخت و جایگزینی نسخه جدید محتوا"""
+        old_index = get_content_index()
+        try:
+            index = load_content_index(import_module=import_fresh)
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"❌ خطا در بارگذاری دوباره محتوا، نسخه {old_index.version} باقی ماند: {e}")
+            return False
+
+        if len(index.missing) > len(old_index.missing):
+            self.stats["failed"] += 1
+            print(f"⚠️ نسخه جدید {len(index.missing)} روز ناقص دارد؛ نسخه {old_index.version} باقی ماند")
+            return False
+
+        swap_content_index(index)
+        # ایندکس داخل حافظه close ندارد؛ جمع‌آوری زباله آن را آزاد می‌کند
+        if old_index is not index and hasattr(old_index, "close"):
+            self._retired.append((time.monotonic() + self.grace, old_index))
+        # منبع محتوا ممکن است عوض شده باشد (مثلاً فایل محتوا ساخته شده)
+        self._files = get_content_files(index)
+        self._current = snapshot(self._files)
+        self.stats["reloads"] += 1
+        print(f"🔄 محتوا به نسخه {index.version} به‌روز شد")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ خطا در بررسی فایل‌های محتوا: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="content-reload", daemon=True)
+            self._thread.start()
+            print(f"👀 بررسی تغییرات {len(self._files)} فایل محتوا هر {self.interval:g} ثانیه")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.close_retired(force=True)
+
+
+_watcher = None
+
+
+def start_content_watcher():
+    """شروع بررسی تغییرات در صورت فعال بودن CONTENT_RELOAD"""
+    global _watcher
+    if os.getenv('CONTENT_RELOAD', '0') != "1" or _watcher is not None:
+        return _watcher
+    _watcher = ContentWatcher(float(os.getenv('CONTENT_RELOAD_INTERVAL', '2')),
+                              float(os.getenv('CONTENT_RELOAD_GRACE', '10')))
+    _watcher.start()
+    return _watcher
+
+
+def stop_content_watcher():
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
\ No newline at end of file
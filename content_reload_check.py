@@ -0,0 +1,146 @@
+"""
+content_reload_check.py - بررسی بارگذاری دوباره محتوا در حالت sharded
+
+ربات با start_sharded و API جعلی بله در یک پردازه جدا اجرا می‌شود.
+ماژول‌های محتوا در یک پوشه موقت کپی می‌شوند تا فایل‌های اصلی دست
+نخورند. پس از دریافت صفحه روز ۱ از همه کارگرها، متن مقدمه روز ۱ در
+week_1.py تغییر می‌کند و باید هر کارگر متن جدید را بفرستد. در پایان
+ربات با Ctrl+C متوقف می‌شود و کارگرها باید بدون خطا بسته شوند.
+
+    python content_reload_check.py
+    python content_reload_check.py --workers 3 --timeout 60
+"""
+
+import argparse
+import importlib.util
+import itertools
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_bale_api import FakeBaleAPI
+from loader import TOPICS
+from sharded_runner import get_shard
+
+MARKER = "متن ویرایش‌شده برای بررسی بارگذاری دوباره"
+
+BOT_SCRIPT = "import sys; sys.path.insert(0, sys.argv[1]); import sharded_runner; sharded_runner.start_sharded()"
+
+
+def copy_content(target_root: str) -> str:
+    """کپی بسته content در پوشه موقت؛ مسیر week_1 موضوع ۱ را برمی‌گرداند"""
+    spec = importlib.util.find_spec("content")
+    if spec is None or not spec.submodule_search_locations:
+        raise RuntimeError("بسته content یافت نشد")
+    shutil.copytree(list(spec.submodule_search_locations)[0], os.path.join(target_root, "content"),
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    return os.path.join(target_root, "content", TOPICS[1]["folder"], "week_1.py")
+
+
+def request_day_pages(api, workers, user_ids, timeout) -> dict:
+    """
+    باز کردن موضوع ۱ با یک کاربر تازه روی هر کارگر: کارگر -> متن صفحه روز
+
+    کاربر قبلی پس از دیدن روز ۱ تا بازنشانی بعدی قفل است، پس هر بار کاربر
+    جدید لازم است.
+    """
+    users = {}
+    while len(users) < workers:
+        user_id = next(user_ids)
+        users.setdefault(get_shard(str(user_id), workers), user_id)
+    for user_id in users.values():
+        api.add_update(user_id, "start")
+        api.add_update(user_id, "topic")
+
+    deadline = time.monotonic() + timeout
+    pages = {}
+    while len(pages) < workers and time.monotonic() < deadline:
+        time.sleep(0.1)
+        for shard, user_id in users.items():
+            for text in api.sent_texts(user_id):
+                if "روز 1 از" in text:
+                    pages[shard] = text
+    return pages
+
+
+def run(workers: int = 2, timeout: float = 30) -> int:
+    failures = 0
+    root = tempfile.mkdtemp(prefix="content_reload_")
+    week_file = copy_content(root)
+    user_ids = itertools.count(100000)
+
+    api = FakeBaleAPI(users=0).start()
+    env = dict(os.environ)
+    env.pop("OFFSET_FILE", None)
+    env.update({
+        "BALE_BOT_TOKEN": "check",
+        "BALE_API_URL": api.url,
+        "BOT_DATA_DIR": os.path.join(root, "data"),
+        "BOT_WORKERS": str(workers),
+        "CONTENT_BUNDLE": os.path.join(root, "missing.bundle"),
+        "CONTENT_RELOAD": "1",
+        "CONTENT_RELOAD_INTERVAL": "0.2",
+        "PYTHONUNBUFFERED": "1"
+    })
+    log_path = os.path.join(root, "bot.log")
+    log = open(log_path, "w", encoding="utf-8")
+    bot = subprocess.Popen([sys.executable, "-c", BOT_SCRIPT, root], env=env, stdout=log, stderr=subprocess.STDOUT,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        spec = importlib.util.spec_from_file_location("week_1_original", week_file)
+        original = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(original)
+        intro = original.day_1["intro"]
+
+        pages = request_day_pages(api, workers, user_ids, timeout)
+        ok = sum(intro in page for page in pages.values())
+        failures += ok < workers
+        print(f"   {'✅' if ok == workers else '❌'} متن اولیه روز ۱ از {ok}/{workers} کارگر")
+
+        with open(week_file, "a", encoding="utf-8") as f:
+            f.write(f"\nday_1 = dict(day_1, intro={MARKER!r})\n")
+
+        # کارگرها تغییر را پس از دو بررسی پشت سر هم می‌بینند
+        deadline = time.monotonic() + timeout
+        reloaded = set()
+        while len(reloaded) < workers and time.monotonic() < deadline:
+            pages = request_day_pages(api, workers, user_ids, timeout)
+            reloaded.update(shard for shard, page in pages.items() if MARKER in page)
+        failures += len(reloaded) < workers
+        print(f"   {'✅' if len(reloaded) == workers else '❌'} متن ویرایش‌شده روز ۱ از {len(reloaded)}/{workers} کارگر")
+    finally:
+        bot.send_signal(signal.SIGINT)
+        try:
+            code = bot.wait(timeout)
+        except subprocess.TimeoutExpired:
+            bot.kill()
+            code = bot.wait()
+        api.stop()
+        log.close()
+
+    with open(log_path, encoding="utf-8") as f:
+        output = f.read()
+    # هر کارگر مسیر shutdown خود را اجرا کرده است (گزارش Dispatcher)
+    stopped = code == 0 and "Traceback" not in output and output.count("🧵 Dispatcher") == workers
+    failures += not stopped
+    print(f"   {'✅' if stopped else '❌'} توقف ربات و کارگرها (کد {code})")
+
+    if failures:
+        print(f"\n📄 خروجی ربات:\n{output}")
+    shutil.rmtree(root, ignore_errors=True)
+    print(f"\n{'✅ بارگذاری دوباره در همه کارگرها موفق' if not failures else f'❌ {failures} بررسی ناموفق'}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="بررسی بارگذاری دوباره محتوا در حالت sharded")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=30, help="مهلت هر مرحله (ثانیه)")
+    args = parser.parse_args()
+
+    sys.exit(1 if run(args.workers, args.timeout) else 0)
\ No newline at end of file
@@ -4,23 +4,26 @@ daily_reset.py - سیستم بازنشانی روزانه ساعت ۶ صبح
 
 import json
 import os
+import threading
 import time
 from datetime import datetime, timedelta
-from typing import Tuple, Optional
+from typing import List, Optional, Tuple
 
 
-class DailyResetManager:
-    """مدیریت دسترسی روزانه بر اساس ساعت ۶ صبح"""
+class JsonAccessStore:
+    """
+    ذخیره رکوردهای دسترسی در یک فایل JSON مشترک (data/daily_reset/user_access.json)
 
-    def __init__(self, reset_hour: int = 6):
-        """
-        Args:
-            reset_hour: ساعت بازنشانی روزانه (پیش‌فرض: 6 صبح)
-        """
-        self.reset_hour = reset_hour
-        self.data_dir = "data/daily_reset"
+    رابط store: get(user_id, topic_id)، put(user_id, topic_id, record)،
+    delete(user_id, topic_id) و eligible_between(start, end).
+    """
+
+    def __init__(self, data_dir: str = None):
+        self.data_dir = data_dir or os.path.join(os.getenv('BOT_DATA_DIR', 'data'), "daily_reset")
         self.access_file = os.path.join(self.data_dir, "user_access.json")
         os.makedirs(self.data_dir, exist_ok=True)
+        # قفل برای خواندن-تغییر-نوشتن فایل مشترک در پردازش همزمان
+        self._lock = threading.RLock()
 
     def _load_data(self):
         """بارگذاری داده‌های دسترسی"""
@@ -33,14 +36,73 @@ class DailyResetManager:
         return {}
 
     def _save_data(self, data):
-        """ذخیره داده‌های دسترسی"""
-        with open(self.access_file, 'w', encoding='utf-8') as f:
+        """ذخیره داده‌های دسترسی (نوشتن در فایل موقت و جایگزینی اتمیک)"""
+        tmp_file = f"{self.access_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.access_file)
 
     def _get_user_key(self, user_id: str, topic_id: int) -> str:
         """ساخت کلید کاربر"""
         return f"{user_id}_{topic_id}"
 
+    def get(self, user_id: str, topic_id: int) -> Optional[dict]:
+        return self._load_data().get(self._get_user_key(user_id, topic_id))
+
+    def put(self, user_id: str, topic_id: int, record: dict):
+        with self._lock:
+            data = self._load_data()
+            data.setdefault(self._get_user_key(user_id, topic_id), {}).update(record)
+            self._save_data(data)
+
+    def delete(self, user_id: str, topic_id: int) -> bool:
+        with self._lock:
+            data = self._load_data()
+            user_key = self._get_user_key(user_id, topic_id)
+            if user_key not in data:
+                return False
+            del data[user_key]
+            self._save_data(data)
+            return True
+
+    def eligible_between(self, start: float, end: float) -> List[Tuple[str, int]]:
+        """کاربرانی که next_reset_at آن‌ها در بازه [start, end) است (پیمایش کامل فایل)"""
+        result = []
+        for user_key, record in self._load_data().items():
+            if start <= record.get("next_reset_at", 0) < end:
+                user_id, _, topic_id = user_key.rpartition("_")
+                result.append((user_id, int(topic_id)))
+        return result
+
+
+def create_access_store():
+    """store دسترسی پشتوانه انتخاب‌شده با STORAGE_BACKEND (storage.py)"""
+    from storage import get_storage
+    return get_storage().access
+
+
+class DailyResetManager:
+    """مدیریت دسترسی روزانه بر اساس ساعت ۶ صبح"""
+
+    def __init__(self, reset_hour: int = 6, store=None):
+        """
+        Args:
+            reset_hour: ساعت بازنشانی روزانه (پیش‌فرض: 6 صبح)
+            store: محل ذخیره رکوردها (پیش‌فرض: پشتوانه STORAGE_BACKEND در اولین استفاده)
+        """
+        self.reset_hour = reset_hour
+        self._store = store
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        # ساخت با تأخیر تا تنظیمات .env پیش از اولین استفاده خوانده شده باشد
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = create_access_store()
+        return self._store
+
     def _get_next_reset_time(self) -> float:
         """محاسبه زمان بازنشانی بعدی (ساعت ۶ صبح)"""
         now = datetime.now()
@@ -68,17 +130,17 @@ class DailyResetManager:
         Returns:
             tuple: (می‌تواند دسترسی داشته باشد, زمان بازنشانی بعدی)
         """
-        data = self._load_data()
-        user_key = self._get_user_key(user_id, topic_id)
+        return self._check_access(self.store.get(user_id, topic_id))
 
+    def _check_access(self, user_data: Optional[dict]) -> Tuple[bool, Optional[float]]:
+        """محاسبه دسترسی از روی رکورد ذخیره‌شده"""
         now = datetime.now()
         current_time = now.timestamp()
 
         # اگر کاربر اولین بار است
-        if user_key not in data:
+        if user_data is None:
             return True, self._get_next_reset_time()
 
-        user_data = data[user_key]
         last_access_time = user_data.get("last_access", 0)
 
         # اگر هیچ دسترسی قبلی نداشته
@@ -108,24 +170,17 @@ class DailyResetManager:
 
     def record_access(self, user_id: str, topic_id: int, day_number: int):
         """ثبت دسترسی کاربر به یک روز"""
-        data = self._load_data()
-        user_key = self._get_user_key(user_id, topic_id)
-
         current_time = time.time()
+        next_reset = self._get_next_reset_time()
 
-        if user_key not in data:
-            data[user_key] = {}
-
-        data[user_key].update({
+        self.store.put(user_id, topic_id, {
             "last_access": current_time,
             "last_day": day_number,
             "last_access_human": datetime.fromtimestamp(current_time).strftime("%Y-%m-%d %H:%M:%S"),
-            "next_reset_at": self._get_next_reset_time(),
-            "next_reset_human": datetime.fromtimestamp(self._get_next_reset_time()).strftime("%Y-%m-%d %H:%M:%S")
+            "next_reset_at": next_reset,
+            "next_reset_human": datetime.fromtimestamp(next_reset).strftime("%Y-%m-%d %H:%M:%S")
         })
 
-        self._save_data(data)
-
     def get_remaining_time(self, user_id: str, topic_id: int) -> Tuple[float, str]:
         """
         دریافت زمان باقیمانده تا روز جدید
@@ -133,8 +188,9 @@ class DailyResetManager:
         Returns:
             tuple: (ثانیه‌های باقیمانده, فرمت خوانا)
         """
-        can_access, next_reset = self.can_access_today(user_id, topic_id)
+        return self._remaining_time(*self.can_access_today(user_id, topic_id))
 
+    def _remaining_time(self, can_access: bool, next_reset: float) -> Tuple[float, str]:
         if can_access:
             return 0, "همین حالا"
 
@@ -165,10 +221,9 @@ class DailyResetManager:
 
     def get_access_info(self, user_id: str, topic_id: int) -> dict:
         """دریافت اطلاعات کامل دسترسی کاربر"""
-        data = self._load_data()
-        user_key = self._get_user_key(user_id, topic_id)
+        user_data = self.store.get(user_id, topic_id)
 
-        if user_key not in data:
+        if user_data is None:
             return {
                 "has_access": True,
                 "message": "اولین دسترسی",
@@ -176,9 +231,9 @@ class DailyResetManager:
                 "next_reset_human": datetime.fromtimestamp(self._get_next_reset_time()).strftime("%H:%M")
             }
 
-        user_data = data[user_key]
-        can_access, next_reset = self.can_access_today(user_id, topic_id)
-        remaining_seconds, remaining_text = self.get_remaining_time(user_id, topic_id)
+        # یک بار خواندن رکورد برای همه محاسبات
+        can_access, next_reset = self._check_access(user_data)
+        remaining_seconds, remaining_text = self._remaining_time(can_access, next_reset)
 
         return {
             "has_access": can_access,
@@ -193,14 +248,16 @@ class DailyResetManager:
 
     def reset_user_access(self, user_id: str, topic_id: int):
         """بازنشانی دسترسی کاربر (برای تست یا شروع مجدد)"""
-        data = self._load_data()
-        user_key = self._get_user_key(user_id, topic_id)
+        self.store.delete(user_id, topic_id)
+        return True
 
-        if user_key in data:
-            del data[user_key]
-            self._save_data(data)
+    def get_users_eligible_between(self, start: float, end: float) -> List[Tuple[str, int]]:
+        """
+        (user_id, topic_id) کاربرانی که زمان بازنشانی آن‌ها در بازه [start, end) است
 
-        return True
+        مثلاً کاربرانی که ساعت ۶ صبح امروز دوباره دسترسی پیدا می‌کنند.
+        """
+        return self.store.eligible_between(start, end)
 
 
 # نمونه جهانی برای استفاده در کل برنامه
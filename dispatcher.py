@@ -0,0 +1,140 @@
+"""
+dispatcher.py - توزیع آپدیت‌ها بین thread ها با ترتیب ثابت برای هر کاربر
+
+آپدیت‌های کاربران مختلف موازی اجرا می‌شوند، اما آپدیت‌های یک کاربر
+همیشه یکی‌یکی و به ترتیب رسیدن پردازش می‌شوند؛ بنابراین خواندن-تغییر-نوشتن
+فایل‌های پیشرفت و دسترسی هر کاربر هیچ‌وقت همزمان رخ نمی‌دهد.
+"""
+
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def get_update_key(update):
+    """
+    کلید ترتیب پردازش یک آپدیت
+
+    آپدیت‌های یک کاربر (و در نتیجه فایل‌های پیشرفت او) باید پشت سر هم
+    پردازش شوند؛ آپدیت‌های کاربران مختلف می‌توانند همزمان اجرا شوند.
+    """
+    for kind in ("message", "edited_message", "callback_query", "pre_checkout_query"):
+        event = update.get(kind)
+        if not event:
+            continue
+
+        sender = event.get("from") or {}
+        if "id" in sender:
+            return str(sender["id"])
+
+        chat = event.get("chat") or (event.get("message") or {}).get("chat") or {}
+        if "id" in chat:
+            return str(chat["id"])
+
+    # آپدیت بدون فرستنده: ترتیب خاصی لازم ندارد
+    return f"update_{update.get('update_id', id(update))}"
+
+
+class KeyedDispatcher:
+    """Thread pool با صف جداگانه و اجرای سریالی برای هر کلید"""
+
+    def __init__(self, workers: int = 8, max_queue: int = 1000, max_per_key: int = 64):
+        """
+        Args:
+            workers: تعداد thread های پردازش
+            max_queue: حداکثر کارهای در صف و در حال اجرا (در کل)
+            max_per_key: حداکثر کارهای در صف یک کلید
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_per_key = max_per_key
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dispatch")
+        self._cond = threading.Condition()
+        self._queues = {}      # key -> deque of (fn, args, future)
+        self._size = 0
+
+        self.stats = {"submitted": 0, "processed": 0, "failed": 0, "max_queued": 0, "blocked": 0}
+
+    def submit(self, key, fn, *args) -> Future:
+        """
+        افزودن یک کار برای کلید مشخص
+
+        اگر صف کلی یا صف همین کلید پر باشد، تا آزاد شدن جا صبر می‌کند
+        (فشار معکوس روی دریافت آپدیت‌ها).
+        """
+        future = Future()
+
+        with self._cond:
+            queue = self._queues.get(key)
+            if self._size >= self.max_queue or (queue and len(queue) >= self.max_per_key):
+                self.stats["blocked"] += 1
+                while True:
+                    queue = self._queues.get(key)
+                    if self._size < self.max_queue and not (queue and len(queue) >= self.max_per_key):
+                        break
+                    self._cond.wait()
+
+            start = queue is None
+            if start:
+                queue = self._queues[key] = deque()
+            queue.append((fn, args, future))
+
+            self._size += 1
+            self.stats["submitted"] += 1
+            self.stats["max_queued"] = max(self.stats["max_queued"], self._size)
+
+        if start:
+            self._executor.submit(self._drain, key)
+        return future
+
+    def _drain(self, key):
+        """اجرای کار بعدی یک کلید؛ کار بعدی دوباره در صف pool قرار می‌گیرد تا بقیه کلیدها گرسنه نمانند"""
+        with self._cond:
+            fn, args, future = self._queues[key][0]
+
+        try:
+            future.set_result(fn(*args))
+            failed = False
+        except Exception as e:
+            print(f"⚠️ خطا در پردازش ({key}): {e}")
+            traceback.print_exc()
+            future.set_exception(e)
+            failed = True
+
+        with self._cond:
+            queue = self._queues[key]
+            queue.popleft()
+            self._size -= 1
+            self.stats["failed" if failed else "processed"] += 1
+            more = bool(queue)
+            if not more:
+                del self._queues[key]
+            self._cond.notify_all()
+
+        if more:
+            self._executor.submit(self._drain, key)
+
+    def get_stats(self) -> dict:
+        """وضعیت فعلی pool: اندازه‌ها، عمق صف و کلیدهای پرکار"""
+        with self._cond:
+            busiest = sorted(self._queues.items(), key=lambda item: len(item[1]), reverse=True)[:5]
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "max_per_key": self.max_per_key,
+                "queued": self._size,
+                "active_keys": len(self._queues),
+                "busiest_keys": {key: len(queue) for key, queue in busiest},
+                **self.stats
+            }
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """صبر تا پایان همه کارهای در صف"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._size == 0, timeout)
+
+    def shutdown(self, timeout: float = 30):
+        self.wait_idle(timeout)
+        self._executor.shutdown(wait=False)
\ No newline at end of file
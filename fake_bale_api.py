@@ -0,0 +1,338 @@
+"""
+fake_bale_api.py - سرور محلی جایگزین API بله برای تست بار
+
+متدهای getMe، getUpdates، sendMessage، answerCallbackQuery و sendInvoice
+را پیاده می‌کند، جریان آپدیت مصنوعی برای تعداد دلخواه کاربر می‌سازد و
+همه درخواست‌های خروجی ربات را ثبت می‌کند.
+
+پس از setWebhook آپدیت‌ها مثل بله با POST به آدرس ربات فرستاده می‌شوند
+(همراه توکن مخفی) و getUpdates تا deleteWebhook خطای 409 می‌دهد.
+
+با arrival_rate آپدیت‌ها به جای یکجا، با نرخ ثابت از اولین getUpdates یا
+setWebhook «می‌رسند»؛ arrival_time زمان رسیدن هر آپدیت را می‌دهد تا تأخیر
+حالت‌های polling و webhook از یک نقطه اندازه‌گیری شود.
+
+اجرای مستقل:
+    python fake_bale_api.py --users 100 --port 8081
+    BALE_API_URL=http://127.0.0.1:8081 python polling_bot.py
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+# سناریوی پیش‌فرض هر کاربر
+DEFAULT_SCENARIO = ["start", "topic", "complete", "review", "progress"]
+
+# متن دکمه موضوع ۱ در کیبورد اصلی
+TOPIC_BUTTON_TEXT = "💚 سلامتی و تندرستی"
+
+
+def build_update(update_id, user_id, kind, topic_id=1, day_number=1):
+    """ساخت یک آپدیت مصنوعی شبیه به خروجی بله"""
+    sender = {"id": user_id, "is_bot": False, "first_name": f"کاربر {user_id}", "username": f"user{user_id}"}
+    chat = {"id": user_id, "type": "private"}
+
+    if kind in ("start", "topic"):
+        text = "/start" if kind == "start" else TOPIC_BUTTON_TEXT
+        return {
+            "update_id": update_id,
+            "message": {"message_id": update_id, "from": sender, "chat": chat, "date": int(time.time()), "text": text}
+        }
+
+    data = {
+        "complete": f"complete_{topic_id}_{day_number}",
+        "review": f"review_{topic_id}_{day_number}",
+        "progress": f"progress_{topic_id}"
+    }[kind]
+
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": f"cb{update_id}",
+            "from": sender,
+            "message": {"message_id": update_id, "chat": chat, "date": int(time.time())},
+            "data": data
+        }
+    }
+
+
+def get_update_user(update) -> int:
+    """شناسه فرستنده یک آپدیت مصنوعی"""
+    event = update.get("message") or update.get("callback_query")
+    return event["from"]["id"]
+
+
+class FakeBaleAPI:
+    """سرور HTTP محلی با جریان آپدیت مصنوعی و ثبت درخواست‌ها"""
+
+    def __init__(self, users: int = 100, scenario=None, host: str = "127.0.0.1", port: int = 0,
+                 api_latency: float = 0.0, first_user_id: int = 100000, webhook_connections: int = 8,
+                 arrival_rate: float = 0.0):
+        """
+        Args:
+            users: تعداد کاربران مصنوعی
+            scenario: ترتیب رویدادهای هر کاربر (start, topic, complete, review, progress)
+            api_latency: تأخیر شبیه‌سازی‌شده هر درخواست (ثانیه)؛ ارسال به webhook نصف آن (یک‌طرفه)
+            webhook_connections: تعداد اتصال‌های همزمان ارسال آپدیت به webhook
+            arrival_rate: آپدیت در ثانیه (صفر: همه آپدیت‌ها از ابتدا موجودند)
+        """
+        self.scenario = scenario or DEFAULT_SCENARIO
+        self.api_latency = api_latency
+        self.webhook_connections = webhook_connections
+        self.arrival_rate = arrival_rate
+        self.started_at = None      # زمان اولین getUpdates یا setWebhook (perf_counter)
+
+        # آپدیت‌ها دور به دور: رویداد اول همه کاربران، سپس رویداد دوم و ...
+        ids = itertools.count(1)
+        self.updates = [
+            build_update(next(ids), first_user_id + user, kind)
+            for kind in self.scenario
+            for user in range(users)
+        ]
+
+        self.calls = []             # (زمان، متد، داده)
+        self.delivered_at = {}      # update_id -> زمان اولین تحویل
+        self._cond = threading.Condition()
+        self._message_ids = itertools.count(1)
+
+        self.webhook_url = None
+        self.webhook_secret = None
+        self.webhook_failures = 0
+        self._pushers = []
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    # ---------- زمان رسیدن آپدیت‌ها ----------
+
+    def _start_clock(self):
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+    def arrival_time(self, update_id: int) -> float:
+        """زمان رسیدن یک آپدیت به بله (perf_counter)"""
+        if not self.arrival_rate:
+            return self.started_at
+        return self.started_at + (update_id - 1) / self.arrival_rate
+
+    def _arrived_count(self, now: float) -> int:
+        if not self.arrival_rate:
+            return len(self.updates)
+        return min(len(self.updates), int((now - self.started_at) * self.arrival_rate) + 1)
+
+    # ---------- متدهای API ----------
+
+    def get_updates(self, offset: int, limit: int, timeout: float):
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            self._start_clock()
+            while True:
+                # update_id ها از ۱ و پشت سر هم هستند
+                now = time.perf_counter()
+                start = max(offset, 1) - 1
+                batch = self.updates[start:min(start + limit, self._arrived_count(now))]
+                if batch or now >= deadline:
+                    break
+                wait = deadline - now
+                if start < len(self.updates):
+                    wait = min(wait, max(0.0, self.arrival_time(start + 1) - now))
+                self._cond.wait(wait)
+
+            now = time.perf_counter()
+            for update in batch:
+                self.delivered_at.setdefault(update["update_id"], now)
+        return batch
+
+    def add_update(self, user_id: int, kind: str, topic_id: int = 1, day_number: int = 1) -> int:
+        """افزودن یک آپدیت به جریان در حین اجرا (برای تست‌هایی که به خروجی ربات وابسته‌اند)"""
+        with self._cond:
+            update_id = len(self.updates) + 1
+            self.updates.append(build_update(update_id, user_id, kind, topic_id, day_number))
+            self._cond.notify_all()
+        return update_id
+
+    def sent_texts(self, chat_id: int) -> list:
+        """متن پیام‌های ارسال‌شده به یک چت به ترتیب ارسال"""
+        with self._cond:
+            return [data.get("text", "") for _, name, data in self.calls
+                    if name == "sendMessage" and str(data.get("chat_id")) == str(chat_id)]
+
+    # ---------- webhook ----------
+
+    def set_webhook(self, url: str, secret_token: str = None):
+        with self._cond:
+            self._start_clock()
+            self.webhook_url = url
+            self.webhook_secret = secret_token
+            self._cond.notify_all()
+            if not self._pushers:
+                # آپدیت‌های هر کاربر همیشه از یک اتصال و به ترتیب فرستاده می‌شوند
+                lanes = [[] for _ in range(self.webhook_connections)]
+                for update in self.updates:
+                    lanes[get_update_user(update) % self.webhook_connections].append(update)
+                self._pushers = [
+                    threading.Thread(target=self._push_loop, args=(lane,), name=f"fake-webhook-{i}", daemon=True)
+                    for i, lane in enumerate(lanes)
+                ]
+                for thread in self._pushers:
+                    thread.start()
+
+    def delete_webhook(self):
+        with self._cond:
+            self.webhook_url = None
+            self._cond.notify_all()
+
+    def _push_loop(self, updates):
+        """ارسال آپدیت‌های یک اتصال به ترتیب به webhook ربات"""
+        session = requests.Session()
+        for update in updates:
+            delay = self.arrival_time(update["update_id"]) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if self.api_latency:
+                time.sleep(self.api_latency / 2)
+
+            with self._cond:
+                while self.webhook_url is None:
+                    self._cond.wait()
+                url = self.webhook_url
+                headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret} if self.webhook_secret else {}
+
+            # بله تا پاسخ 200 دوباره تلاش می‌کند؛ زمان تحویل همان تلاش موفق است
+            # (مثلاً وقتی سرور ربات هنوز بالا نیامده)
+            while True:
+                with self._cond:
+                    self.delivered_at[update["update_id"]] = time.perf_counter()
+                try:
+                    response = session.post(url, json=update, headers=headers, timeout=10)
+                    if response.status_code == 200:
+                        break
+                except requests.exceptions.RequestException:
+                    pass
+                with self._cond:
+                    self.webhook_failures += 1
+                time.sleep(0.05)
+
+    # ---------- پاسخ متدها ----------
+
+    def handle(self, method: str, data: dict):
+        if method == "getUpdates":
+            # نیمی از تأخیر در رفت و نیمی در برگشت؛ با long-polling پاسخ هم باید در راه باشد
+            if self.api_latency:
+                time.sleep(self.api_latency / 2)
+            if self.webhook_url:
+                return {"ok": False, "error_code": 409,
+                        "description": "Conflict: can't use getUpdates method while webhook is active"}
+            batch = self.get_updates(
+                int(data.get("offset", 0)), int(data.get("limit", 100)), float(data.get("timeout", 0))
+            )
+            if self.api_latency:
+                time.sleep(self.api_latency / 2)
+            return {"ok": True, "result": batch}
+
+        if self.api_latency:
+            time.sleep(self.api_latency)
+
+        if method == "getMe":
+            return {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "fake", "username": "fake_bot"}}
+
+        with self._cond:
+            self.calls.append((time.perf_counter(), method, data))
+
+        if method == "sendMessage":
+            return {"ok": True, "result": {
+                "message_id": next(self._message_ids),
+                "chat": {"id": data.get("chat_id")},
+                "date": int(time.time()),
+                "text": data.get("text", "")
+            }}
+
+        if method == "setWebhook":
+            self.set_webhook(data.get("url"), data.get("secret_token"))
+            return {"ok": True, "result": True}
+
+        if method == "deleteWebhook":
+            self.delete_webhook()
+            return {"ok": True, "result": True}
+
+        if method in ("answerCallbackQuery", "sendInvoice"):
+            return {"ok": True, "result": True}
+
+        return {"ok": False, "error_code": 404, "description": f"Not Found: method {method} not found"}
+
+    # ---------- سرور HTTP ----------
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, data):
+                method = urlparse(self.path).path.rsplit("/", 1)[-1]
+                body = json.dumps(api.handle(method, data), ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                self._respond({key: values[-1] for key, values in query.items()})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    data = json.loads(raw) if raw else {}
+                except ValueError:
+                    data = {}
+                self._respond(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-bale-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # ---------- گزارش ----------
+
+    def count_calls(self, method: str = None) -> int:
+        with self._cond:
+            if method is None:
+                return len(self.calls)
+            return sum(1 for _, name, _ in self.calls if name == method)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="سرور محلی جایگزین API بله")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="تأخیر هر درخواست (ثانیه)")
+    parser.add_argument("--scenario", default=",".join(DEFAULT_SCENARIO))
+    args = parser.parse_args()
+
+    api = FakeBaleAPI(args.users, args.scenario.split(","), port=args.port, api_latency=args.latency)
+    print(f"🧪 API جعلی بله روی {api.url} ({len(api.updates)} آپدیت مصنوعی)")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {api.count_calls()} درخواست خروجی ثبت شد")
\ No newline at end of file
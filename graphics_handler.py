@@ -1,3 +1,5 @@
+import templates
+from render_cache import render_cache
 from static.content.loader import get_all_topics, load_day_content
 
 
@@ -24,49 +26,53 @@ class GraphicsHandler:
         if not content:
             return "❌ محتوای مورد نظر یافت نشد."
 
-        emoji = content["topic_emoji"]
-        topic_emoji = emoji * 3
-
         # تعیین وضعیت تکمیل
         is_completed = False
         if user_progress and "completed_days" in user_progress:
             is_completed = day_number in user_progress["completed_days"]
 
-        # ساخت پیام با فرمت زیبا
-        message = f"""
-{topic_emoji}
-**{content['topic_name']}**
-📅 روز {day_number} از ۲۸ • {content['week_title']}
-
-📖 {content.get('author_quote', content['week_quote'])}
+        # پیام از کش (برای همه کاربران یکسان است)
+        return render_cache.get(
+            topic_id, day_number, "graphics", is_completed,
+            lambda: GraphicsHandler.render_beautiful_message(content, day_number, is_completed),
+            content.get("content_version", 0)
+        )
 
-_{content['intro']}_
+    @staticmethod
+    def render_beautiful_message(content, day_number, is_completed):
+        """ساخت پیام گرافیکی یک روز (کش‌شده در render_cache با نوع graphics)"""
+        emoji = content["topic_emoji"]
 
-──────────────
-{emoji} **۱۰ شکرگزاری امروز:**
-"""
+        # ساخت پیام با فرمت زیبا (HTML، مثل parse_mode ربات)
+        parts = [templates.graphics_day_page(
+            topic_emojis=emoji * 3,
+            topic_name=content['topic_name'],
+            day_number=day_number,
+            week_title=content['week_title'],
+            author_quote=content.get('author_quote', content['week_quote']),
+            intro=content['intro'],
+            topic_emoji=emoji
+        )]
 
         # اضافه کردن موارد شکرگزاری با ایموجی موضوع
-        for i, item in enumerate(content["items"], 1):
-            message += f"\n{i}. {item}"
-
-        message += "\n──────────────\n"
+        parts.extend(f"\n{i}. {item}" for i, item in enumerate(content["items"], 1))
+        parts.append("\n──────────────\n")
 
         if content.get('exercise'):
-            message += f"💡 **تمرین امروز:** {content['exercise']}\n\n"
+            parts.append(f"💡 <b>تمرین امروز:</b> {content['exercise']}\n\n")
 
         if content.get('affirmation'):
-            message += f"🌟 **تأکید مثبت:** _{content['affirmation']}_\n\n"
+            parts.append(f"🌟 <b>تأکید مثبت:</b> <i>{content['affirmation']}</i>\n\n")
 
         if content.get('reflection'):
-            message += f"💭 **بازتاب:** {content['reflection']}\n\n"
+            parts.append(f"💭 <b>بازتاب:</b> {content['reflection']}\n\n")
 
         if is_completed:
-            message += "✅ **این روز قبلاً با موفقیت تکمیل شده است.**"
+            parts.append("✅ <b>این روز قبلاً با موفقیت تکمیل شده است.</b>")
         else:
-            message += f"🌟 پس از خواندن، دکمه 'امروز شکرگزار بودم' را فشار دهید."
+            parts.append(f"🌟 پس از خواندن، دکمه 'امروز شکرگزار بودم' را فشار دهید.")
 
-        return message
+        return "".join(parts)
 
     @staticmethod
     def create_categories_keyboard():
@@ -165,105 +171,14 @@ _{content['intro']}_
     @staticmethod
     def create_welcome_message(first_name=""):
         """ساخت پیام خوش‌آمد با معرفی توسعه‌دهنده"""
-        developer_info = """
-👨‍💻 **ساخته شده توسط فرزاد قجری**
-
-💖 **درباره توسعه‌دهنده:**
-من فرزاد قجری هستم، برنامه‌نویس و توسعه‌دهنده این ربات.
-باور دارم که شکرگزاری می‌تواند زندگی هر انسانی را متحول کند.
-این ربات هدیه‌ای از طرف من به همه کسانی است که می‌خواهند زندگی بهتری داشته باشند.
-
-🌟 **یادت باشه:**
-«هر روزی که شکرگزار باشی، روزی است که زندگی کرده‌ای»
-        """
-
-        emojis = "✨💫🙏💚💰😊🕊️🎯🏠🌿💖"
-
-        return f"""
-{emojis}
-**✨ سلام! به ربات معجزه شکرگزاری خوش آمدید** ✨
-
-📖 بر اساس کتاب «معجزه شکرگزاری» اثر *راندا برن*
-
-🎯 **۸ حوزه اصلی زندگی برای شکرگزاری:**
-
-هر موضوع ۲۸ روز تمرین اختصاصی دارد
-هر روز ۱۰ شکرگزاری زیبا و مخصوص
-هر هفته سطح جدیدی از شکرگزاری را تجربه می‌کنید
-
-{developer_info}
-
-💫 **بیایید با شکرگزاری، زندگی را متحول کنیم!**
-"""
+        return templates.WELCOME
 
     @staticmethod
     def create_help_message():
         """ساخت پیام راهنمای زیبا"""
-        return """
-❓ **راهنمای استفاده از ربات**
-
-📌 **دستورات اصلی:**
-/start - شروع سفر شکرگزاری  
-/help - این راهنما
-/progress - پیشرفت کلی
-
-📌 **۸ حوزه اصلی شکرگزاری:**
-💚 سلامتی و تندرستی
-👨‍👩‍👧‍👦 خانواده و روابط  
-💰 ثروت و فراوانی
-😊 شادی و آرامش
-🎯 اهداف و موفقیت
-🏠 زندگی مطلوب
-🌿 طبیعت و کائنات
-💖 عشق و معنویت
-
-📌 **نحوه کار:**
-۱. یک موضوع از ۸ موضوع انتخاب کنید
-۲. هر روز ۱۰ مورد شکرگزاری مخصوص دریافت می‌کنید
-۳. هر مورد را با دقت بخوانید و برای آن شکرگزاری کنید
-۴. پس از اتمام، دکمه "امروز شکرگزار بودم" را فشار دهید
-
-📌 **توصیه‌ها:**
-- بهترین زمان: اول صبح
-- مکان آرام
-- تمرکز کامل
-- هر روز ۱۰-۱۵ دقیقه وقت بگذارید
-- با احساس واقعی شکرگزاری کنید
-
-👨‍💻 **پشتیبانی:**
-اگر سوالی دارید یا نیاز به کمک دارید:
-از دکمه "ارتباط با من" استفاده کنید
-
-💫 **تعهد ۲۸ روزه = تحول زندگی**
-"""
+        return templates.GUIDE
 
     @staticmethod
     def create_contact_message():
         """ساخت پیام ارتباط با توسعه‌دهنده"""
-        return """
-👨‍💻 **ارتباط با توسعه‌دهنده**
-
-<b>📛 نام کامل:</b>
-<code>فرزاد قجری</code>
-
-<b>📱 تماس مستقیم:</b>
-<code>09302446141</code>
-
-<b>📧 ایمیل:</b>
-<code>farzadq.ir@gmail.com</code>
-
-<b>🎯 خدمات تخصصی:</b>
-✅ ساخت انواع ربات تلگرام و وب‌سایت
-✅ طراحی اپلیکیشن موبایل و دسکتاپ
-✅ برنامه‌نویسی پایتون، Django، Flask
-✅ توسعه API و پایگاه داده
-✅ پشتیبانی و آموزش
-
-<b>💡 درباره من:</b>
-من یک برنامه‌نویس پرشور و علاقه‌مند به ساخت ابزارهای مفید هستم.
-باور دارم تکنولوژی باید زندگی مردم را بهتر کند.
-این ربات یکی از پروژه‌های مورد علاقه‌ام است که با عشق ساخته شده.
-
-<b>🌟 پیام من به شما:</b>
-«شکرگزاری را شروع کنید و معجزه آن را در زندگی خود ببینید»
-"""
\ No newline at end of file
+        return templates.PROFILE
\ No newline at end of file
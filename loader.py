@@ -4,9 +4,15 @@
 """
 
 import importlib
+import itertools
 import json
 import os
-from typing import Dict, Any, List
+import threading
+from typing import Any, Mapping
+
+from content_index import build_content_index
+from progress_layout import ProgressLayout
+from progress_record import UserProgress, TopicProgress
 
 # ساختار ۸ موضوع اصلی
 TOPICS = {
@@ -102,104 +108,83 @@ WEEK_THEMES = {
 
 # ==================== مدیریت پیشرفت ====================
 class UserProgressManager:
-    """مدیریت پیشرفت کاربران"""
+    """مدیریت پیشرفت کاربران (یک فایل JSON فشرده برای هر کاربر)"""
 
-    def __init__(self):
-        self.progress_dir = "data/user_progress"
+    def __init__(self, progress_dir: str = None):
+        self.progress_dir = progress_dir or os.path.join(os.getenv('BOT_DATA_DIR', 'data'), "user_progress")
         os.makedirs(self.progress_dir, exist_ok=True)
+        # چیدمان زیرپوشه‌ای (PROGRESS_FANOUT / PROGRESS_DEPTH یا فایل .layout)
+        self.layout = ProgressLayout(self.progress_dir)
 
     def get_user_file(self, user_id):
-        """آدرس فایل پیشرفت کاربر"""
-        return os.path.join(self.progress_dir, f"{user_id}.json")
-
-    def get_topic_progress(self, user_id, topic_id):
-        """دریافت پیشرفت یک موضوع برای کاربر"""
-        file_path = self.get_user_file(user_id)
-
-        if os.path.exists(file_path):
+        """آدرس فایل پیشرفت کاربر (مسیر نوشتن در چیدمان فعلی)"""
+        return self.layout.write_path(user_id)
+
+    def load_user(self, user_id) -> UserProgress:
+        """پیشرفت کاربر در همه موضوعات (قالب فشرده یا قدیمی)"""
+        # تلاش دوم: فایل ممکن است همین حالا توسط ابزار تغییر چیدمان جابه‌جا شده باشد
+        for _ in range(2):
+            file_path = self.layout.read_path(user_id)
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    topic_key = str(topic_id)
-                    if topic_key in data:
-                        return data[topic_key]
+                    return UserProgress.from_json(json.load(f))
+            except FileNotFoundError:
+                continue
             except:
-                pass
+                break
+        return UserProgress()
 
+    def save_user(self, user_id, progress: UserProgress):
+        """ذخیره پیشرفت کاربر (فایل موقت و جایگزینی اتمیک)"""
+        file_path = self.get_user_file(user_id)
+        tmp_path = f"{file_path}.tmp"
+        try:
+            f = open(tmp_path, 'w', encoding='utf-8')
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            f = open(tmp_path, 'w', encoding='utf-8')
+        with f:
+            json.dump(progress.to_json(), f, separators=(",", ":"))
+        os.replace(tmp_path, file_path)
+
+    def get_user_progress(self, user_id) -> UserProgress:
+        return self.load_user(user_id)
+
+    def get_topic_progress(self, user_id, topic_id):
+        """دریافت پیشرفت یک موضوع برای کاربر"""
         # پیش‌فرض: هر موضوع از روز ۱ شروع می‌شود
-        return {
-            "current_day": 1,
-            "started": False,
-            "completed_days": []
-        }
+        return self.load_user(user_id).topic(topic_id).to_dict()
 
     def set_topic_day(self, user_id, topic_id, day_number):
         """تنظیم روز فعلی برای یک موضوع"""
-        file_path = self.get_user_file(user_id)
-
-        # بارگذاری داده‌های موجود
-        data = {}
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            except:
-                data = {}
-
-        # به روز رسانی
-        topic_key = str(topic_id)
-        if topic_key not in data:
-            data[topic_key] = {}
-
-        day_number = max(1, min(28, day_number))  # محدود به ۱-۲۸
-
-        data[topic_key]["current_day"] = day_number
-        data[topic_key]["started"] = True
-        data[topic_key].setdefault("completed_days", [])
-
-        # ذخیره
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-
+        progress = self.load_user(user_id)
+        day_number = progress.ensure(topic_id).set_day(day_number)  # محدود به ۱-۲۸
+        self.save_user(user_id, progress)
         return day_number
 
     def complete_day(self, user_id, topic_id, day_number):
         """علامت‌گذاری روز به عنوان تکمیل شده"""
-        progress = self.get_topic_progress(user_id, topic_id)
-
-        if day_number not in progress.get("completed_days", []):
-            file_path = self.get_user_file(user_id)
-
-            # بارگذاری داده‌های موجود
-            data = {}
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                except:
-                    data = {}
+        progress = self.load_user(user_id)
+        if not progress.ensure(topic_id).complete(day_number):
+            return False
+        self.save_user(user_id, progress)
+        return True
 
-            # به روز رسانی
-            topic_key = str(topic_id)
-            if topic_key not in data:
-                data[topic_key] = progress
 
-            completed_days = data[topic_key].get("completed_days", [])
-            if day_number not in completed_days:
-                completed_days.append(day_number)
-                data[topic_key]["completed_days"] = completed_days
-
-            # روز بعدی
-            next_day = min(day_number + 1, 28)
-            data[topic_key]["current_day"] = next_day
+def get_progress_manager():
+    """
+    مدیر پیشرفت پشتوانه انتخاب‌شده با STORAGE_BACKEND (storage.py)
 
-            # ذخیره
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+    پشتوانه json (پیش‌فرض) فایل‌ها را پشت کش حافظه (progress_cache) نگه می‌دارد.
+    """
+    from storage import get_storage
+    return get_storage().progress
 
-            return True
 
-        return False
+def flush_progress():
+    """نوشتن تغییرات کش‌شده پیشرفت روی دیسک (هنگام توقف ربات)"""
+    from storage import flush_storages
+    flush_storages()
 
 
 # ==================== توابع اصلی ====================
@@ -215,83 +200,70 @@ def get_week_info(day_number: int):
     return week_number, day_in_week
 
 
-def load_day_content(topic_id: int, day_number: int, user_id: str = None) -> Dict[str, Any]:
-    """
-    لود محتوای یک روز خاص
-    اگر user_id داده شود، از پیشرفت کاربر استفاده می‌کند
-    """
-
-    # اعتبارسنجی
-    if topic_id not in TOPICS:
-        topic_id = 1
-
-    if day_number < 1 or day_number > 28:
-        day_number = 1
+_content_index = None
+_content_index_lock = threading.Lock()
+_content_versions = itertools.count(1)
 
-    # اگر user_id داریم، از پیشرفت کاربر استفاده می‌کنیم
-    if user_id:
-        progress_manager = UserProgressManager()
-        # ابتدا روز کاربر را تنظیم می‌کنیم
-        day_number = progress_manager.set_topic_day(user_id, topic_id, day_number)
 
-    topic = TOPICS[topic_id]
-    week_number, day_in_week = get_week_info(day_number)
-    week_theme = WEEK_THEMES.get(week_number, WEEK_THEMES[1])
+def _open_content_bundle(version=0):
+    """فایل محتوای ساخته‌شده با content_bundle.py (در صورت وجود)"""
+    from content_bundle import ContentBundle, get_bundle_path
 
-    print(f"\n📖 بارگذاری محتوا:")
-    print(f"  کاربر: {user_id or 'میهمان'}")
-    print(f"  موضوع: {topic['name']} (ID: {topic_id})")
-    print(f"  روز: {day_number} (هفته {week_number}, روز {day_in_week} از هفته)")
+    path = get_bundle_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        return ContentBundle(path, version)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ خطا در باز کردن فایل محتوا {path}: {e}")
+        return None
 
-    # مسیر ماژول
-    module_path = f"content.{topic['folder']}.week_{week_number}"
 
-    try:
-        # بارگذاری ماژول
-        module = importlib.import_module(module_path)
-
-        # پیدا کردن روز
-        day_key = f"day_{day_in_week}"
-
-        if hasattr(module, day_key):
-            day_content = getattr(module, day_key)
-            print(f"✅ {day_key} از هفته {week_number} بارگذاری شد")
-        else:
-            # اگر روز مورد نظر پیدا نشد
-            print(f"⚠️  {day_key} یافت نشد، day_1 بارگذاری می‌شود")
-            day_key = "day_1"
-            day_content = getattr(module, "day_1")
-
-        # ساخت پاسخ
-        result = {
-            "success": True,
-            "topic_id": topic_id,
-            "topic_name": topic["name"],
-            "topic_emoji": topic["emoji"],
-            "topic_color": topic["color"],
-            "day_number": day_number,
-            "week_number": week_number,
-            "day_in_week": day_in_week,
-            "week_title": week_theme["title"],
-            "week_description": week_theme["description"],
-            "week_quote": week_theme["quote"],
-            "author_quote": topic.get("author_quote", ""),
-            "title": day_content.get("title", f"روز {day_number}: تمرین {topic['name']}"),
-            "intro": day_content.get("intro", ""),
-            "items": day_content.get("items", []),
-            "exercise": day_content.get("exercise", ""),
-            "affirmation": day_content.get("affirmation", ""),
-            "reflection": day_content.get("reflection", "")
-        }
+def load_content_index(import_module=importlib.import_module):
+    """
+    ساخت یک نسخه جدید از محتوا با شماره نسخه تازه (بدون جایگزینی)
 
-        return result
+    اگر فایل محتوا (CONTENT_BUNDLE) ساخته شده باشد mmap می‌شود؛ در غیر
+    این صورت ماژول‌های هفته import می‌شوند.
+    """
+    version = next(_content_versions)
+    index = _open_content_bundle(version)
+    if index is not None:
+        print(f"📚 فایل محتوا باز شد: {index.path} (نسخه {version})")
+    else:
+        index = build_content_index(TOPICS, WEEK_THEMES, get_fallback_content,
+                                    import_module=import_module, version=version)
+        print(f"📚 محتوای {len(index)} روز بارگذاری شد (نسخه {version})")
+    if index.missing:
+        print(f"⚠️ {len(index.missing)} روز با محتوای پیش‌فرض: {index.missing[:5]}")
+    return index
+
+
+def get_content_index():
+    """ایندکس محتوای همه روزها (یک بار در شروع ربات ساخته می‌شود)"""
+    global _content_index
+    if _content_index is None:
+        with _content_index_lock:
+            if _content_index is None:
+                _content_index = load_content_index()
+    return _content_index
+
+
+def swap_content_index(index):
+    """جایگزینی اتمیک نسخه محتوا؛ درخواست‌های در جریان نسخه قبلی را کامل می‌کنند"""
+    global _content_index
+    with _content_index_lock:
+        _content_index = index
+
+
+def load_day_content(topic_id: int, day_number: int, user_id: str = None) -> Mapping[str, Any]:
+    """
+    محتوای یک روز خاص (نمای فقط‌خواندنی مشترک از ایندکس محتوا)
 
-    except ModuleNotFoundError:
-        print(f"❌ ماژول {module_path} یافت نشد")
-        return get_fallback_content(topic_id, day_number)
-    except Exception as e:
-        print(f"❌ خطا: {str(e)}")
-        return get_fallback_content(topic_id, day_number)
+    user_id فقط برای سازگاری با فراخوانی‌های قبلی است و پیشرفت کاربر را
+    تغییر نمی‌دهد؛ برای تغییر روز فعلی از set_user_topic_day استفاده کنید.
+    """
+    return get_content_index().get(topic_id, day_number)
 
 
 def get_fallback_content(topic_id: int, day_number: int):
@@ -331,9 +303,15 @@ def get_fallback_content(topic_id: int, day_number: int):
     }
 
 
+def set_user_topic_day(user_id: str, topic_id: int, day_number: int) -> int:
+    """تنظیم روز فعلی کاربر در یک موضوع (تنها راه تغییر روز فعلی)"""
+    progress_manager = get_progress_manager()
+    return progress_manager.set_topic_day(user_id, topic_id, day_number)
+
+
 def complete_day_for_user(user_id: str, topic_id: int, day_number: int) -> bool:
     """تکمیل روز برای کاربر"""
-    progress_manager = UserProgressManager()
+    progress_manager = get_progress_manager()
     return progress_manager.complete_day(user_id, topic_id, day_number)
 
 
@@ -369,14 +347,23 @@ def get_topic_by_id(topic_id):
 
 def get_user_topic_progress(user_id: str, topic_id: int):
     """دریافت پیشرفت کاربر در یک موضوع"""
-    progress_manager = UserProgressManager()
+    progress_manager = get_progress_manager()
     return progress_manager.get_topic_progress(user_id, topic_id)
 
 
+def get_user_progress(user_id: str) -> UserProgress:
+    """پیشرفت کاربر در همه موضوعات (رکورد فشرده، با یک بار خواندن)"""
+    return get_progress_manager().get_user_progress(user_id)
+
+
+def get_user_topic_record(user_id: str, topic_id: int) -> TopicProgress:
+    """پیشرفت کاربر در یک موضوع به صورت TopicProgress"""
+    return get_user_progress(user_id).topic(topic_id)
+
+
 def start_topic_for_user(user_id: str, topic_id: int):
     """شروع یک موضوع برای کاربر از روز اول"""
-    progress_manager = UserProgressManager()
-    progress_manager.set_topic_day(user_id, topic_id, 1)
+    set_user_topic_day(user_id, topic_id, 1)
     return load_day_content(topic_id, 1, user_id)
 
 
@@ -396,8 +383,8 @@ if __name__ == "__main__":
     print(f"   نام: {topic_info['name']}")
     print(f"   نقل قول: {topic_info['author_quote']}")
 
-    print("\n3. بارگذاری محتوای روز ۱ موضوع ۱:")
-    content = load_day_content(1, 1, "test_user")
+    print("\n3. شروع موضوع ۱ و بارگذاری محتوای روز ۱:")
+    content = start_topic_for_user("test_user", 1)
     print(f"   عنوان: {content['title']}")
     print(f"   آیتم‌ها: {len(content['items'])} مورد")
 
@@ -0,0 +1,197 @@
+"""
+log_store.py - ذخیره کلید-مقدار با لاگ افزایشی و فشرده‌سازی پس‌زمینه
+
+هر تغییر یک خط JSON کوچک به انتهای فایل لاگ اضافه می‌کند، بنابراین هزینه
+نوشتن به اندازه کل داده بستگی ندارد. فایل snapshot همان فایل JSON قبلی
+است (مثلاً user_next_day_times.json)؛ در شروع، snapshot و سپس لاگ در یک
+دیکشنری در حافظه بازخوانی می‌شوند. وقتی حجم لاگ از آستانه بگذرد، snapshot
+جدید در پس‌زمینه نوشته و لاگ کنار گذاشته می‌شود.
+
+فایل‌ها:
+    <snapshot>               داده کامل (قالب JSON قبلی)
+    <snapshot>.log           تغییرات پس از snapshot
+    <snapshot>.log.compact   لاگ در حال فشرده‌سازی (فقط اگر فشرده‌سازی نیمه‌کاره مانده باشد)
+"""
+
+import json
+import os
+import threading
+
+_DELETE = "d"
+
+
+def _read_snapshot(path, data):
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data.update(json.load(f))
+    except Exception as e:
+        print(f"⚠️ خطا در خواندن {path}: {e}")
+
+
+def _replay_log(path, data) -> int:
+    """اعمال خطوط لاگ روی داده؛ خط ناقص انتهایی (قطع برق) نادیده گرفته می‌شود"""
+    if not os.path.exists(path):
+        return 0
+
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get(_DELETE):
+                data.pop(entry["k"], None)
+            else:
+                data[entry["k"]] = entry["v"]
+            count += 1
+    return count
+
+
+def read_log_store(snapshot_path: str) -> dict:
+    """خواندن کامل داده (snapshot + لاگ‌ها) بدون باز کردن برای نوشتن"""
+    data = {}
+    _read_snapshot(snapshot_path, data)
+    _replay_log(f"{snapshot_path}.log.compact", data)
+    _replay_log(f"{snapshot_path}.log", data)
+    return data
+
+
+class LogStore:
+    """دیکشنری ماندگار با نوشتن افزایشی و فشرده‌سازی پس‌زمینه"""
+
+    def __init__(self, snapshot_path: str, compact_bytes: int = None, fsync: bool = False):
+        """
+        Args:
+            snapshot_path: مسیر فایل JSON کامل
+            compact_bytes: حجم لاگ برای شروع فشرده‌سازی (پیش‌فرض: LOG_COMPACT_BYTES یا ۱ مگابایت)
+            fsync: fsync پس از هر نوشتن (کندتر، مقاوم در برابر قطع برق)
+        """
+        self.snapshot_path = snapshot_path
+        self.log_path = f"{snapshot_path}.log"
+        self.compact_path = f"{snapshot_path}.log.compact"
+        self.compact_bytes = compact_bytes or int(os.getenv('LOG_COMPACT_BYTES', 1024 * 1024))
+        self.fsync = fsync
+
+        os.makedirs(os.path.dirname(snapshot_path) or ".", exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._data = {}
+        _read_snapshot(snapshot_path, self._data)
+        replayed = _replay_log(self.compact_path, self._data) + _replay_log(self.log_path, self._data)
+
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._log_size = self._log.tell()
+        self._compacting = None
+        self._terminate_partial_line()
+
+        self.stats = {"loaded": len(self._data), "replayed": replayed, "appends": 0, "compactions": 0}
+
+        # فشرده‌سازی نیمه‌کاره قبلی
+        if os.path.exists(self.compact_path) or self._log_size >= self.compact_bytes:
+            self.compact(background=False)
+
+    def _terminate_partial_line(self):
+        """خط ناقص انتهای لاگ نباید به رکورد بعدی بچسبد"""
+        if not self._log_size:
+            return
+        with open(self.log_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                self._log.write("\n")
+                self._log.flush()
+                self._log_size += 1
+
+    # ---------- خواندن ----------
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    # ---------- نوشتن ----------
+
+    def _append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        self._log.write(line)
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._log_size += len(line.encode('utf-8'))
+        self.stats["appends"] += 1
+
+        if self._log_size >= self.compact_bytes and self._compacting is None:
+            self.compact()
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._append({"k": key, "v": value})
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            del self._data[key]
+            self._append({"k": key, _DELETE: 1})
+            return True
+
+    # ---------- فشرده‌سازی ----------
+
+    def compact(self, background: bool = True):
+        """
+        نوشتن snapshot جدید و حذف لاگ
+
+        لاگ فعلی به .log.compact منتقل و لاگ خالی جدیدی باز می‌شود تا نوشتن‌ها
+        در حین فشرده‌سازی متوقف نشوند.
+        """
+        with self._lock:
+            if self._compacting is not None:
+                return
+            if not os.path.exists(self.compact_path):
+                self._log.close()
+                os.replace(self.log_path, self.compact_path)
+                self._log = open(self.log_path, 'a', encoding='utf-8')
+                self._log_size = 0
+            snapshot = dict(self._data)
+            self._compacting = threading.Thread(target=self._write_snapshot, args=(snapshot,),
+                                                name="log-compaction", daemon=True)
+
+        if background:
+            self._compacting.start()
+        else:
+            self._compacting.run()
+
+    def _write_snapshot(self, snapshot):
+        try:
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            os.remove(self.compact_path)
+            self.stats["compactions"] += 1
+        except Exception as e:
+            print(f"⚠️ خطا در فشرده‌سازی {self.snapshot_path}: {e}")
+        finally:
+            with self._lock:
+                self._compacting = None
+
+    def close(self):
+        """صبر برای فشرده‌سازی در جریان و بستن لاگ"""
+        compacting = self._compacting
+        if compacting is not None and compacting.is_alive():
+            compacting.join()
+        with self._lock:
+            self._log.close()
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+mmap_progress.py - جدول پیشرفت با اسلات ثابت روی فایل mmap
+
+پیشرفت هر کاربر در یک اسلات ۴۰ بایتی (قالب UserProgress.pack: برای هر
+یک از ۸ موضوع، مَسک ۲۸ بیتی + بیت شروع و یک بایت روز فعلی) ذخیره
+می‌شود. خواندن و تغییر یک موضوع مستقیماً روی حافظه نگاشت‌شده انجام
+می‌شود؛ بدون تجزیه JSON و بدون بازنویسی فایل.
+
+فایل‌ها (در data/progress_table/):
+    progress.tbl   سرآیند ۱۶ بایتی + اسلات‌ها؛ با پر شدن دو برابر و دوباره نگاشت می‌شود
+    progress.idx   شناسه کاربران، هر خط یک کاربر؛ شماره خط = شماره اسلات
+
+    STORAGE_BACKEND=mmap
+    python mmap_progress.py migrate [progress_dir] [table_dir]
+"""
+
+import atexit
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from progress_layout import iter_progress_files
+from progress_record import (
+    DAYS_MASK, MAX_DAY, STARTED_BIT, TOPIC_IDS, TOPIC_STRUCT, USER_STRUCT,
+    TopicProgress, UserProgress
+)
+
+MAGIC = b"BPRG"
+VERSION = 1
+HEADER = struct.Struct('<4sHH8x')
+SLOT_SIZE = USER_STRUCT.size
+TOPIC_OFFSETS = {topic_id: index * TOPIC_STRUCT.size for index, topic_id in enumerate(TOPIC_IDS)}
+INITIAL_SLOTS = 1024
+
+
+class MmapProgressManager:
+    """رابط UserProgressManager روی جدول اسلات ثابت"""
+
+    def __init__(self, table_dir: str = None, initial_slots: int = INITIAL_SLOTS):
+        self.table_dir = table_dir or os.path.join(os.getenv('BOT_DATA_DIR', 'data'), "progress_table")
+        os.makedirs(self.table_dir, exist_ok=True)
+        self.table_path = os.path.join(self.table_dir, "progress.tbl")
+        self.index_path = os.path.join(self.table_dir, "progress.idx")
+
+        self._lock = threading.Lock()
+        self._slots = {}   # user_id -> شماره اسلات
+        self._load_index()
+
+        if not os.path.exists(self.table_path):
+            open(self.table_path, 'wb').close()
+        self._file = open(self.table_path, 'r+b')
+        if os.path.getsize(self.table_path) < HEADER.size:
+            self._file.truncate(HEADER.size + SLOT_SIZE * initial_slots)
+            self._file.seek(0)
+            self._file.write(HEADER.pack(MAGIC, VERSION, SLOT_SIZE))
+            self._file.flush()
+        self._map()
+
+        magic, version, slot_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or slot_size != SLOT_SIZE:
+            raise ValueError(f"فایل {self.table_path} جدول پیشرفت معتبر نیست")
+
+        # اسلات‌های index بیشتر از ظرفیت (قطع در میانه رشد)
+        if len(self._slots) > self.capacity:
+            self._grow(len(self._slots))
+
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+        atexit.register(self.close)
+
+    # ---------- فایل‌ها ----------
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'rb') as f:
+            raw = f.read()
+        complete = raw[:raw.rfind(b"\n") + 1]
+        if len(complete) != len(raw):
+            # خط ناقص انتهایی (قطع هنگام افزودن کاربر)
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(len(complete))
+        for slot, user_id in enumerate(complete.decode('utf-8').splitlines()):
+            self._slots[user_id] = slot
+
+    def _map(self):
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = (len(self._mm) - HEADER.size) // SLOT_SIZE
+
+    def _grow(self, needed: int):
+        """دو برابر کردن ظرفیت و نگاشت دوباره (با قفل)"""
+        # فایل فقط با سرآیند (قطع هنگام ساخت) ظرفیت صفر دارد
+        capacity = max(self.capacity, INITIAL_SLOTS)
+        while capacity <= needed:
+            capacity *= 2
+        self._mm.flush()
+        self._mm.close()
+        self._file.truncate(HEADER.size + SLOT_SIZE * capacity)
+        self._map()
+
+    def _offset(self, user_id, create: bool):
+        """آفست اسلات کاربر؛ اگر نباشد و create=False، None"""
+        slot = self._slots.get(user_id)
+        if slot is None:
+            if not create:
+                return None
+            slot = len(self._slots)
+            if slot >= self.capacity:
+                self._grow(slot)
+            # اول جا در جدول، بعد ثبت در index (اسلات تازه صفر است)
+            self._index.write(f"{user_id}\n")
+            self._index.flush()
+            self._slots[user_id] = slot
+        return HEADER.size + slot * SLOT_SIZE
+
+    # ---------- رابط مدیر پیشرفت ----------
+
+    def get_user_progress(self, user_id) -> UserProgress:
+        with self._lock:
+            offset = self._offset(str(user_id), create=False)
+            if offset is None:
+                return UserProgress()
+            return UserProgress.unpack(self._mm[offset:offset + SLOT_SIZE])
+
+    def get_topic_record(self, user_id, topic_id) -> TopicProgress:
+        topic_offset = TOPIC_OFFSETS.get(int(topic_id))
+        with self._lock:
+            offset = self._offset(str(user_id), create=False)
+            if offset is None or topic_offset is None:
+                return TopicProgress()
+            mask, current_day = TOPIC_STRUCT.unpack_from(self._mm, offset + topic_offset)
+        if not current_day:
+            return TopicProgress()
+        return TopicProgress(current_day, bool(mask & STARTED_BIT), mask & DAYS_MASK)
+
+    def get_topic_progress(self, user_id, topic_id):
+        """دریافت پیشرفت یک موضوع برای کاربر"""
+        return self.get_topic_record(user_id, topic_id).to_dict()
+
+    def set_topic_day(self, user_id, topic_id, day_number):
+        """تنظیم روز فعلی برای یک موضوع"""
+        day_number = max(1, min(MAX_DAY, day_number))  # محدود به ۱-۲۸
+        topic_offset = TOPIC_OFFSETS.get(int(topic_id))
+        if topic_offset is None:
+            return day_number
+
+        with self._lock:
+            position = self._offset(str(user_id), create=True) + topic_offset
+            mask, _ = TOPIC_STRUCT.unpack_from(self._mm, position)
+            TOPIC_STRUCT.pack_into(self._mm, position, mask | STARTED_BIT, day_number)
+        return day_number
+
+    def complete_day(self, user_id, topic_id, day_number):
+        """علامت‌گذاری روز به عنوان تکمیل شده"""
+        topic_offset = TOPIC_OFFSETS.get(int(topic_id))
+        if topic_offset is None or not 1 <= day_number <= MAX_DAY:
+            return False
+
+        bit = 1 << (day_number - 1)
+        with self._lock:
+            position = self._offset(str(user_id), create=True) + topic_offset
+            mask, _ = TOPIC_STRUCT.unpack_from(self._mm, position)
+            if mask & bit:
+                return False
+            TOPIC_STRUCT.pack_into(self._mm, position, mask | bit, min(day_number + 1, MAX_DAY))
+        return True
+
+    def save_user(self, user_id, progress: UserProgress):
+        """نوشتن کامل اسلات یک کاربر (برای انتقال داده)"""
+        with self._lock:
+            offset = self._offset(str(user_id), create=True)
+            self._mm[offset:offset + SLOT_SIZE] = progress.pack()
+
+    def flush(self):
+        """نوشتن صفحه‌های تغییرکرده روی دیسک"""
+        with self._lock:
+            if not self._mm.closed:
+                self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            if self._mm.closed:
+                return
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+            self._index.close()
+
+
+def migrate_json_progress(progress_dir: str, table_dir: str) -> dict:
+    """انتقال فایل‌های JSON پیشرفت به جدول mmap"""
+    import json
+
+    manager = MmapProgressManager(table_dir)
+    stats = {"users": 0, "errors": 0}
+    for user_id, path in iter_progress_files(progress_dir):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manager.save_user(user_id, UserProgress.from_json(json.load(f)))
+            stats["users"] += 1
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"⚠️ خطا در انتقال {user_id}: {e}")
+    manager.close()
+    return stats
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("استفاده: python mmap_progress.py migrate [progress_dir] [table_dir]")
+        sys.exit(1)
+
+    data_dir = os.getenv('BOT_DATA_DIR', 'data')
+    source = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, "user_progress")
+    target = sys.argv[3] if len(sys.argv) > 3 else os.path.join(data_dir, "progress_table")
+    print(f"🔄 انتقال {source} ← {target}")
+    result = migrate_json_progress(source, target)
+    print(f"✅ {result['users']} کاربر منتقل شد ({result['errors']} خطا)")
\ No newline at end of file
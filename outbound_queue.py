@@ -0,0 +1,278 @@
+"""
+outbound_queue.py - صف ارسال پیام با محدودیت نرخ (token bucket)
+
+هندلرها پیام را در صف می‌گذارند و بلافاصله برمی‌گردند؛ ارسال در پس‌زمینه
+با رعایت محدودیت کلی، محدودیت هر چت و تأخیر درخواستی انجام می‌شود.
+enqueue یک Future برمی‌گرداند که پس از ارسال، پاکت پاسخ API را دارد.
+پاسخ 429 بله نرخ باکت‌ها را کاهش می‌دهد و پیام دوباره زمان‌بندی می‌شود.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from bale_client import get_retry_after
+
+
+class TokenBucket:
+    """باکت توکن با نرخ قابل تنظیم و کاهش نرخ پس از 429"""
+
+    def __init__(self, rate: float, capacity: float, min_rate: float = None):
+        """
+        Args:
+            rate: توکن در ثانیه
+            capacity: حداکثر توکن ذخیره (اندازه burst)
+            min_rate: کمترین نرخ پس از کاهش‌های متوالی
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 8
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """ثانیه‌های لازم تا در دسترس بودن یک توکن (صفر یعنی همین حالا)"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def penalize(self, now: float, retry_after: float):
+        """پاسخ 429: نصف شدن نرخ و توقف تا پایان retry_after"""
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0
+        self.updated = now
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def recover(self):
+        """بازگشت تدریجی نرخ پس از ارسال موفق"""
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+
+
+class OutboundScheduler:
+    """زمان‌بند ارسال پیام‌ها با حفظ ترتیب هر چت"""
+
+    def __init__(self, send, global_rate: float = 30, global_burst: float = 30,
+                 chat_rate: float = 1, chat_burst: float = 3, workers: int = 8,
+                 max_attempts: int = 3):
+        """
+        Args:
+            send: تابع ارسال send(method, data) -> پاکت پاسخ (مثل BaleClient.call)
+            global_rate/global_burst: محدودیت کلی ربات (پیام در ثانیه)
+            chat_rate/chat_burst: محدودیت هر چت
+            workers: تعداد thread های ارسال
+            max_attempts: حداکثر تلاش برای هر پیام پس از 429
+        """
+        self.send = send
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.max_idle_buckets = 10000
+
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._chat_buckets = {}
+        self._chat_queues = {}      # chat_id -> deque of jobs
+        self._chat_last_due = {}    # آخرین زمان زمان‌بندی‌شده هر چت (برای حفظ ترتیب)
+        self._ready = []            # heap: (due, seq, chat_id)
+        self._scheduled = set()     # چت‌هایی که در heap هستند
+        self._in_flight = set()     # چت‌هایی که پیامشان در حال ارسال است
+        self._seq = itertools.count()
+
+        self._cond = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._running = False
+
+        self.stats = {"enqueued": 0, "sent": 0, "failed": 0, "rate_limited": 0, "dropped": 0}
+
+    # ---------- API عمومی ----------
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="outbound")
+            self._thread = threading.Thread(target=self._run, name="outbound-scheduler", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, chat_id, method: str, data: dict, delay: float = 0) -> Future:
+        """
+        افزودن یک درخواست به صف؛ بلافاصله برمی‌گردد
+
+        Returns:
+            Future با پاکت پاسخ API (ok و result) پس از آخرین تلاش؛ None اگر
+            ارسال با خطای شبکه تمام شود
+        """
+        if not self._running:
+            self.start()
+
+        now = time.monotonic()
+        future = Future()
+        with self._cond:
+            due = max(now + delay, self._chat_last_due.get(chat_id, 0))
+            self._chat_last_due[chat_id] = due
+
+            job = {"chat_id": chat_id, "method": method, "data": data, "due": due, "attempts": 0,
+                   "future": future}
+            self._chat_queues.setdefault(chat_id, deque()).append(job)
+            self.stats["enqueued"] += 1
+
+            if chat_id not in self._scheduled and chat_id not in self._in_flight:
+                self._schedule_chat(chat_id, due)
+            self._cond.notify()
+        return future
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._chat_queues.values()) + len(self._in_flight)
+
+    def flush(self, timeout: float = 10) -> bool:
+        """صبر تا خالی شدن صف (برای توقف ربات)"""
+        deadline = time.monotonic() + timeout
+        while self.pending():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout: float = 10):
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    # ---------- زمان‌بندی ----------
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _schedule_chat(self, chat_id, due):
+        heapq.heappush(self._ready, (due, next(self._seq), chat_id))
+        self._scheduled.add(chat_id)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                job = None
+                while job is None:
+                    if not self._running:
+                        return
+                    if not self._ready:
+                        self._cond.wait()
+                        continue
+
+                    due, _, chat_id = self._ready[0]
+                    now = time.monotonic()
+                    if due > now:
+                        self._cond.wait(due - now)
+                        continue
+
+                    chat_bucket = self._chat_bucket(chat_id)
+                    wait = max(self.global_bucket.wait_time(now), chat_bucket.wait_time(now))
+                    if wait > 0:
+                        # تعویق همین چت؛ چت‌های دیگر می‌توانند جلو بیفتند
+                        heapq.heapreplace(self._ready, (now + wait, next(self._seq), chat_id))
+                        continue
+
+                    heapq.heappop(self._ready)
+                    self._scheduled.discard(chat_id)
+                    self.global_bucket.consume(now)
+                    chat_bucket.consume(now)
+
+                    job = self._chat_queues[chat_id].popleft()
+                    self._in_flight.add(chat_id)
+
+            self._executor.submit(self._send_job, job)
+
+    def _send_job(self, job):
+        chat_id = job["chat_id"]
+        job["attempts"] += 1
+        retry_after = 0
+        sent = False
+        result = None
+
+        try:
+            result = self.send(job["method"], job["data"])
+            retry_after = get_retry_after(result)
+            sent = bool(result.get("ok"))
+            if not sent and not retry_after:
+                print(f"❌ خطای API: {result}")
+        except Exception as e:
+            print(f"❌ خطا در ارسال پیام: {e}")
+
+        with self._cond:
+            now = time.monotonic()
+            queue = self._chat_queues[chat_id]
+
+            if sent:
+                self.stats["sent"] += 1
+            elif not retry_after:
+                self.stats["failed"] += 1
+
+            done = True
+            if retry_after:
+                self.stats["rate_limited"] += 1
+                self.global_bucket.penalize(now, retry_after)
+                self._chat_bucket(chat_id).penalize(now, retry_after)
+                if job["attempts"] < self.max_attempts:
+                    job["due"] = now + retry_after
+                    queue.appendleft(job)
+                    done = False
+                else:
+                    self.stats["dropped"] += 1
+                    print(f"⚠️ پیام چت {chat_id} پس از {job['attempts']} تلاش رها شد")
+            else:
+                self.global_bucket.recover()
+                self._chat_bucket(chat_id).recover()
+
+            self._in_flight.discard(chat_id)
+
+            if queue:
+                self._schedule_chat(chat_id, max(queue[0]["due"], now))
+            else:
+                del self._chat_queues[chat_id]
+                if self._chat_last_due.get(chat_id, 0) <= now:
+                    self._chat_last_due.pop(chat_id, None)
+
+            if len(self._chat_buckets) > self.max_idle_buckets:
+                self._sweep_buckets(now)
+
+            self._cond.notify()
+
+        # بیرون از قفل: callback های Future ممکن است دوباره پیام در صف بگذارند
+        if done:
+            job["future"].set_result(result)
+
+    def _sweep_buckets(self, now):
+        """حذف باکت چت‌های بیکاری که دوباره پر شده‌اند (محدود ماندن حافظه)"""
+        for chat_id, bucket in list(self._chat_buckets.items()):
+            if chat_id in self._chat_queues or chat_id in self._in_flight:
+                continue
+            bucket._refill(now)
+            if bucket.tokens >= bucket.capacity and bucket.rate >= bucket.base_rate:
+                del self._chat_buckets[chat_id]
\ No newline at end of file
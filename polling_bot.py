@@ -1,9 +1,20 @@
 import json
 import os
 import time
+from concurrent.futures import wait
 import requests
 from dotenv import load_dotenv
 
+from bale_client import BaleClient, DEFAULT_API_URL
+from callback_acks import CallbackAckPipeline
+from content_reload import start_content_watcher, stop_content_watcher
+from dispatcher import KeyedDispatcher, get_update_key
+from outbound_queue import OutboundScheduler
+from polling_state import OffsetStore, AdaptiveBackoff
+from render_cache import render_cache
+import templates
+from user_state import user_session
+
 from static.graphics_handler import GraphicsHandler
 from static.content.loader import (
     load_day_content,
@@ -11,7 +22,10 @@ from static.content.loader import (
     get_topic_by_id,
     start_topic_for_user,
     complete_day_for_user,
-    get_user_topic_progress
+    get_user_progress,
+    get_user_topic_record,
+    get_content_index,
+    flush_progress
 )
 
 # ایمپورت مدیر بازنشانی روزانه
@@ -26,13 +40,33 @@ if not BOT_TOKEN:
     print("❌ خطا: توکن ربات در فایل .env یافت نشد!")
     exit()
 
-BASE_URL = f"https://tapi.bale.ai/bot{BOT_TOKEN}"
+# کلاینت مشترک API (اتصال‌های ماندگار برای همه درخواست‌ها)
+bale = BaleClient(
+    BOT_TOKEN,
+    api_url=os.getenv('BALE_API_URL', DEFAULT_API_URL),
+    pool_size=int(os.getenv('BALE_POOL_SIZE', '32'))
+)
+BASE_URL = bale.base_url
+
+# صف ارسال پیام با محدودیت نرخ کلی و هر چت
+outbound = OutboundScheduler(
+    bale.call,
+    global_rate=float(os.getenv('BALE_GLOBAL_RATE', '30')),
+    chat_rate=float(os.getenv('BALE_CHAT_RATE', '1')),
+    workers=int(os.getenv('OUTBOUND_WORKERS', '8'))
+)
 
 
 # ========== توابع اصلی ربات ==========
 
-def send_message(chat_id, text, keyboard=None):
-    url = f"{BASE_URL}/sendMessage"
+def send_message(chat_id, text, keyboard=None, delay=0):
+    """
+    قرار دادن پیام در صف ارسال (delay: حداقل تأخیر به ثانیه)
+
+    بلافاصله برمی‌گردد. نتیجه ارسال (پاکت پاسخ API با message_id، یا None
+    پس از خطای شبکه) با .result() روی Future برگشتی در دسترس است؛ صبر
+    برای آن داخل هندلر ارسال را دوباره هم‌زمان می‌کند.
+    """
     data = {
         "chat_id": chat_id,
         "text": text,
@@ -42,21 +76,10 @@ def send_message(chat_id, text, keyboard=None):
     if keyboard:
         data["reply_markup"] = json.dumps(keyboard)
 
-    try:
-        response = requests.post(url, json=data, timeout=30)
-        result = response.json()
-
-        if not result.get("ok"):
-            print(f"❌ خطای API: {result}")
-
-        return result
-    except Exception as e:
-        print(f"❌ خطا در ارسال پیام: {e}")
-        return None
+    return outbound.enqueue(chat_id, "sendMessage", data, delay)
 
 
 def get_updates(last_update_id=0):
-    url = f"{BASE_URL}/getUpdates"
     params = {
         "offset": last_update_id + 1,
         "timeout": 30,
@@ -64,24 +87,64 @@ def get_updates(last_update_id=0):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=35)
-        return response.json()
+        return bale.call("getUpdates", params=params)
     except requests.exceptions.RequestException as e:
         print(f"⚠️ خطا در دریافت پیام‌ها: {e}")
-        time.sleep(5)
         return {"ok": False}
     except Exception as e:
         print(f"❌ خطای ناشناخته: {e}")
         return {"ok": False}
 
 
-def answer_callback(callback_id):
-    url = f"{BASE_URL}/answerCallbackQuery"
+def answer_callback(callback_id, text=None):
     data = {"callback_query_id": callback_id}
+    if text:
+        data["text"] = text
+
     try:
-        requests.post(url, json=data, timeout=5)
-    except:
-        pass
+        result = bale.call("answerCallbackQuery", data)
+        if not result.get("ok"):
+            print(f"⚠️ خطا در تأیید callback: {result}")
+        return result.get("ok", False)
+    except Exception as e:
+        print(f"⚠️ خطا در تأیید callback: {e}")
+        return False
+
+
+# تأیید دکمه‌ها در پس‌زمینه، همزمان با اجرای هندلر
+callback_acks = CallbackAckPipeline(
+    answer_callback,
+    deadline=float(os.getenv('CALLBACK_ACK_DEADLINE', '1.5'))
+)
+
+
+def set_webhook(url, secret_token=None):
+    """ثبت آدرس webhook در بله"""
+    data = {"url": url}
+    if secret_token:
+        data["secret_token"] = secret_token
+
+    try:
+        result = bale.call("setWebhook", data)
+
+        if result.get("ok"):
+            print(f"✅ Webhook ثبت شد: {url}")
+            return True
+
+        print(f"❌ خطا در ثبت Webhook: {result}")
+        return False
+    except Exception as e:
+        print(f"❌ خطا در ثبت Webhook: {e}")
+        return False
+
+
+def delete_webhook():
+    """حذف webhook (بازگشت به حالت getUpdates)"""
+    try:
+        return bale.call("deleteWebhook").get("ok", False)
+    except Exception as e:
+        print(f"⚠️ خطا در حذف Webhook: {e}")
+        return False
 
 
 # ========== تابع پرداخت ساده ==========
@@ -96,8 +159,6 @@ def send_donation_invoice(chat_id, user_id, amount=10000):
         return False
 
     # ارسال صورتحساب
-    url = f"{BASE_URL}/sendInvoice"
-
     data = {
         "chat_id": chat_id,
         "title": "حمایت از توسعه‌دهنده",
@@ -114,8 +175,7 @@ def send_donation_invoice(chat_id, user_id, amount=10000):
     }
 
     try:
-        response = requests.post(url, json=data, timeout=30)
-        result = response.json()
+        result = bale.call("sendInvoice", data)
 
         if result.get("ok"):
             print(f"✅ Invoice حمایت ارسال شد برای کاربر {user_id} - مبلغ: {amount:,} ریال")
@@ -145,15 +205,7 @@ def handle_successful_payment(update):
 
     # ارسال تشکر
     amount_toman = amount / 10  # تبدیل به تومان
-    message_text = f"""
-💖 <b>با تشکر از حمایت شما!</b>
-
-✅ مبلغ <b>{amount_toman:,.0f} تومان</b> با موفقیت دریافت شد
-🌟 حمایت شما انگیزه‌ای برای توسعه ربات است
-🙏 از لطف و همراهی شما سپاسگزاریم
-
-📞 برای پیگیری: @farzadQ_ir
-"""
+    message_text = templates.payment_thanks(amount_toman=amount_toman)
 
     send_message(chat_id, message_text)
     return True
@@ -214,41 +266,89 @@ def handle_start(chat_id, user_id, username, first_name):
 
     # ارسال پیام خوش‌آمد با دکمه حمایت
     send_message(chat_id, welcome_text)
-    time.sleep(1)
 
     # ارسال دکمه‌های شروع
-    start_text = """
-🎯 <b>برای شروع کار با ربات، یکی از گزینه‌های زیر را انتخاب کنید:</b>
-
-• <b>استفاده رایگان:</b> تمام محتوای ربات به صورت کاملاً رایگان در دسترس شماست
-• <b>حمایت داوطلبانه:</b> اگر از ربات راضی هستید و می‌خواهید از توسعه‌دهنده حمایت کنید
-
-💝 <i>ربات به صورت کاملاً رایگان ارائه می‌شود. حمایت شما اختیاری و داوطلبانه است.</i>
-"""
+    start_text = templates.START_OPTIONS
 
     start_keyboard = create_start_keyboard()
-    send_message(chat_id, start_text, start_keyboard)
+    send_message(chat_id, start_text, start_keyboard, delay=1)
 
 
 def handle_support_options(chat_id, user_id):
     """نمایش گزینه‌های حمایت"""
-    support_text = """
-💖 <b>انتخاب مبلغ حمایت</b>
+    support_text = templates.SUPPORT_OPTIONS
 
-لطفاً یکی از مبالغ زیر را انتخاب کنید یا مبلغ دلخواه خود را وارد کنید:
+    support_keyboard = create_support_options_keyboard()
+    send_message(chat_id, support_text, support_keyboard)
 
-🌟 <b>گزینه‌های موجود:</b>
-• ۱۰,۰۰۰ تومان
-• ۲۰,۰۰۰ تومان  
-• ۵۰,۰۰۰ تومان
-• ۱۰۰,۰۰۰ تومان
-• یا هر مبلغ دلخواه دیگری
 
-🙏 <i>هر مبلغی که مایل باشید قابل قبول است. هدف فقط حمایت و قدردانی است.</i>
-"""
+def render_day_message(content, is_completed):
+    """متن صفحه روز (کش‌شده در render_cache با نوع today)"""
+    parts = [templates.day_page(
+        topic_emojis=content['topic_emoji'] * 3,
+        week_title=content['week_title'],
+        author_quote=content.get('author_quote', ''),
+        topic_name=content['topic_name'],
+        day_number=content['day_number'],
+        week_number=content['week_number'],
+        intro=content['intro'],
+        topic_emoji=content['topic_emoji']
+    )]
+    parts.extend(f"\n{i}. {item}" for i, item in enumerate(content['items'][:10], 1))
+    parts.append("\n──────────────\n")
 
-    support_keyboard = create_support_options_keyboard()
-    send_message(chat_id, support_text, support_keyboard)
+    if content.get('exercise'):
+        parts.append(f"💡 <b>تمرین امروز:</b> {content['exercise']}\n\n")
+
+    if content.get('affirmation'):
+        parts.append(f"🌟 <b>تأکید مثبت:</b> <i>{content['affirmation']}</i>\n\n")
+
+    if content.get('reflection'):
+        parts.append(f"💭 <b>بازتاب:</b> {content['reflection']}\n\n")
+
+    if is_completed:
+        parts.append("✅ <b>این روز قبلاً تکمیل شده است.</b>")
+    else:
+        parts.append("🙏 پس از خواندن، دکمه 'امروز شکرگزار بودم' را فشار دهید.")
+
+    return "".join(parts)
+
+
+def render_review_message(content, day_number):
+    """متن بازخوانی روز تکمیل‌شده (کش‌شده در render_cache با نوع review)"""
+    parts = [templates.review_page(
+        day_number=day_number,
+        topic_name=content['topic_name'],
+        week_title=content['week_title'],
+        intro=content['intro'],
+        topic_emoji=content['topic_emoji']
+    )]
+    parts.extend(f"\n{i}. {item}" for i, item in enumerate(content['items'][:10], 1))
+    parts.append("\n──────────────\n")
+
+    if content.get('exercise'):
+        parts.append(f"💡 <b>تمرین:</b> {content['exercise']}\n\n")
+
+    if content.get('affirmation'):
+        parts.append(f"🌟 <b>تأکید مثبت:</b> <i>{content['affirmation']}</i>\n\n")
+
+    if content.get('reflection'):
+        parts.append(f"💭 <b>بازتاب:</b> {content['reflection']}\n\n")
+
+    parts.append("✅ <b>این روز قبلاً تکمیل شده است.</b>")
+    return "".join(parts)
+
+
+def warm_render_cache():
+    """ساخت همه صفحه‌های today پیش از اولین درخواست (RENDER_CACHE_WARM=1)"""
+    for topic in get_all_topics():
+        for day_number in range(1, 29):
+            content = load_day_content(topic["id"], day_number)
+            for is_completed in (False, True):
+                render_cache.get(topic["id"], day_number, "today", is_completed,
+                                 lambda: render_day_message(content, is_completed),
+                                 content.get("content_version", 0))
+    print(f"🖨️ {len(render_cache)} صفحه روز از پیش ساخته شد")
 
 
 def handle_category_selection(chat_id, user_id, topic_id):
@@ -268,27 +368,13 @@ def handle_category_selection(chat_id, user_id, topic_id):
 
             if last_day > 0:
                 # کاربر قبلاً روزی را دیده
-                message = f"""
-⏰ <b>زمان برای روز جدید هنوز نرسیده!</b>
-
-{topic_emoji} <b>سیستم روزانه شکرگزاری</b>
-
-✅ آخرین روزی که کامل کردید: <b>روز {last_day}</b>
-🕕 بازنشانی روزانه: <b>ساعت ۶ صبح</b>
-⏳ زمان باقیمانده: <b>{access_info['remaining_text']}</b>
-
-📅 <i>برای مشاهده روز {last_day + 1}:</i>
-
-1️⃣ تا ساعت <b>{access_info['next_reset_human']}</b> صبر کنید
-2️⃣ سپس دوباره این موضوع را انتخاب کنید
-
-🌟 <b>چرا سیستم ساعت ۶ صبح؟</b>
-• ایجاد نظم صبحگاهی در شکرگزاری
-• شروع روز با انرژی مثبت
-• تبدیل به عادت پایدار روزانه
-
-💡 <i>شما می‌توانید روزهای قبلی را مرور کنید...</i>
-"""
+                message = templates.locked_day(
+                    topic_emoji=topic_emoji,
+                    last_day=last_day,
+                    remaining_text=access_info['remaining_text'],
+                    next_day=last_day + 1,
+                    next_reset_human=access_info['next_reset_human']
+                )
 
                 keyboard = {
                     "inline_keyboard": [
@@ -316,13 +402,13 @@ def handle_category_selection(chat_id, user_id, topic_id):
             send_message(chat_id, "❌ موضوع یافت نشد.")
             return
 
-        user_progress = get_user_topic_progress(user_id, topic_id)
+        user_progress = get_user_topic_record(user_id, topic_id)
 
-        if not user_progress.get("started", False):
+        if not user_progress.started:
             print(f"🎯 کاربر {user_id} برای اولین بار موضوع {topic_id} را شروع می‌کند")
             content = start_topic_for_user(user_id, topic_id)
         else:
-            current_day = user_progress.get("current_day", 1)
+            current_day = user_progress.current_day
             print(f"📅 کاربر {user_id} موضوع {topic_id} - روز {current_day}")
             content = load_day_content(topic_id, current_day, user_id)
 
@@ -333,42 +419,14 @@ def handle_category_selection(chat_id, user_id, topic_id):
         # ثبت دسترسی کاربر
         daily_reset.record_access(user_id, topic_id, content['day_number'])
 
-        is_completed = content["day_number"] in user_progress.get("completed_days", [])
-
-        # ساخت پیام
-        message = f"""
-{content['topic_emoji'] * 3}
-<b>{content['week_title']}</b>
-📖 {content.get('author_quote', '')}
-
-<b>{content['topic_name']}</b>
-📅 روز {content['day_number']} از ۲۸ • هفته {content['week_number']}
-🕕 بازنشانی بعدی: ساعت ۶ صبح
+        is_completed = user_progress.is_completed(content["day_number"])
 
-<i>{content['intro']}</i>
-
-──────────────
-{content['topic_emoji']} <b>۱۰ شکرگزاری امروز:</b>
-"""
-
-        for i, item in enumerate(content['items'][:10], 1):
-            message += f"\n{i}. {item}"
-
-        message += "\n──────────────\n"
-
-        if content.get('exercise'):
-            message += f"💡 <b>تمرین امروز:</b> {content['exercise']}\n\n"
-
-        if content.get('affirmation'):
-            message += f"🌟 <b>تأکید مثبت:</b> <i>{content['affirmation']}</i>\n\n"
-
-        if content.get('reflection'):
-            message += f"💭 <b>بازتاب:</b> {content['reflection']}\n\n"
-
-        if is_completed:
-            message += "✅ <b>این روز قبلاً تکمیل شده است.</b>"
-        else:
-            message += "🙏 پس از خواندن، دکمه 'امروز شکرگزار بودم' را فشار دهید."
+        # پیام از کش (برای همه کاربران یکسان است)
+        message = render_cache.get(
+            content["topic_id"], content["day_number"], "today", is_completed,
+            lambda: render_day_message(content, is_completed),
+            content.get("content_version", 0)
+        )
 
         inline_keyboard = GraphicsHandler.create_day_inline_keyboard(
             topic_id,
@@ -377,10 +435,9 @@ def handle_category_selection(chat_id, user_id, topic_id):
         )
         send_message(chat_id, message, inline_keyboard)
 
-        time.sleep(0.5)
         menu_message = "🔽 <b>منوی دسترسی سریع:</b>"
         markup_keyboard = create_main_menu_keyboard()
-        send_message(chat_id, menu_message, markup_keyboard)
+        send_message(chat_id, menu_message, markup_keyboard, delay=0.5)
 
     except Exception as e:
         print(f"❌ خطا در handle_category_selection: {e}")
@@ -391,7 +448,7 @@ def handle_category_selection(chat_id, user_id, topic_id):
 
 
 def handle_complete_day(chat_id, user_id, topic_id, day_number):
-    """تکمیل روز - با سیستم ساعت ۶ صبح"""
+    """تکمیل روز - با سیستم ساعت ۶ صبح (متن toast دکمه را برمی‌گرداند)"""
 
     if complete_day_for_user(user_id, topic_id, day_number):
         topic_info = get_topic_by_id(topic_id)
@@ -403,26 +460,13 @@ def handle_complete_day(chat_id, user_id, topic_id, day_number):
         next_reset_human = access_info.get('next_reset_human', '۶ صبح')
 
         if day_number < 28:
-            message = f"""
-{topic_emoji} <b>تبریک! روز {day_number} {topic_name} را کامل کردید!</b>
-
-✅ <b>تمرین امروز ثبت شد</b>
-✨ شما یک گام دیگر به سوی تحول زندگی برداشتید
-
-🎯 <b>سیستم روزانه شکرگزاری (ساعت ۶ صبح):</b>
-<i>برای بهترین نتیجه، این روند را دنبال کنید:</i>
-
-1️⃣ <b>فردا ساعت {next_reset_human} به ربات مراجعه کنید</b>
-2️⃣ موضوع "{topic_name}" را انتخاب کنید  
-3️⃣ محتوای روز {day_number + 1} برای شما نمایش داده می‌شود
-
-⏰ <i>این سیستم به شما کمک می‌کند:</i>
-• شکرگزاری صبحگاهی را به عادت تبدیل کنید
-• روز خود را با انرژی مثبت شروع کنید
-• نتایج پایدار و ماندگار بگیرید
-
-🌟 <b>تا فردا صبح، تأثیرات شکرگزاری امروز را در زندگی خود مشاهده کنید...</b>
-"""
+            message = templates.day_completed(
+                topic_emoji=topic_emoji,
+                day_number=day_number,
+                topic_name=topic_name,
+                next_reset_human=next_reset_human,
+                next_day=day_number + 1
+            )
 
             keyboard = {
                 "inline_keyboard": [
@@ -439,25 +483,7 @@ def handle_complete_day(chat_id, user_id, topic_id, day_number):
             send_message(chat_id, message, keyboard)
 
         else:
-            message = f"""
-🎊 <b>شکوه‌آمیز! دوره ۲۸ روزه {topic_name} کامل شد!</b>
-
-{topic_emoji * 3}
-
-🌟 <b>دستاورد بزرگ شما:</b>
-✅ ۲۸ روز تمرین مستمر شکرگزاری
-✅ ۲۸۰ مورد شکرگزاری ثبت شده  
-✅ ۴ هفته تحول ذهنی
-✅ تبدیل شکرگزاری به سبک زندگی
-
-🎯 <b>حالا می‌توانید:</b>
-
-🔄 همین موضوع را از اول شروع کنید
-➡️ موضوع جدیدی را انتخاب کنید  
-📊 پیشرفت کلی خود را ببینید
-
-💝 <i>"شما تبدیل به آنچه شکرگزارش هستید، می‌شوید" - راندا برن</i>
-"""
+            message = templates.course_completed(topic_name=topic_name, topic_emojis=topic_emoji * 3)
 
             keyboard = {
                 "inline_keyboard": [
@@ -472,6 +498,8 @@ def handle_complete_day(chat_id, user_id, topic_id, day_number):
             }
 
             send_message(chat_id, message, keyboard)
+
+        return f"✅ روز {day_number} ثبت شد"
     else:
         send_message(chat_id, "✅ این روز قبلاً تکمیل شده است.")
 
@@ -480,40 +508,7 @@ def handle_complete_day(chat_id, user_id, topic_id, day_number):
 
 def handle_help(chat_id):
     """ارسال راهنمای کامل"""
-    help_text = """
-📚 <b>راهنمای کامل ربات معجزه شکرگزاری</b>
-
-🎯 <b>سیستم ۲۸ روزه:</b>
-• ۸ موضوع اصلی زندگی
-• هر موضوع: ۲۸ روز تمرین
-• هر روز: ۱۰ مورد شکرگزاری
-
-⏰ <b>سیستم زمان‌بندی:</b>
-• بازنشانی روزانه: <b>ساعت ۶ صبح</b>
-• هر روز فقط یک بار می‌توانید تمرین کنید
-• هدف: ایجاد عادت روزانه
-
-📱 <b>نحوه استفاده:</b>
-1️⃣ یک موضوع انتخاب کنید
-2️⃣ ۱۰ مورد شکرگزاری را بخوانید
-3️⃣ تمرین روزانه را انجام دهید
-4️⃣ دکمه "امروز شکرگزار بودم" را فشار دهید
-5️⃣ فردا ساعت ۶ صبح برای روز بعدی برگردید
-
-💖 <b>حمایت داوطلبانه:</b>
-• ربات کاملاً رایگان است
-• حمایت مالی اختیاری است
-• هر مبلغی قابل قبول است
-• برای تشکر و کمک به توسعه
-
-🌟 <b>نکات مهم:</b>
-• با احساس عمیق شکرگزاری کنید
-• بر نکات مثبت تمرکز کنید
-• شکرگزاری را به سبک زندگی تبدیل کنید
-
-📞 <b>پشتیبانی:</b>
-برای سوالات و مشکلات با توسعه‌دهنده تماس بگیرید.
-"""
+    help_text = templates.HELP
 
     markup_keyboard = create_main_menu_keyboard()
     send_message(chat_id, help_text, markup_keyboard)
@@ -530,35 +525,31 @@ def handle_progress(chat_id, user_id, topic_id=None):
             send_message(chat_id, "❌ موضوع یافت نشد")
             return
 
-        progress = get_user_topic_progress(user_id, topic_id)
-        completed = len(progress.get('completed_days', []))
-        current_day = progress.get('current_day', 1)
+        progress = get_user_topic_record(user_id, topic_id)
+        completed = progress.completed_count
+        current_day = progress.current_day
         percentage = (completed / 28) * 100
 
-        text = f"""
-{topic_info['emoji']} <b>پیشرفت در {topic_info['name']}</b>
-
-✅ روزهای تکمیل‌شده: {completed} از ۲۸
-📅 روز جاری: {current_day}
-📈 پیشرفت: {percentage:.1f}%
-"""
-
-        # نوار پیشرفت
-        progress_bar_length = 10
-        filled = int((current_day / 28) * progress_bar_length)
-        progress_bar = "█" * filled + "░" * (progress_bar_length - filled)
-        text += f"\n{progress_bar}\n"
-
         if completed == 28:
-            text += "\n🎊 <b>تبریک! شما این موضوع را کامل کردید!</b>"
+            footer = "🎊 <b>تبریک! شما این موضوع را کامل کردید!</b>"
         elif completed >= 20:
-            text += "\n🌟 <b>عالی! نزدیک به پایان هستید.</b>"
+            footer = "🌟 <b>عالی! نزدیک به پایان هستید.</b>"
         elif completed >= 10:
-            text += "\n💪 <b>خوب پیش می‌روید! ادامه دهید.</b>"
+            footer = "💪 <b>خوب پیش می‌روید! ادامه دهید.</b>"
         elif completed > 0:
-            text += "\n🚀 <b>شروع خوبی داشته‌اید!</b>"
+            footer = "🚀 <b>شروع خوبی داشته‌اید!</b>"
         else:
-            text += "\n🎯 <b>هنوز شروع نکرده‌اید. همین حالا شروع کنید!</b>"
+            footer = "🎯 <b>هنوز شروع نکرده‌اید. همین حالا شروع کنید!</b>"
+
+        text = templates.topic_progress(
+            emoji=topic_info['emoji'],
+            name=topic_info['name'],
+            completed=completed,
+            current_day=current_day,
+            percentage=percentage,
+            progress_bar=templates.progress_bar(current_day, 28, 10),
+            footer=footer
+        )
 
         # ارسال با Markup Keyboard
         markup_keyboard = create_main_menu_keyboard()
@@ -566,34 +557,39 @@ def handle_progress(chat_id, user_id, topic_id=None):
 
     else:
         # پیشرفت کلی
-        text = "<b>📊 پیشرفت کلی شما</b>\n\n"
-
         total_completed = 0
+        user_progress = get_user_progress(user_id)
+        lines = []
 
         for topic in topics:
-            progress = get_user_topic_progress(user_id, topic['id'])
-            completed = len(progress.get('completed_days', []))
+            completed = user_progress.topic(topic['id']).completed_count
             total_completed += completed
-
-            percentage = (completed / 28) * 100
-            progress_bar_length = 5
-            filled = int((completed / 28) * progress_bar_length)
-            progress_bar = "█" * filled + "░" * (progress_bar_length - filled)
-
-            text += f"{topic['emoji']} {topic['name']}: {progress_bar} {completed}/۲۸\n"
+            lines.append(templates.overall_progress_line(
+                emoji=topic['emoji'],
+                name=topic['name'],
+                progress_bar=templates.progress_bar(completed, 28, 5),
+                completed=completed
+            ))
 
         total_days = len(topics) * 28
         total_percentage = (total_completed / total_days) * 100 if total_days > 0 else 0
 
-        text += f"\n✅ کل روزهای تکمیل‌شده: {total_completed} از {total_days}"
-        text += f"\n📈 درصد کلی: {total_percentage:.1f}%"
-
         if total_percentage > 70:
-            text += "\n\n🌟 <b>عالی! شما در مسیر تحول کامل هستید.</b>"
+            footer = "\n\n🌟 <b>عالی! شما در مسیر تحول کامل هستید.</b>"
         elif total_percentage > 40:
-            text += "\n\n💪 <b>خوب پیش می‌روید! ادامه دهید.</b>"
+            footer = "\n\n💪 <b>خوب پیش می‌روید! ادامه دهید.</b>"
         elif total_percentage > 0:
-            text += "\n\n🚀 <b>شروع خوبی داشته‌اید!</b>"
+            footer = "\n\n🚀 <b>شروع خوبی داشته‌اید!</b>"
+        else:
+            footer = ""
+
+        text = templates.overall_progress(
+            lines="".join(lines),
+            total_completed=total_completed,
+            total_days=total_days,
+            total_percentage=total_percentage,
+            footer=footer
+        )
 
         # ارسال با Markup Keyboard
         markup_keyboard = create_main_menu_keyboard()
@@ -605,31 +601,9 @@ def handle_encourage(chat_id, topic_id):
     topic_info = get_topic_by_id(topic_id)
 
     if topic_info:
-        encourage_text = f"""
-{topic_info['emoji']} <b>انگیزه برای ادامه {topic_info['name']}</b>
-
-"هر شکرگزاری قدمی است به سوی تحول زندگی.
-هر روز که سپاسگزاری می‌کنید،
-یک لایه از محدودیت‌ها را می‌کنید."
-
-🌟 تمرین امروز را با عشق انجام دهید
-🎯 بر نکات مثبت تمرکز کنید
-💖 از قلب خود تشکر کنید
-
-<i>شما در مسیر درستی قرار دارید...</i>
-"""
+        encourage_text = templates.encourage_topic(emoji=topic_info['emoji'], name=topic_info['name'])
     else:
-        encourage_text = """
-✨ <b>پیام تشویقی</b>
-
-"شکرگزاری معجزه‌ای است که زندگیتان را متحول می‌کند."
-
-💖 هر روز ۱۰ دقیقه وقت بگذارید
-🎯 روی نکات مثبت تمرکز کنید
-🌟 معجزه را در زندگی خود ببینید
-
-<i>ادامه دهید... هر روز نزدیک‌تر</i>
-"""
+        encourage_text = templates.ENCOURAGE
 
     markup_keyboard = create_main_menu_keyboard()
     send_message(chat_id, encourage_text, markup_keyboard)
@@ -637,41 +611,7 @@ def handle_encourage(chat_id, topic_id):
 
 def handle_contact_developer(chat_id):
     """ارسال اطلاعات تماس با توسعه‌دهنده"""
-    contact_text = """
-👨‍💻 <b>ارتباط با توسعه‌دهنده</b>
-
-
-💎 **توسعه‌دهنده:**  
-فـــرزاد قــجری  
-
-📞 **تماس مستقیم:**  
-۰۹۳۰۲۴۴۶۱۴۱ 
-
-📧 **ایمیل:**  
-farzadq.ir@gmail.com 
-
-🆔 **آیدی‌های ارتباطی:**  
-**ایتا:** farzadQ_ir@  
-**تلگرام:** farzadQ_ir@  
-**بله:** farzadQ_ir@  
-**روبیکا:** farzadQ_ir@  
-
----
-
-🎯 **حوزه‌های تخصصی و خدمات:**  
-✅ طراحی و ساخت ربات‌های تلگرام و وب‌سایت‌های پویا  
-✅ توسعه اپلیکیشن‌های موبایل (Android/iOS) و نرم‌افزارهای دسکتاپ  
-✅ برنامه‌نویسی پایتون، فریم‌ورک‌های Django و Flask  
-✅ طراحی و توسعه API و سیستم‌های پایگاه‌داده  
-✅ مشاوره، پشتیبانی فنی و دوره‌های آموزشی برنامه‌نویسی  
-
-    🌍**www.danekar.ir**
----
-
-✨ *برای شروع پروژه، دریافت مشاوره یا همکاری، از طریق راه‌های فوق در ارتباط باشید.*
-
-
-"""
+    contact_text = templates.CONTACT
 
     markup_keyboard = create_main_menu_keyboard()
     send_message(chat_id, contact_text, markup_keyboard)
@@ -699,31 +639,11 @@ def handle_review_day(chat_id, user_id, topic_id, day_number):
         send_message(chat_id, f"❌ خطا در بارگذاری محتوا.")
         return
 
-    message = f"""
-📖 <b>بازخوانی روز {day_number}: {content['topic_name']}</b>
-
-🎯 {content['week_title']}
-<i>{content['intro']}</i>
-
-──────────────
-{content['topic_emoji']} <b>۱۰ شکرگزاری این روز:</b>
-"""
-
-    for i, item in enumerate(content['items'][:10], 1):
-        message += f"\n{i}. {item}"
-
-    message += "\n──────────────\n"
-
-    if content.get('exercise'):
-        message += f"💡 <b>تمرین:</b> {content['exercise']}\n\n"
-
-    if content.get('affirmation'):
-        message += f"🌟 <b>تأکید مثبت:</b> <i>{content['affirmation']}</i>\n\n"
-
-    if content.get('reflection'):
-        message += f"💭 <b>بازتاب:</b> {content['reflection']}\n\n"
-
-    message += "✅ <b>این روز قبلاً تکمیل شده است.</b>"
+    message = render_cache.get(
+        topic_id, day_number, "review", True,
+        lambda: render_review_message(content, day_number),
+        content.get("content_version", 0)
+    )
 
     keyboard = {
         "inline_keyboard": [
@@ -751,16 +671,7 @@ def handle_restart_topic(chat_id, user_id, topic_id):
     # شروع از روز اول
     content = start_topic_for_user(user_id, topic_id)
 
-    message = f"""
-🔄 <b>شروع مجدد {topic_info['name']}</b>
-
-{topic_info['emoji'] * 3}
-
-✅ زمان‌بندی شما بازنشانی شد
-🎯 حالا می‌توانید از روز ۱ شروع کنید
-
-🌟 <i>این بار با تجربه بیشتر و عمق افزون‌تر...</i>
-"""
+    message = templates.restart_topic(name=topic_info['name'], emojis=topic_info['emoji'] * 3)
 
     keyboard = {
         "inline_keyboard": [
@@ -832,9 +743,142 @@ def handle_message(chat_id, user_id, text, username="", first_name=""):
             send_message(chat_id, help_text, markup_keyboard)
 
 
+# ========== پردازش آپدیت‌ها ==========
+
+# دکمه‌هایی که route_callback برایشان toast برمی‌گرداند (تأیید منتظر هندلر می‌ماند)
+TOAST_CALLBACKS = ("complete_", "already_")
+
+
+def handle_callback_query(callback):
+    """پردازش دکمه‌های Inline؛ تأیید دکمه در پس‌زمینه و همزمان با هندلر ارسال می‌شود"""
+    callback_id = callback["id"]
+    data = callback.get("data", "")
+    chat_id = callback["message"]["chat"]["id"]
+    user_id = str(callback["from"]["id"])
+
+    callback_acks.received(callback_id, hold=data.startswith(TOAST_CALLBACKS))
+    toast = None
+    try:
+        toast = route_callback(chat_id, user_id, data)
+    finally:
+        callback_acks.finish(callback_id, toast)
+
+
+def route_callback(chat_id, user_id, data):
+    """
+    اجرای هندلر مربوط به داده دکمه؛ متن اختیاری toast را برمی‌گرداند
+
+    پیشوند دکمه‌ای که toast برمی‌گرداند باید در TOAST_CALLBACKS باشد؛ در غیر
+    این صورت تأیید پیش‌تر ارسال شده و متن نمایش داده نمی‌شود.
+    """
+    print(f"🔄 Callback: {data}")
+
+    if data == "categories":
+        handle_show_topics(chat_id)
+
+    elif data.startswith("cat_"):
+        topic_id = int(data.split("_")[1])
+        handle_category_selection(chat_id, user_id, topic_id)
+
+    elif data.startswith("complete_"):
+        parts = data.split("_")
+        topic_id = int(parts[1])
+        day_number = int(parts[2])
+        return handle_complete_day(chat_id, user_id, topic_id, day_number)
+
+    elif data.startswith("already_"):
+        return "✅ این روز قبلاً تکمیل شده است"
+
+    elif data.startswith("review_"):
+        parts = data.split("_")
+        topic_id = int(parts[1])
+        day_number = int(parts[2])
+        handle_review_day(chat_id, user_id, topic_id, day_number)
+
+    elif data.startswith("restart_"):
+        topic_id = int(data.split("_")[1])
+        handle_restart_topic(chat_id, user_id, topic_id)
+
+    elif data == "progress":
+        handle_progress(chat_id, user_id)
+
+    elif data.startswith("progress_"):
+        topic_id = int(data.split("_")[1])
+        handle_progress(chat_id, user_id, topic_id)
+
+    elif data == "help" or data == "help_beautiful":
+        handle_help(chat_id)
+
+    elif data.startswith("encourage_"):
+        topic_id = int(data.split("_")[1])
+        handle_encourage(chat_id, topic_id)
+
+    elif data == "contact_developer":
+        handle_contact_developer(chat_id)
+
+    # اضافه کردن handler برای حمایت
+    elif data == "support_options":
+        handle_support_options(chat_id, user_id)
+
+    elif data == "start_using":
+        categories_text = "🎯 <b>لطفاً یک موضوع از ۸ حوزه اصلی انتخاب کنید:</b>"
+        markup_keyboard = create_categories_keyboard()
+        send_message(chat_id, categories_text, markup_keyboard)
+
+    elif data == "support_back":
+        # بازگشت به صفحه شروع
+        start_text = templates.START_OPTIONS
+        start_keyboard = create_start_keyboard()
+        send_message(chat_id, start_text, start_keyboard)
+
+    elif data == "support_custom":
+        # درخواست مبلغ دلخواه
+        message = templates.SUPPORT_CUSTOM
+        send_message(chat_id, message)
+
+    elif data.startswith("support_"):
+        # پردازش مبلغ‌های از پیش تعیین شده
+        try:
+            amount_str = data.split("_")[1]
+            amount = int(amount_str)  # مبلغ به تومان
+            amount_rials = amount * 10  # تبدیل به ریال
+            send_donation_invoice(chat_id, user_id, amount_rials)
+        except:
+            send_message(chat_id, "⚠️ خطا در پردازش مبلغ.")
+
+
+def process_update(update):
+    """پردازش یک آپدیت دریافتی از بله (مشترک بین همه حالت‌های اجرا)"""
+    # با STORAGE_BACKEND=user وضعیت کاربر یک بار خوانده و یک بار نوشته می‌شود
+    with user_session(get_update_key(update)):
+        route_update(update)
+
+
+def route_update(update):
+    """ارسال آپدیت به هندلر مناسب"""
+    # پردازش successful_payment
+    if "message" in update and "successful_payment" in update["message"]:
+        print(f"💰 پرداخت موفق دریافت شد")
+        handle_successful_payment(update)
+        return
+
+    if "message" in update:
+        msg = update["message"]
+        chat_id = msg["chat"]["id"]
+        user_id = str(msg["from"]["id"])
+        text = msg.get("text", "")
+        username = msg["from"].get("username", "")
+        first_name = msg["from"].get("first_name", "")
+
+        handle_message(chat_id, user_id, text, username, first_name)
+
+    elif "callback_query" in update:
+        handle_callback_query(update["callback_query"])
+
+
 # ========== حلقه اصلی ==========
 
-def start_polling():
+def print_banner():
     print("=" * 50)
     print("🤖 ربات معجزه شکرگزاری")
     print("📖 بر اساس کتاب راندا برن")
@@ -844,18 +888,31 @@ def start_polling():
     print("💖 سیستم حمایت: فعال")
     print("=" * 50)
 
-    # تست اتصال
-    test_url = f"{BASE_URL}/getMe"
+
+def prepare_content():
+    """
+    ساخت ایندکس محتوا پیش از اولین درخواست و شروع بررسی تغییرات
+
+    در حالت sharded هر کارگر نسخه محتوای خود را دارد، پس این تابع در
+    پردازه‌ای اجرا می‌شود که هندلرها را اجرا می‌کند (worker_main).
+    """
+    get_content_index()
+    if os.getenv('RENDER_CACHE_WARM', '0') == "1":
+        warm_render_cache()
+    start_content_watcher()
+
+
+def check_connection(load_content=True):
+    """تست اتصال به API بله و بررسی provider token"""
     try:
-        response = requests.get(test_url, timeout=10)
-        if response.json().get("ok"):
+        if bale.call("getMe").get("ok"):
             print("✅ اتصال به API بله برقرار شد")
         else:
             print("❌ خطا در اتصال به بله")
-            return
+            return False
     except:
         print("❌ خطا در اتصال به اینترنت")
-        return
+        return False
 
     # بررسی provider token
     provider_token = os.getenv('BALE_PROVIDER_TOKEN')
@@ -864,147 +921,192 @@ def start_polling():
     else:
         print("⚠️ سیستم پرداخت غیرفعال (provider_token یافت نشد)")
 
-    print("🚀 ربات در حال اجرا...")
+    if load_content:
+        prepare_content()
+
+    return True
+
+
+def print_api_stats():
+    """گزارش تأخیر فراخوانی‌های API در پایان اجرا"""
+    for method, stat in sorted(bale.get_stats().items()):
+        print(f"📡 {method}: {stat['calls']} فراخوانی، {stat['errors']} خطا، "
+              f"میانگین {stat['avg_ms']}ms، بیشینه {stat['max_ms']}ms")
+
+
+def create_offset_store():
+    """وضعیت ماندگار offset برای ادامه بدون پردازش تکراری پس از ری‌استارت"""
+    return OffsetStore(
+        path=os.getenv('OFFSET_FILE', os.path.join(os.getenv('BOT_DATA_DIR', 'data'), 'polling', 'offset.json')),
+        window=int(os.getenv('DEDUPE_WINDOW', '1000'))
+    )
+
+
+def shutdown(dispatcher=None, offsets=None):
+    """پایان پردازش‌های در جریان، ارسال پیام‌های باقیمانده صف و گزارش آمار"""
+    stop_content_watcher()
+    if offsets:
+        offsets.close()
+    if dispatcher:
+        dispatcher.shutdown()
+        stats = dispatcher.get_stats()
+        print(f"🧵 Dispatcher: {stats['processed']} پردازش، {stats['failed']} خطا، "
+              f"بیشترین صف {stats['max_queued']}، {stats['blocked']} بار انتظار برای صف")
+    flush_progress()
+    callback_acks.stop()
+    outbound.stop()
+    print_api_stats()
+    ack_stats = callback_acks.stats
+    print(f"🔘 تأیید دکمه‌ها: {ack_stats['acked']} موفق، {ack_stats['failed']} خطا، "
+          f"{ack_stats['late']} دیرهنگام، {ack_stats['deadline']} بدون انتظار برای هندلر")
+
+
+def start_polling():
+    print_banner()
+
+    if not check_connection():
+        return
+
+    # آپدیت‌های کاربران مختلف موازی، آپدیت‌های هر کاربر به ترتیب
+    dispatcher = KeyedDispatcher(
+        workers=int(os.getenv('DISPATCH_WORKERS', '8')),
+        max_queue=int(os.getenv('DISPATCH_QUEUE_SIZE', '1000')),
+        max_per_key=int(os.getenv('DISPATCH_MAX_PER_USER', '64'))
+    )
+
+    print(f"🚀 ربات در حال اجرا ({dispatcher.workers} thread پردازش)...")
     print("📱 /start را در بله ارسال کنید")
 
-    last_update_id = 0
+    offsets = create_offset_store()
+    backoff = AdaptiveBackoff()
+    last_update_id = offsets.offset
 
     try:
         while True:
             try:
+                started = time.time()
                 updates = get_updates(last_update_id)
 
-                if updates.get("ok") and updates.get("result"):
-                    for update in updates["result"]:
-                        last_update_id = update["update_id"]
-
-                        # پردازش successful_payment
-                        if "message" in update and "successful_payment" in update["message"]:
-                            print(f"💰 پرداخت موفق دریافت شد")
-                            handle_successful_payment(update)
-                            continue
-
-                        if "message" in update:
-                            msg = update["message"]
-                            chat_id = msg["chat"]["id"]
-                            user_id = str(msg["from"]["id"])
-                            text = msg.get("text", "")
-                            username = msg["from"].get("username", "")
-                            first_name = msg["from"].get("first_name", "")
-
-                            handle_message(chat_id, user_id, text, username, first_name)
-
-                        elif "callback_query" in update:
-                            callback = update["callback_query"]
-                            callback_id = callback["id"]
-                            data = callback.get("data", "")
-                            chat_id = callback["message"]["chat"]["id"]
-                            user_id = str(callback["from"]["id"])
-
-                            answer_callback(callback_id)
-                            print(f"🔄 Callback: {data}")
-
-                            if data == "categories":
-                                handle_show_topics(chat_id)
-
-                            elif data.startswith("cat_"):
-                                topic_id = int(data.split("_")[1])
-                                handle_category_selection(chat_id, user_id, topic_id)
-
-                            elif data.startswith("complete_"):
-                                parts = data.split("_")
-                                topic_id = int(parts[1])
-                                day_number = int(parts[2])
-                                handle_complete_day(chat_id, user_id, topic_id, day_number)
-
-                            elif data.startswith("review_"):
-                                parts = data.split("_")
-                                topic_id = int(parts[1])
-                                day_number = int(parts[2])
-                                handle_review_day(chat_id, user_id, topic_id, day_number)
-
-                            elif data.startswith("restart_"):
-                                topic_id = int(data.split("_")[1])
-                                handle_restart_topic(chat_id, user_id, topic_id)
-
-                            elif data == "progress":
-                                handle_progress(chat_id, user_id)
-
-                            elif data.startswith("progress_"):
-                                topic_id = int(data.split("_")[1])
-                                handle_progress(chat_id, user_id, topic_id)
-
-                            elif data == "help" or data == "help_beautiful":
-                                handle_help(chat_id)
-
-                            elif data.startswith("encourage_"):
-                                topic_id = int(data.split("_")[1])
-                                handle_encourage(chat_id, topic_id)
-
-                            elif data == "contact_developer":
-                                handle_contact_developer(chat_id)
-
-                            # اضافه کردن handler برای حمایت
-                            elif data == "support_options":
-                                handle_support_options(chat_id, user_id)
-
-                            elif data == "start_using":
-                                categories_text = "🎯 <b>لطفاً یک موضوع از ۸ حوزه اصلی انتخاب کنید:</b>"
-                                markup_keyboard = create_categories_keyboard()
-                                send_message(chat_id, categories_text, markup_keyboard)
-
-                            elif data == "support_back":
-                                # بازگشت به صفحه شروع
-                                start_text = """
-🎯 <b>برای شروع کار با ربات، یکی از گزینه‌های زیر را انتخاب کنید:</b>
-
-• <b>استفاده رایگان:</b> تمام محتوای ربات به صورت کاملاً رایگان در دسترس شماست
-• <b>حمایت داوطلبانه:</b> اگر از ربات راضی هستید و می‌خواهید از توسعه‌دهنده حمایت کنید
-
-💝 <i>ربات به صورت کاملاً رایگان ارائه می‌شود. حمایت شما اختیاری و داوطلبانه است.</i>
-"""
-                                start_keyboard = create_start_keyboard()
-                                send_message(chat_id, start_text, start_keyboard)
-
-                            elif data == "support_custom":
-                                # درخواست مبلغ دلخواه
-                                message = """
-💰 <b>مبلغ دلخواه برای حمایت</b>
-
-لطفاً مبلغ مورد نظر خود را به <b>تومان</b> وارد کنید:
-
-مثال:
-• برای ۵۰,۰۰۰ تومان: <code>50000</code>
-• برای ۱۵,۰۰۰ تومان: <code>15000</code>
-• برای ۱,۰۰۰ تومان: <code>1000</code>
-
-💖 <i>هر مبلغی که مایل باشید قابل قبول است.</i>
-"""
-                                send_message(chat_id, message)
-
-                            elif data.startswith("support_"):
-                                # پردازش مبلغ‌های از پیش تعیین شده
-                                try:
-                                    amount_str = data.split("_")[1]
-                                    amount = int(amount_str)  # مبلغ به تومان
-                                    amount_rials = amount * 10  # تبدیل به ریال
-                                    send_donation_invoice(chat_id, user_id, amount_rials)
-                                except:
-                                    send_message(chat_id, "⚠️ خطا در پردازش مبلغ.")
+                if not updates.get("ok"):
+                    time.sleep(backoff.failure())
+                    continue
+
+                result = updates.get("result") or []
+                futures = []
+
+                for update in result:
+                    update_id = update["update_id"]
+                    last_update_id = max(last_update_id, update_id)
+
+                    # آپدیت تکراری (مثلاً پس از ری‌استارت) دوباره اجرا نمی‌شود
+                    if not offsets.begin(update_id):
+                        continue
+
+                    future = dispatcher.submit(get_update_key(update), process_update, update)
+                    future.add_done_callback(lambda f, uid=update_id: offsets.done(uid))
+                    futures.append(future)
 
-                time.sleep(1)
+                # ذخیره offset فقط پس از پایان پردازش کل دسته
+                if result:
+                    wait(futures)
+                    offsets.commit(last_update_id)
+
+                time.sleep(backoff.success(len(result), time.time() - started))
 
             except Exception as e:
                 print(f"⚠️ خطا در حلقه اصلی: {e}")
                 import traceback
                 traceback.print_exc()
-                time.sleep(5)
+                time.sleep(backoff.failure())
+
+    except KeyboardInterrupt:
+        print("\n👋 ربات متوقف شد")
+        shutdown(dispatcher, offsets)
+    except Exception as e:
+        print(f"\n❌ خطای بحرانی: {e}")
+
 
+def start_async_polling(max_concurrency=None):
+    """اجرای ربات با موتور asyncio (پردازش همزمان با حفظ ترتیب هر چت)"""
+    from async_engine import AsyncUpdateEngine
+
+    if max_concurrency is None:
+        max_concurrency = int(os.getenv('BOT_MAX_CONCURRENCY', '32'))
+
+    print_banner()
+
+    if not check_connection():
+        return
+
+    print(f"🚀 ربات در حال اجرا (asyncio، حداکثر {max_concurrency} پردازش همزمان)...")
+    print("📱 /start را در بله ارسال کنید")
+
+    offsets = create_offset_store()
+    engine = AsyncUpdateEngine(get_updates, process_update, max_concurrency=max_concurrency,
+                               offset_store=offsets)
+
+    try:
+        engine.run()
     except KeyboardInterrupt:
         print("\n👋 ربات متوقف شد")
+        shutdown(offsets=offsets)
     except Exception as e:
         print(f"\n❌ خطای بحرانی: {e}")
 
 
+def start_webhook(host=None, port=None):
+    """اجرای ربات در حالت webhook با همان موتور پردازش حالت asyncio"""
+    from async_engine import AsyncUpdateEngine
+    from webhook_server import create_app, get_webhook_path
+
+    webhook_url = os.getenv('WEBHOOK_URL')
+    secret_key = os.getenv('SECRET_KEY')
+    host = host or os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    port = int(port or os.getenv('WEBHOOK_PORT', '8080'))
+    max_concurrency = int(os.getenv('BOT_MAX_CONCURRENCY', '32'))
+
+    if not webhook_url:
+        print("❌ خطا: WEBHOOK_URL در فایل .env تنظیم نشده!")
+        return
+
+    print_banner()
+
+    if not check_connection():
+        return
+
+    # بله ممکن است آپدیت را دوباره به webhook بفرستد؛ پنجره تکرار مشترک است
+    offsets = create_offset_store()
+    engine = AsyncUpdateEngine(get_updates, process_update, max_concurrency=max_concurrency,
+                               offset_store=offsets)
+    engine.start_background()
+
+    if not set_webhook(webhook_url, secret_key):
+        engine.stop_background()
+        return
+
+    app = create_app(engine.submit, secret_key, get_webhook_path(webhook_url))
+
+    print(f"🚀 ربات در حالت webhook روی {host}:{port} در حال اجرا...")
+
+    try:
+        app.run(host=host, port=port, threaded=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        delete_webhook()
+        engine.stop_background()
+        print("\n👋 ربات متوقف شد")
+        shutdown(offsets=offsets)
+
+
 if __name__ == "__main__":
-    start_polling()
\ No newline at end of file
+    mode = os.getenv('BOT_MODE', 'polling')
+    if mode == 'async':
+        start_async_polling()
+    elif mode == 'webhook':
+        start_webhook()
+    elif mode == 'sharded':
+        from sharded_runner import start_sharded
+        start_sharded()
+    else:
+        start_polling()
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+polling_state.py - وضعیت ماندگار دریافت آپدیت‌ها
+
+- ذخیره offset تأییدشده پس از هر دسته (fsync دسته‌ای)
+- پنجره محدود update_id های اخیر برای جلوگیری از پردازش تکراری پس از ری‌استارت
+- سیاست مکث تطبیقی به جای time.sleep ثابت
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+
+class OffsetStore:
+    """نگهداری آخرین update_id پردازش‌شده و update_id های اخیر"""
+
+    def __init__(self, path: str = "data/polling/offset.json", window: int = 1000,
+                 fsync_every: int = 20, fsync_interval: float = 5.0):
+        """
+        Args:
+            path: مسیر فایل وضعیت
+            window: تعداد update_id های اخیر برای تشخیص تکرار
+            fsync_every: fsync پس از این تعداد commit
+            fsync_interval: یا پس از گذشت این مدت از آخرین fsync (ثانیه)
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self.offset = 0
+        self._recent = deque(maxlen=window)
+        self._recent_set = set()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.offset = int(data.get("offset", 0))
+            for update_id in data.get("recent", []):
+                self._remember(update_id)
+            print(f"📌 ادامه دریافت از آپدیت {self.offset + 1}")
+        except Exception as e:
+            print(f"⚠️ خطا در خواندن offset ذخیره‌شده: {e}")
+
+    def _remember(self, update_id):
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_set.discard(self._recent[0])
+        self._recent.append(update_id)
+        self._recent_set.add(update_id)
+
+    def begin(self, update_id) -> bool:
+        """
+        آیا این آپدیت باید پردازش شود؟
+
+        آپدیت‌های قبل از offset تأییدشده، آپدیت‌های اخیراً پردازش‌شده و
+        آپدیت‌های در حال پردازش رد می‌شوند.
+        """
+        with self._lock:
+            if update_id <= self.offset or update_id in self._recent_set or update_id in self._in_flight:
+                return False
+            self._in_flight.add(update_id)
+            return True
+
+    def done(self, update_id):
+        """اعلام پایان پردازش یک آپدیت"""
+        with self._lock:
+            self._in_flight.discard(update_id)
+            self._remember(update_id)
+
+    def commit(self, offset: int, force_sync: bool = False):
+        """ذخیره offset پس از پایان یک دسته (fsync به صورت دسته‌ای)"""
+        with self._lock:
+            self.offset = max(self.offset, offset)
+            data = {"offset": self.offset, "recent": list(self._recent), "saved_at": time.time()}
+
+            self._unsynced += 1
+            sync = (force_sync or self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval)
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(",", ":"))
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+            if sync:
+                self._unsynced = 0
+                self._last_sync = time.monotonic()
+
+    def close(self):
+        self.commit(self.offset, force_sync=True)
+
+
+class AdaptiveBackoff:
+    """محاسبه مکث بین درخواست‌های getUpdates"""
+
+    def __init__(self, base: float = 1.0, maximum: float = 60.0,
+                 idle_min: float = 0.1, idle_max: float = 1.0):
+        """
+        Args:
+            base/maximum: مکث اولیه و بیشینه پس از خطاهای متوالی (نمایی)
+            idle_min/idle_max: مکث وقتی سرور بدون long-polling پاسخ خالی می‌دهد
+        """
+        self.base = base
+        self.maximum = maximum
+        self.idle_min = idle_min
+        self.idle_max = idle_max
+        self.failures = 0
+        self.idle = 0.0
+
+    def failure(self) -> float:
+        """مکث پس از خطا: ۱، ۲، ۴، ... ثانیه با کمی نوسان تصادفی"""
+        self.failures += 1
+        delay = min(self.maximum, self.base * (2 ** (self.failures - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def success(self, count: int, elapsed: float) -> float:
+        """
+        مکث پس از پاسخ موفق
+
+        Args:
+            count: تعداد آپدیت‌های دریافتی
+            elapsed: مدت درخواست (ثانیه)
+        """
+        self.failures = 0
+
+        # دسته پر: بلافاصله دسته بعدی
+        if count:
+            self.idle = 0.0
+            return 0.0
+
+        # long-polling خودش منتظر مانده است
+        if elapsed >= 1.0:
+            return 0.0
+
+        self.idle = min(self.idle_max, max(self.idle_min, self.idle * 2))
+        return self.idle
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+progress_cache.py - کش پیشرفت کاربران در حافظه با نوشتن تأخیری (write-behind)
+
+خواندن‌ها از حافظه پاسخ داده می‌شوند؛ نوشتن‌ها فقط داده حافظه را تغییر
+می‌دهند و کاربر را «کثیف» علامت می‌زنند. یک thread پس‌زمینه کاربرانی را که
+بیش از max_dirty_age ثانیه کثیف مانده‌اند دسته‌ای روی دیسک می‌نویسد (فایل
+موقت + rename). هنگام خروج همه تغییرات باقیمانده نوشته می‌شوند.
+
+تنظیمات:
+    PROGRESS_CACHE=0               غیرفعال کردن کش
+    PROGRESS_CACHE_SIZE=10000      حداکثر کاربران در حافظه (LRU)
+    PROGRESS_FLUSH_INTERVAL=1      فاصله بررسی کاربران کثیف (ثانیه)
+    PROGRESS_MAX_DIRTY_AGE=5       حداکثر تأخیر نوشتن یک تغییر (ثانیه)
+"""
+
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class CachedProgressManager:
+    """پوشش UserProgressManager با کش LRU و نوشتن دسته‌ای"""
+
+    def __init__(self, backend, max_users: int = 10000, flush_interval: float = 1.0,
+                 max_dirty_age: float = 5.0):
+        """
+        Args:
+            backend: مدیر پیشرفت با load_user(user_id) و save_user(user_id, progress)
+            max_users: حداکثر کاربران نگه‌داشته‌شده در حافظه
+            flush_interval: فاصله بیدار شدن thread نوشتن (ثانیه)
+            max_dirty_age: تغییرات قدیمی‌تر از این در دور بعدی نوشته می‌شوند (ثانیه)
+        """
+        self.backend = backend
+        self.max_users = max_users
+        self.flush_interval = flush_interval
+        self.max_dirty_age = max_dirty_age
+
+        self._users = OrderedDict()   # user_id -> UserProgress (ترتیب: کمترین استفاده اخیر اول)
+        self._dirty = {}              # user_id -> زمان اولین تغییر نوشته‌نشده
+        self._flushing = set()        # کاربرانی که همین حالا در حال نوشتن هستند
+        self._loading = {}            # user_id -> Event (خواندن از دیسک در جریان)
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = True
+
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "flushed": 0, "evicted": 0}
+
+        self._thread = threading.Thread(target=self._flush_loop, name="progress-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------- کش ----------
+
+    @contextmanager
+    def _locked_user(self, user_id):
+        """
+        رکورد کاربر در حافظه، همراه با نگه داشتن self._lock
+
+        خواندن از دیسک بیرون از قفل انجام می‌شود تا thread های دیگر منتظر
+        فایل یک کاربر نمانند.
+        """
+        loaded = False
+        while True:
+            with self._lock:
+                progress = self._users.get(user_id)
+                if progress is not None:
+                    self._users.move_to_end(user_id)
+                    if not loaded:
+                        self.stats["hits"] += 1
+                    yield progress
+                    return
+            # ممکن است رکورد تازه‌خوانده‌شده پیش از گرفتن قفل بیرون رانده شده باشد؛
+            # کاربران فقط وقتی تمیزند بیرون رانده می‌شوند، پس خواندن دوباره امن است
+            self._load_user(user_id)
+            loaded = True
+
+    def _load_user(self, user_id):
+        """خواندن رکورد کاربر از دیسک (فقط یک thread برای هر کاربر)"""
+        with self._lock:
+            if user_id in self._users:
+                return
+            event = self._loading.get(user_id)
+            if event is None:
+                event = self._loading[user_id] = threading.Event()
+                self.stats["misses"] += 1
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            event.wait()
+            return
+
+        try:
+            progress = self.backend.load_user(user_id)
+            with self._lock:
+                self._users.setdefault(user_id, progress)
+                self._evict(keep=user_id)
+        finally:
+            with self._lock:
+                del self._loading[user_id]
+            event.set()
+
+    def _evict(self, keep=None):
+        """حذف کاربران تمیز کم‌استفاده؛ کاربران کثیف تا نوشته شدن می‌مانند"""
+        overflow = len(self._users) - self.max_users
+        if overflow <= 0:
+            return
+        for user_id in list(self._users):
+            if overflow <= 0:
+                break
+            if user_id == keep or user_id in self._dirty or user_id in self._flushing:
+                continue
+            del self._users[user_id]
+            self.stats["evicted"] += 1
+            overflow -= 1
+        if overflow > 0:
+            # همه کاربران قدیمی کثیف‌اند: نوشتن زودتر
+            self._wakeup.set()
+
+    def _mark_dirty(self, user_id):
+        self._dirty.setdefault(user_id, time.monotonic())
+        self.stats["writes"] += 1
+
+    # ---------- همان رابط UserProgressManager ----------
+
+    def get_user_progress(self, user_id):
+        """کپی رکورد کاربر (تغییر آن روی کش اثری ندارد)"""
+        with self._locked_user(str(user_id)) as progress:
+            return progress.copy()
+
+    def get_topic_progress(self, user_id, topic_id):
+        """دریافت پیشرفت یک موضوع برای کاربر"""
+        with self._locked_user(str(user_id)) as progress:
+            return progress.topic(topic_id).to_dict()
+
+    def set_topic_day(self, user_id, topic_id, day_number):
+        """تنظیم روز فعلی برای یک موضوع"""
+        user_id = str(user_id)
+        with self._locked_user(user_id) as progress:
+            day_number = progress.ensure(topic_id).set_day(day_number)
+            self._mark_dirty(user_id)
+        return day_number
+
+    def complete_day(self, user_id, topic_id, day_number):
+        """علامت‌گذاری روز به عنوان تکمیل شده"""
+        user_id = str(user_id)
+        with self._locked_user(user_id) as progress:
+            if not progress.ensure(topic_id).complete(day_number):
+                return False
+            self._mark_dirty(user_id)
+        return True
+
+    # ---------- نوشتن ----------
+
+    def flush(self, max_age: float = 0) -> int:
+        """نوشتن کاربرانی که دست‌کم max_age ثانیه کثیف بوده‌اند؛ تعداد نوشته‌شده را برمی‌گرداند"""
+        # io_lock ترتیب نوشتن‌ها را حفظ می‌کند (نسخه قدیمی‌تر بعد از جدیدتر نوشته نمی‌شود)
+        with self._io_lock:
+            now = time.monotonic()
+            with self._lock:
+                batch = []
+                for user_id, since in list(self._dirty.items()):
+                    if now - since >= max_age:
+                        batch.append((user_id, self._users[user_id].copy()))
+                        del self._dirty[user_id]
+                        self._flushing.add(user_id)
+
+            for user_id, progress in batch:
+                try:
+                    self.backend.save_user(user_id, progress)
+                except Exception as e:
+                    print(f"⚠️ خطا در ذخیره پیشرفت {user_id}: {e}")
+                    with self._lock:
+                        self._dirty.setdefault(user_id, now)
+
+            with self._lock:
+                self._flushing.clear()
+                self.stats["flushed"] += len(batch)
+                self._evict()
+
+        return len(batch)
+
+    def _flush_loop(self):
+        while self._running:
+            self._wakeup.wait(self.flush_interval)
+            urgent = self._wakeup.is_set()
+            self._wakeup.clear()
+            self.flush(0 if urgent else self.max_dirty_age)
+
+    def close(self):
+        """توقف thread نوشتن و ذخیره همه تغییرات باقیمانده"""
+        self._running = False
+        self._wakeup.set()
+        self.flush()
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+progress_layout.py - چیدمان زیرپوشه‌ای فایل‌های پیشرفت کاربران
+
+به جای یک پوشه تخت با صدها هزار فایل، فایل هر کاربر در زیرپوشه‌هایی
+بر اساس هش شناسه او قرار می‌گیرد:
+
+    fanout=256, depth=2:  data/user_progress/3f/a0/123456.json
+
+تنظیمات:
+    PROGRESS_FANOUT=256    تعداد زیرپوشه‌ها در هر سطح (۰ یعنی پوشه تخت)
+    PROGRESS_DEPTH=2       تعداد سطح‌ها
+
+اگر فایل user_progress/.layout وجود داشته باشد بر تنظیمات محیطی مقدم است.
+ابزار تغییر چیدمان در حین اجرای ربات فایل‌ها را کم‌کم جابه‌جا می‌کند؛
+در این مدت خواندن‌ها به مسیر قبلی (و مسیر تخت) برمی‌گردند:
+
+    python progress_layout.py reshard --fanout 256 --depth 2
+"""
+
+import argparse
+import json
+import os
+import time
+import zlib
+
+LAYOUT_FILE = ".layout"
+LAYOUT_CHECK_INTERVAL = 5.0
+FLAT = (0, 0)
+
+
+def shard_parts(user_id, fanout: int, depth: int) -> list:
+    """نام زیرپوشه‌های یک کاربر (پایدار بین اجراها)"""
+    if fanout <= 1 or depth <= 0:
+        return []
+    h = zlib.crc32(str(user_id).encode('utf-8'))
+    width = len(f"{fanout - 1:x}")
+    parts = []
+    for _ in range(depth):
+        parts.append(f"{h % fanout:0{width}x}")
+        h //= fanout
+    return parts
+
+
+def layout_path(progress_dir: str, user_id, layout) -> str:
+    fanout, depth = layout
+    return os.path.join(progress_dir, *shard_parts(user_id, fanout, depth), f"{user_id}.json")
+
+
+def read_layout_file(progress_dir: str):
+    """(چیدمان فعلی، چیدمان قبلی یا None) از فایل .layout؛ اگر فایل نباشد None"""
+    path = os.path.join(progress_dir, LAYOUT_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        previous = data.get("previous")
+        return (
+            (int(data.get("fanout", 0)), int(data.get("depth", 0))),
+            (int(previous["fanout"]), int(previous["depth"])) if previous else None
+        )
+    except Exception as e:
+        print(f"⚠️ خطا در خواندن {path}: {e}")
+        return None
+
+
+def write_layout_file(progress_dir: str, layout, previous=None):
+    data = {"fanout": layout[0], "depth": layout[1]}
+    if previous is not None:
+        data["previous"] = {"fanout": previous[0], "depth": previous[1]}
+    path = os.path.join(progress_dir, LAYOUT_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def iter_progress_files(progress_dir: str):
+    """(user_id, path) همه فایل‌های پیشرفت در هر چیدمانی"""
+    for root, dirs, files in os.walk(progress_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.endswith(".json") and not name.startswith("."):
+                yield name[:-len(".json")], os.path.join(root, name)
+
+
+class ProgressLayout:
+    """مسیر فایل پیشرفت هر کاربر با بازخوانی دوره‌ای .layout"""
+
+    def __init__(self, progress_dir: str):
+        self.progress_dir = progress_dir
+        self.layout = FLAT
+        self.fallbacks = []
+        self._checked_at = 0.0
+        self._mtime = None
+        self._reload()
+
+    def _reload(self):
+        path = os.path.join(self.progress_dir, LAYOUT_FILE)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime is not None and mtime == self._mtime:
+            return
+        self._mtime = mtime
+
+        stored = read_layout_file(self.progress_dir) if mtime is not None else None
+        if stored:
+            self.layout, previous = stored
+        else:
+            self.layout = (int(os.getenv('PROGRESS_FANOUT', '0')), int(os.getenv('PROGRESS_DEPTH', '0')))
+            previous = None
+
+        # مسیرهای جایگزین برای فایل‌هایی که هنوز جابه‌جا نشده‌اند
+        self.fallbacks = [layout for layout in (previous, FLAT) if layout and layout != self.layout]
+
+    def _check(self):
+        now = time.monotonic()
+        if now - self._checked_at >= LAYOUT_CHECK_INTERVAL:
+            self._checked_at = now
+            self._reload()
+
+    def write_path(self, user_id) -> str:
+        """مسیر نوشتن (چیدمان فعلی)"""
+        self._check()
+        return layout_path(self.progress_dir, user_id, self.layout)
+
+    def read_path(self, user_id) -> str:
+        """مسیر خواندن: چیدمان فعلی، وگرنه مسیر قبلی‌ای که فایل در آن هست"""
+        path = self.write_path(user_id)
+        if self.fallbacks and not os.path.exists(path):
+            for layout in self.fallbacks:
+                old_path = layout_path(self.progress_dir, user_id, layout)
+                if os.path.exists(old_path):
+                    return old_path
+        return path
+
+
+# ==================== تغییر چیدمان ====================
+
+def _move_no_clobber(source: str, target: str) -> bool:
+    """
+    جابه‌جایی بدون بازنویسی: os.link اگر مقصد وجود داشته باشد شکست می‌خورد
+
+    اگر ربات در این فاصله نسخه تازه‌تری در مسیر جدید نوشته باشد، همان
+    حفظ و فایل قدیمی حذف می‌شود.
+    """
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+        moved = True
+    except FileExistsError:
+        moved = False
+    os.remove(source)
+    return moved
+
+
+def reshard(progress_dir: str, fanout: int, depth: int, batch: int = 500,
+            pause: float = 0.05, grace: float = LAYOUT_CHECK_INTERVAL * 2) -> dict:
+    """
+    انتقال تدریجی فایل‌ها به چیدمان جدید در حین اجرای ربات
+
+    ۱. ثبت چیدمان جدید (با چیدمان قبلی برای خواندن جایگزین) در .layout
+    ۲. صبر تا همه پردازه‌های ربات چیدمان جدید را ببینند (grace)
+    ۳. جابه‌جایی دسته‌ای فایل‌ها با مکث کوتاه بین دسته‌ها
+    ۴. حذف چیدمان قبلی از .layout
+    """
+    target = (fanout, depth)
+    current = ProgressLayout(progress_dir).layout
+    if current == target:
+        print("✅ چیدمان فعلی همان چیدمان درخواستی است")
+
+    write_layout_file(progress_dir, target, previous=current if current != target else None)
+    if current != target and grace > 0:
+        print(f"⏳ {grace:g} ثانیه صبر برای اعمال چیدمان جدید در ربات...")
+        time.sleep(grace)
+
+    stats = {"moved": 0, "skipped": 0, "kept_newer": 0}
+    pending = 0
+    for user_id, path in list(iter_progress_files(progress_dir)):
+        new_path = layout_path(progress_dir, user_id, target)
+        if os.path.abspath(path) == os.path.abspath(new_path):
+            stats["skipped"] += 1
+            continue
+
+        if _move_no_clobber(path, new_path):
+            stats["moved"] += 1
+        else:
+            stats["kept_newer"] += 1
+
+        pending += 1
+        if pending >= batch:
+            pending = 0
+            print(f"   {stats['moved']} فایل منتقل شد...")
+            time.sleep(pause)
+
+    _remove_empty_dirs(progress_dir)
+    write_layout_file(progress_dir, target)
+    return stats
+
+
+def _remove_empty_dirs(progress_dir: str):
+    for root, dirs, files in os.walk(progress_dir, topdown=False):
+        if root != progress_dir and not os.listdir(root):
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="تغییر چیدمان پوشه پیشرفت کاربران")
+    parser.add_argument("command", choices=["reshard"])
+    parser.add_argument("--dir", default=os.path.join(os.getenv('BOT_DATA_DIR', 'data'), "user_progress"))
+    parser.add_argument("--fanout", type=int, default=256)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--grace", type=float, default=LAYOUT_CHECK_INTERVAL * 2,
+                        help="صبر پس از ثبت چیدمان جدید (ثانیه)")
+    args = parser.parse_args()
+
+    print(f"🔄 تغییر چیدمان {args.dir} به fanout={args.fanout}, depth={args.depth}")
+    result = reshard(args.dir, args.fanout, args.depth, batch=args.batch, grace=args.grace)
+    print(f"✅ {result['moved']} منتقل، {result['skipped']} بدون تغییر، "
+          f"{result['kept_newer']} نسخه جدیدتر حفظ شد")
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+progress_record.py - رکورد فشرده پیشرفت کاربر
+
+پیشرفت هر موضوع در سه عدد خلاصه می‌شود: روز فعلی (۱ تا ۲۸)، پرچم شروع
+و بیت‌مَسک ۲۸ بیتی روزهای تکمیل‌شده (بیت d-1 یعنی روز d تکمیل شده).
+
+قالب‌ها:
+    JSON فشرده:   {"1": [current_day, completed_mask, started]}
+    JSON قدیمی:   {"1": {"current_day": 5, "started": true, "completed_days": [1, 2]}}
+    باینری:       برای هر موضوع ۵ بایت '<IB' (مَسک + بیت شروع در بیت ۳۱، روز فعلی)؛
+                  UserProgress.pack همه ۸ موضوع را در ۴۰ بایت می‌نویسد
+"""
+
+import struct
+
+MAX_DAY = 28
+STARTED_BIT = 1 << 31
+DAYS_MASK = (1 << MAX_DAY) - 1
+
+# شناسه موضوعات loader.TOPICS (ترتیب قالب باینری)
+TOPIC_IDS = (1, 2, 3, 4, 5, 6, 7, 8)
+
+TOPIC_STRUCT = struct.Struct('<IB')
+USER_STRUCT = struct.Struct('<' + 'IB' * len(TOPIC_IDS))
+
+
+def days_to_mask(days) -> int:
+    """تبدیل لیست روزها (۱ تا ۲۸) به بیت‌مَسک"""
+    mask = 0
+    for day in days:
+        day = int(day)
+        if 1 <= day <= MAX_DAY:
+            mask |= 1 << (day - 1)
+    return mask
+
+
+def mask_to_days(mask: int) -> list:
+    """تبدیل بیت‌مَسک به لیست مرتب روزها"""
+    return [day for day in range(1, MAX_DAY + 1) if mask & (1 << (day - 1))]
+
+
+class TopicProgress:
+    """پیشرفت یک موضوع"""
+
+    __slots__ = ("current_day", "started", "completed_mask")
+
+    def __init__(self, current_day: int = 1, started: bool = False, completed_mask: int = 0):
+        self.current_day = current_day
+        self.started = started
+        self.completed_mask = completed_mask
+
+    def is_completed(self, day_number: int) -> bool:
+        return 1 <= day_number <= MAX_DAY and bool(self.completed_mask & (1 << (day_number - 1)))
+
+    @property
+    def completed_days(self) -> list:
+        return mask_to_days(self.completed_mask)
+
+    @property
+    def completed_count(self) -> int:
+        return self.completed_mask.bit_count()
+
+    def set_day(self, day_number: int) -> int:
+        """تنظیم روز فعلی (محدود به ۱-۲۸) و علامت شروع"""
+        self.current_day = max(1, min(MAX_DAY, day_number))
+        self.started = True
+        return self.current_day
+
+    def complete(self, day_number: int) -> bool:
+        """تکمیل یک روز؛ اگر قبلاً تکمیل شده باشد False"""
+        if not 1 <= day_number <= MAX_DAY or self.is_completed(day_number):
+            return False
+        self.completed_mask |= 1 << (day_number - 1)
+        self.current_day = min(day_number + 1, MAX_DAY)
+        return True
+
+    def copy(self):
+        return TopicProgress(self.current_day, self.started, self.completed_mask)
+
+    # ---------- تبدیل قالب ----------
+
+    def to_dict(self) -> dict:
+        """قالب قدیمی (برای کدهایی که دیکشنری انتظار دارند)"""
+        return {
+            "current_day": self.current_day,
+            "started": self.started,
+            "completed_days": self.completed_days
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            max(1, min(MAX_DAY, int(data.get("current_day", 1)))),
+            bool(data.get("started", False)),
+            days_to_mask(data.get("completed_days", []))
+        )
+
+    def to_list(self) -> list:
+        return [self.current_day, self.completed_mask, 1 if self.started else 0]
+
+    @classmethod
+    def from_json(cls, value):
+        """خواندن هر دو قالب JSON فشرده و قدیمی"""
+        if isinstance(value, dict):
+            return cls.from_dict(value)
+        current_day, mask, started = value
+        return cls(current_day, bool(started), mask & DAYS_MASK)
+
+    def pack(self) -> bytes:
+        return TOPIC_STRUCT.pack(self.completed_mask | (STARTED_BIT if self.started else 0), self.current_day)
+
+    @classmethod
+    def unpack(cls, raw: bytes):
+        mask, current_day = TOPIC_STRUCT.unpack(raw)
+        return cls(current_day, bool(mask & STARTED_BIT), mask & DAYS_MASK)
+
+    def __eq__(self, other):
+        return (isinstance(other, TopicProgress) and self.current_day == other.current_day
+                and self.started == other.started and self.completed_mask == other.completed_mask)
+
+    def __repr__(self):
+        return f"TopicProgress(day={self.current_day}, started={self.started}, completed={self.completed_days})"
+
+
+class UserProgress:
+    """پیشرفت یک کاربر در همه موضوعات"""
+
+    __slots__ = ("topics",)
+
+    def __init__(self, topics: dict = None):
+        self.topics = topics or {}   # topic_id (int) -> TopicProgress
+
+    def topic(self, topic_id) -> TopicProgress:
+        """پیشرفت یک موضوع (اگر شروع نشده، رکورد پیش‌فرض جدا از کاربر)"""
+        return self.topics.get(int(topic_id)) or TopicProgress()
+
+    def ensure(self, topic_id) -> TopicProgress:
+        """رکورد قابل تغییر یک موضوع (در صورت نبود ساخته می‌شود)"""
+        topic_id = int(topic_id)
+        record = self.topics.get(topic_id)
+        if record is None:
+            record = self.topics[topic_id] = TopicProgress()
+        return record
+
+    def copy(self):
+        return UserProgress({topic_id: record.copy() for topic_id, record in self.topics.items()})
+
+    # ---------- تبدیل قالب ----------
+
+    def to_json(self) -> dict:
+        return {str(topic_id): record.to_list() for topic_id, record in sorted(self.topics.items())}
+
+    @classmethod
+    def from_json(cls, data: dict):
+        topics = {}
+        for topic_key, value in data.items():
+            try:
+                topics[int(topic_key)] = TopicProgress.from_json(value)
+            except (TypeError, ValueError):
+                continue
+        return cls(topics)
+
+    def pack(self) -> bytes:
+        """۴۰ بایت: ۵ بایت برای هر موضوع به ترتیب TOPIC_IDS (روز ۰ یعنی شروع نشده)"""
+        values = []
+        for topic_id in TOPIC_IDS:
+            record = self.topics.get(topic_id)
+            if record is None:
+                values += (0, 0)
+            else:
+                values += (record.completed_mask | (STARTED_BIT if record.started else 0), record.current_day)
+        return USER_STRUCT.pack(*values)
+
+    @classmethod
+    def unpack(cls, raw: bytes):
+        values = USER_STRUCT.unpack(raw)
+        topics = {}
+        for index, topic_id in enumerate(TOPIC_IDS):
+            mask, current_day = values[index * 2], values[index * 2 + 1]
+            if current_day:
+                topics[topic_id] = TopicProgress(current_day, bool(mask & STARTED_BIT), mask & DAYS_MASK)
+        return cls(topics)
+
+    def __eq__(self, other):
+        return isinstance(other, UserProgress) and self.topics == other.topics
+
+    def __repr__(self):
+        return f"UserProgress({self.topics})"
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+render_cache.py - کش پیام‌های آماده صفحه روز
+
+متن صفحه هر روز فقط به (موضوع، روز، نوع نمایش، تکمیل شده یا نه) بستگی
+دارد، پس یک بار ساخته و برای همه کاربران استفاده می‌شود. با رسیدن اولین
+درخواست از نسخه جدید محتوا (content_version) کش خالی می‌شود. انواع نمایش:
+
+    today      صفحه روز در handle_category_selection
+    review     بازخوانی روز تکمیل‌شده در handle_review_day
+    graphics   GraphicsHandler.create_beautiful_message
+
+تنظیمات:
+    RENDER_CACHE_SIZE=2048     حداکثر پیام‌های نگه‌داشته‌شده (LRU)
+    RENDER_CACHE_WARM=0        ساخت همه صفحه‌های today هنگام شروع ربات
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """کش LRU محدود برای متن‌های رندرشده"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stale": 0}
+
+    def get(self, topic_id, day_number, variant: str, completed: bool, render, version: int = 0):
+        """
+        متن رندرشده؛ در صورت نبودن در کش render() یک بار صدا زده می‌شود
+
+        Args:
+            render: تابع بدون آرگومان که متن پیام را می‌سازد
+            version: content_version محتوایی که render از آن استفاده می‌کند
+        """
+        key = (topic_id, day_number, variant, bool(completed))
+        with self._lock:
+            if version > self.version:
+                # اولین درخواست از نسخه جدید محتوا
+                self._entries.clear()
+                self.version = version
+                self.stats["invalidations"] += 1
+            elif version < self.version:
+                # درخواستی که پیش از جایگزینی محتوا شروع شده؛ در کش ذخیره نمی‌شود
+                self.stats["stale"] += 1
+                return render()
+
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return text
+            self.stats["misses"] += 1
+
+        # ساخت بیرون از قفل؛ دو thread همزمان در بدترین حالت متن یکسانی می‌سازند
+        text = render()
+
+        with self._lock:
+            if version != self.version:
+                return text
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return text
+
+    def invalidate(self):
+        """حذف همه پیام‌ها (پس از تغییر محتوا)"""
+        with self._lock:
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, **self.stats}
+
+
+# نمونه جهانی
+render_cache = RenderCache(int(os.getenv('RENDER_CACHE_SIZE', '2048')))
\ No newline at end of file
@@ -0,0 +1,411 @@
+"""
+sharded_runner.py - اجرای چندپردازه‌ای ربات
+
+یک پردازه getUpdates را می‌خواند و هر آپدیت را بر اساس شناسه فرستنده
+به یکی از N پردازه کارگر می‌فرستد. هر کارگر هندلرهای معمول ربات را روی
+بخش مخصوص خود از داده‌ها (data/shard_i) اجرا می‌کند؛ بنابراین داده هر
+کاربر فقط یک نویسنده دارد و قفل بین پردازه‌ای لازم نیست.
+
+هر کارگر ایندکس محتوای خود را می‌سازد و با CONTENT_RELOAD=1 تغییرات
+فایل‌های محتوا را جداگانه بررسی می‌کند؛ دریافت‌کننده محتوا بارگذاری نمی‌کند.
+
+تعداد کارگرها در data/shards.json ثبت می‌شود؛ با تعداد متفاوت، ربات
+اجرا نمی‌شود چون کاربران به پوشه‌ای بدون داده‌های خود می‌رسیدند.
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import threading
+import time
+import zlib
+from multiprocessing.connection import wait
+
+from log_store import read_log_store
+from progress_layout import iter_progress_files
+
+
+def get_shard(user_key: str, shards: int) -> int:
+    """شماره پردازه مسئول یک کاربر (پایدار بین اجراها)"""
+    try:
+        return int(user_key) % shards
+    except ValueError:
+        return zlib.crc32(user_key.encode('utf-8')) % shards
+
+
+def get_shard_dir(data_root: str, index: int) -> str:
+    return os.path.join(data_root, f"shard_{index}")
+
+
+SHARD_MARKER = "shards.json"
+
+
+def read_shard_count(data_root: str):
+    """
+    تعداد کارگرهای ثبت‌شده برای این پوشه داده (None اگر ثبت نشده باشد)
+
+    Raises:
+        ValueError: فایل ناقص یا دست‌کاری‌شده است؛ تقسیم دوباره بی‌صدا انجام نمی‌شود
+    """
+    path = os.path.join(data_root, SHARD_MARKER)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            shards = int(json.load(f)["shards"])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        error = f"{type(e).__name__}: {e}"
+    else:
+        if shards >= 1:
+            return shards
+        error = f"shards={shards}"
+
+    found = count_shard_dirs(data_root)
+    pinned = f"پوشه‌های موجود برای {found} کارگر هستند" if found else "پوشه shard_* یافت نشد"
+    raise ValueError(f"فایل {path} معتبر نیست ({error})؛ {pinned}. "
+                     f"آن را با {{\"shards\": N}} اصلاح کنید")
+
+
+def write_shard_count(data_root: str, shards: int):
+    os.makedirs(data_root, exist_ok=True)
+    path = os.path.join(data_root, SHARD_MARKER)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({"shards": shards, "created_at": time.time()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
+
+
+def count_shard_dirs(data_root: str) -> int:
+    """تعداد پوشه‌های shard_i موجود (برای داده‌های پیش از ثبت تعداد)"""
+    count = 0
+    while os.path.isdir(get_shard_dir(data_root, count)):
+        count += 1
+    return count
+
+
+class WorkerRestartError(RuntimeError):
+    """کارگرها بیش از حد مجاز متوقف شده‌اند؛ ربات باید متوقف شود"""
+
+
+# ==================== پردازه کارگر ====================
+
+def worker_main(index, shards, data_root, inbox, events):
+    """
+    حلقه یک پردازه کارگر (در مفسر جدید با spawn اجرا می‌شود)
+
+    پیش از اجرای هندلر هر آپدیت ("start", update_id) و پس از آن
+    ("done", update_id) روی events فرستاده می‌شود. ارسال روی Pipe همزمان
+    است، پس اگر کارگر وسط هندلر از کار بیفتد پردازه اصلی می‌داند کدام
+    آپدیت‌ها شروع شده بودند و آن‌ها را دوباره اجرا نمی‌کند.
+    """
+    # Ctrl+C توسط پردازه اصلی مدیریت می‌شود
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # مسیر داده و سهم نرخ ارسال باید پیش از import ربات تنظیم شوند
+    os.environ['BOT_DATA_DIR'] = get_shard_dir(data_root, index)
+    global_rate = float(os.getenv('BALE_GLOBAL_RATE', '30'))
+    os.environ['BALE_GLOBAL_RATE'] = str(global_rate / shards)
+
+    import polling_bot
+    from dispatcher import KeyedDispatcher, get_update_key
+
+    # محتوا و بررسی تغییرات آن در همین پردازه لازم است، نه در دریافت‌کننده
+    polling_bot.prepare_content()
+
+    dispatcher = KeyedDispatcher(workers=int(os.getenv('DISPATCH_WORKERS', '8')))
+    events_lock = threading.Lock()
+    print(f"🧩 کارگر {index} آماده است ({os.environ['BOT_DATA_DIR']})")
+
+    def report(kind, update_id):
+        with events_lock:
+            events.send((kind, update_id))
+
+    def process(update):
+        report("start", update["update_id"])
+        polling_bot.process_update(update)
+
+    try:
+        while True:
+            update = inbox.get()
+            if update is None:
+                break
+
+            future = dispatcher.submit(get_update_key(update), process, update)
+            future.add_done_callback(lambda f, uid=update["update_id"]: report("done", uid))
+    finally:
+        # توقف بررسی تغییرات محتوا و ارسال پیام‌های باقیمانده این کارگر
+        polling_bot.shutdown(dispatcher)
+
+
+# ==================== تقسیم داده‌های موجود ====================
+
+def _split_keyed_file(source_file, target_dirs, relative_path, shards):
+    """تقسیم فایل‌های JSON با کلید user_topic بین پوشه‌های کارگرها"""
+    if not os.path.exists(source_file) and not os.path.exists(f"{source_file}.log"):
+        return
+
+    # فایل‌های TimeManager ممکن است تغییرات ثبت‌نشده در snapshot را در لاگ داشته باشند
+    data = read_log_store(source_file)
+
+    parts = [{} for _ in range(shards)]
+    for user_key, value in data.items():
+        user_id = user_key.rsplit("_", 1)[0]
+        parts[get_shard(user_id, shards)][user_key] = value
+
+    for target_dir, part in zip(target_dirs, parts):
+        target_file = os.path.join(target_dir, relative_path)
+        os.makedirs(os.path.dirname(target_file), exist_ok=True)
+        with open(target_file, 'w', encoding='utf-8') as f:
+            json.dump(part, f, ensure_ascii=False, indent=2)
+
+
+def partition_existing_data(data_root: str, shards: int):
+    """
+    کپی داده‌های حالت تک‌پردازه‌ای در پوشه‌های کارگرها (فقط بار اول)
+
+    فایل‌های اصلی دست نمی‌خورند تا بازگشت به حالت عادی ممکن باشد.
+    """
+    target_dirs = [get_shard_dir(data_root, i) for i in range(shards)]
+    if any(os.path.exists(d) for d in target_dirs):
+        return False
+
+    print(f"📦 تقسیم داده‌های موجود بین {shards} کارگر...")
+
+    # فایل‌ها در پوشه کارگر به صورت تخت کپی می‌شوند؛ خواندن از مسیر تخت همیشه پشتیبانی می‌شود
+    progress_dir = os.path.join(data_root, "user_progress")
+    if os.path.isdir(progress_dir):
+        for user_id, path in iter_progress_files(progress_dir):
+            target = os.path.join(target_dirs[get_shard(user_id, shards)], "user_progress")
+            os.makedirs(target, exist_ok=True)
+            shutil.copy2(path, os.path.join(target, f"{user_id}.json"))
+
+    # رکوردهای یکپارچه (STORAGE_BACKEND=user) همراه با نشانه انتقال
+    users_dir = os.path.join(data_root, "users")
+    if os.path.isdir(users_dir):
+        for target_dir in target_dirs:
+            os.makedirs(os.path.join(target_dir, "users"), exist_ok=True)
+        for name in os.listdir(users_dir):
+            if name.endswith(".json"):
+                target = os.path.join(target_dirs[get_shard(name[:-5], shards)], "users")
+                shutil.copy2(os.path.join(users_dir, name), os.path.join(target, name))
+            elif name == ".migrated":
+                for target_dir in target_dirs:
+                    shutil.copy2(os.path.join(users_dir, name), os.path.join(target_dir, "users", name))
+
+    _split_keyed_file(os.path.join(data_root, "daily_reset", "user_access.json"),
+                      target_dirs, os.path.join("daily_reset", "user_access.json"), shards)
+    _split_keyed_file(os.path.join(data_root, "user_next_day_times.json"),
+                      target_dirs, "user_next_day_times.json", shards)
+    _split_keyed_file(os.path.join(data_root, "daily_locks.json"),
+                      target_dirs, "daily_locks.json", shards)
+
+    for target_dir in target_dirs:
+        os.makedirs(target_dir, exist_ok=True)
+    return True
+
+
+# ==================== پردازه دریافت‌کننده ====================
+
+class ShardedRunner:
+    """دریافت آپدیت‌ها و توزیع آن‌ها بین پردازه‌های کارگر"""
+
+    def __init__(self, shards: int, data_root: str = "data"):
+        self.shards = shards
+        self.data_root = data_root
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes = [None] * shards
+        self._events = [None] * shards
+        self._workers = [None] * shards
+        self._outstanding = [dict() for _ in range(shards)]   # update_id -> update
+        self._started = [set() for _ in range(shards)]        # update_id های شروع‌شده
+        self._restarts = 0
+        self.max_restarts = 10
+        self.parked_path = os.path.join(data_root, "parked_updates.jsonl")
+
+    def _start_worker(self, index):
+        inbox = self._context.Queue()
+        reader, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, self.shards, self.data_root, inbox, writer),
+            name=f"bot-shard-{index}",
+            daemon=True
+        )
+        process.start()
+        writer.close()
+        self._inboxes[index] = inbox
+        self._events[index] = reader
+        self._workers[index] = process
+
+    def check_shard_count(self) -> bool:
+        """
+        بررسی یکسان بودن تعداد کارگرها با تعداد ثبت‌شده برای داده‌ها
+
+        با تعداد متفاوت get_shard کاربران را به پوشه‌هایی می‌فرستد که
+        پیشرفت، زمان‌بندی و قفل‌های آن‌ها را ندارند.
+        """
+        try:
+            stored = read_shard_count(self.data_root) or count_shard_dirs(self.data_root)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        if stored and stored != self.shards:
+            print(f"❌ داده‌های {self.data_root} برای {stored} کارگر تقسیم شده‌اند، نه {self.shards}")
+            print(f"   BOT_WORKERS={stored} را تنظیم کنید یا پوشه‌های shard_* را دوباره تقسیم کنید")
+            return False
+        return True
+
+    def start(self) -> bool:
+        if not self.check_shard_count():
+            return False
+        partition_existing_data(self.data_root, self.shards)
+        if read_shard_count(self.data_root) is None:
+            write_shard_count(self.data_root, self.shards)
+        for index in range(self.shards):
+            self._start_worker(index)
+        return True
+
+    def route(self, update):
+        from dispatcher import get_update_key
+
+        index = get_shard(get_update_key(update), self.shards)
+        self._outstanding[index][update["update_id"]] = update
+        self._inboxes[index].put(update)
+
+    def _read_events(self, index, offsets):
+        """خواندن همه پیام‌های رسیده از یک کارگر (تا پایان Pipe اگر کارگر مرده باشد)"""
+        reader = self._events[index]
+        while reader.poll():
+            try:
+                kind, update_id = reader.recv()
+            except EOFError:
+                break
+
+            if kind == "start":
+                self._started[index].add(update_id)
+            elif self._outstanding[index].pop(update_id, None) is not None:
+                self._started[index].discard(update_id)
+                offsets.done(update_id)
+
+    def _park(self, update, offsets):
+        """کنار گذاشتن آپدیتی که کارگر هنگام پردازش آن از کار افتاد"""
+        print(f"⚠️ آپدیت {update['update_id']} هنگام پردازش کارگر را متوقف کرد؛ دوباره اجرا نمی‌شود")
+        try:
+            with open(self.parked_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"parked_at": time.time(), "update": update}, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"⚠️ خطا در ذخیره آپدیت کنارگذاشته: {e}")
+        offsets.done(update["update_id"])
+
+    def _restart_dead_workers(self, offsets):
+        for index, process in enumerate(self._workers):
+            if process.is_alive():
+                continue
+
+            # پیام‌هایی که کارگر پیش از توقف فرستاده است
+            self._read_events(index, offsets)
+            self._events[index].close()
+
+            self._restarts += 1
+            if self._restarts > self.max_restarts:
+                raise WorkerRestartError(f"کارگرها بیش از {self.max_restarts} بار متوقف شدند")
+            print(f"⚠️ کارگر {index} متوقف شد (کد {process.exitcode})؛ اجرای دوباره")
+
+            # آپدیت‌های شروع‌شده ممکن است بخشی از اثرشان را گذاشته باشند
+            # (تکمیل روز، پرداخت)؛ فقط آپدیت‌های شروع‌نشده دوباره فرستاده می‌شوند
+            outstanding = self._outstanding[index]
+            for update_id in self._started[index]:
+                update = outstanding.pop(update_id, None)
+                if update is not None:
+                    self._park(update, offsets)
+            self._started[index].clear()
+
+            self._start_worker(index)
+            for update in outstanding.values():
+                self._inboxes[index].put(update)
+
+    def wait_batch(self, offsets):
+        """صبر تا پردازش همه آپدیت‌های ارسال‌شده"""
+        while any(self._outstanding):
+            ready = wait(self._events, timeout=1)
+            for index, reader in enumerate(self._events):
+                if reader in ready:
+                    self._read_events(index, offsets)
+            if not ready or any(not process.is_alive() for process in self._workers):
+                self._restart_dead_workers(offsets)
+
+    def stop(self, timeout: float = 30):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._workers:
+            process.join(timeout)
+
+
+def start_sharded(shards: int = None):
+    """اجرای ربات با یک دریافت‌کننده و چند پردازه کارگر"""
+    import polling_bot
+    from polling_state import AdaptiveBackoff
+
+    data_root = os.getenv('BOT_DATA_DIR', 'data')
+    # بدون BOT_WORKERS همان تعداد ثبت‌شده برای داده‌ها استفاده می‌شود، نه تعداد CPU میزبان
+    try:
+        shards = shards or int(os.getenv('BOT_WORKERS') or read_shard_count(data_root) or os.cpu_count() or 2)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    polling_bot.print_banner()
+
+    if not polling_bot.check_connection(load_content=False):
+        return
+
+    runner = ShardedRunner(shards, data_root)
+    if not runner.start():
+        return
+
+    offsets = polling_bot.create_offset_store()
+    backoff = AdaptiveBackoff()
+    last_update_id = offsets.offset
+
+    print(f"🚀 ربات در حال اجرا ({shards} پردازه کارگر)...")
+
+    try:
+        while True:
+            try:
+                started = time.time()
+                updates = polling_bot.get_updates(last_update_id)
+
+                if not updates.get("ok"):
+                    time.sleep(backoff.failure())
+                    continue
+
+                result = updates.get("result") or []
+                for update in result:
+                    last_update_id = max(last_update_id, update["update_id"])
+                    if offsets.begin(update["update_id"]):
+                        runner.route(update)
+
+                # ذخیره offset فقط پس از پایان پردازش کل دسته در همه کارگرها
+                if result:
+                    runner.wait_batch(offsets)
+                    offsets.commit(last_update_id)
+
+                time.sleep(backoff.success(len(result), time.time() - started))
+
+            except WorkerRestartError:
+                raise
+            except Exception as e:
+                print(f"⚠️ خطا در حلقه اصلی: {e}")
+                time.sleep(backoff.failure())
+
+    except KeyboardInterrupt:
+        print("\n👋 ربات متوقف شد")
+    except WorkerRestartError as e:
+        print(f"❌ ربات متوقف شد: {e}")
+        raise
+    finally:
+        runner.stop()
+        offsets.close()
\ No newline at end of file
@@ -0,0 +1,406 @@
+"""
+sqlite_store.py - ذخیره پیشرفت و دسترسی روزانه کاربران در SQLite
+
+جایگزین فایل JSON جداگانه برای هر کاربر: یک ردیف برای هر (کاربر، موضوع)،
+روزهای تکمیل‌شده به صورت بیت‌مَسک در یک ستون عدد صحیح. متدها همان
+امضای UserProgressManager را دارند تا بدون تغییر هندلرها جایگزین شوند.
+
+    STORAGE_BACKEND=sqlite
+    DATABASE_PATH=./data/bot_data.db
+
+رکوردهای دسترسی روزانه (DailyResetManager) و زمان‌ها و قفل‌های TimeManager
+هم در همین پایگاه داده نگهداری می‌شوند (دسترسی با ایندکس روی next_reset_at).
+
+بار اول، داده‌های json هر بخشی که جدولش در پایگاه خالی است خودکار منتقل
+می‌شوند (import_legacy_data). انتقال دستی:
+
+    python sqlite_store.py migrate data/user_progress data/bot_data.db
+    python sqlite_store.py migrate-access data/daily_reset/user_access.json data/bot_data.db
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from log_store import read_log_store
+from progress_layout import iter_progress_files
+from progress_record import MAX_DAY, TopicProgress, UserProgress
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topic_progress (
+    user_id TEXT NOT NULL,
+    topic_id INTEGER NOT NULL,
+    current_day INTEGER NOT NULL DEFAULT 1,
+    started INTEGER NOT NULL DEFAULT 0,
+    completed_mask INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, topic_id)
+) WITHOUT ROWID
+"""
+
+ACCESS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS access_records (
+    user_id TEXT NOT NULL,
+    topic_id INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    last_day INTEGER NOT NULL,
+    next_reset_at REAL NOT NULL,
+    PRIMARY KEY (user_id, topic_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_access_next_reset ON access_records (next_reset_at);
+"""
+
+KEYED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keyed_values (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+# دستورها ثابت‌اند تا sqlite3 آن‌ها را در کش statement نگه دارد
+SELECT_PROGRESS = "SELECT current_day, started, completed_mask FROM topic_progress WHERE user_id = ? AND topic_id = ?"
+
+SELECT_USER_PROGRESS = "SELECT topic_id, current_day, started, completed_mask FROM topic_progress WHERE user_id = ?"
+
+UPSERT_DAY = """
+INSERT INTO topic_progress (user_id, topic_id, current_day, started) VALUES (?, ?, ?, 1)
+ON CONFLICT (user_id, topic_id) DO UPDATE SET current_day = excluded.current_day, started = 1
+"""
+
+# فقط وقتی روز قبلاً تکمیل نشده باشد تغییر می‌کند (rowcount == 0 یعنی تکراری)
+UPSERT_COMPLETE = """
+INSERT INTO topic_progress (user_id, topic_id, current_day, started, completed_mask) VALUES (?, ?, ?, 0, ?)
+ON CONFLICT (user_id, topic_id) DO UPDATE SET
+    completed_mask = completed_mask | excluded.completed_mask,
+    current_day = excluded.current_day
+WHERE (completed_mask & excluded.completed_mask) = 0
+"""
+
+SELECT_ACCESS = "SELECT last_access, last_day, next_reset_at FROM access_records WHERE user_id = ? AND topic_id = ?"
+
+UPSERT_ACCESS = """
+INSERT INTO access_records (user_id, topic_id, last_access, last_day, next_reset_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (user_id, topic_id) DO UPDATE SET
+    last_access = excluded.last_access,
+    last_day = excluded.last_day,
+    next_reset_at = excluded.next_reset_at
+"""
+
+DELETE_ACCESS = "DELETE FROM access_records WHERE user_id = ? AND topic_id = ?"
+
+SELECT_ELIGIBLE = "SELECT user_id, topic_id FROM access_records WHERE next_reset_at >= ? AND next_reset_at < ? ORDER BY next_reset_at"
+
+SELECT_KEYED = "SELECT value FROM keyed_values WHERE namespace = ? AND key = ?"
+
+UPSERT_KEYED = """
+INSERT INTO keyed_values (namespace, key, value) VALUES (?, ?, ?)
+ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value
+"""
+
+DELETE_KEYED = "DELETE FROM keyed_values WHERE namespace = ? AND key = ?"
+
+IMPORTED_MARKER = ".imported"
+
+# فایل‌های LogStore داده‌های TimeManager -> namespace
+KEYED_FILES = {
+    "next_day": "user_next_day_times.json",
+    "locks": "daily_locks.json"
+}
+
+INSERT_MIGRATED = """
+INSERT OR REPLACE INTO topic_progress (user_id, topic_id, current_day, started, completed_mask)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def get_database_path() -> str:
+    return os.getenv('DATABASE_PATH', os.path.join(os.getenv('BOT_DATA_DIR', 'data'), "bot_data.db"))
+
+
+class SQLiteDatabase:
+    """اتصال SQLite با حالت WAL و یک اتصال برای هر thread"""
+
+    schema = SCHEMA
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or get_database_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.executescript(self.schema)
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=32)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """بستن اتصال thread فعلی"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SQLiteProgressManager(SQLiteDatabase):
+    """مدیریت پیشرفت کاربران روی SQLite"""
+
+    def get_user_progress(self, user_id) -> UserProgress:
+        """پیشرفت کاربر در همه موضوعات با یک پرس‌وجو"""
+        rows = self._connect().execute(SELECT_USER_PROGRESS, (str(user_id),))
+        return UserProgress({
+            topic_id: TopicProgress(current_day, bool(started), mask)
+            for topic_id, current_day, started, mask in rows
+        })
+
+    def get_topic_progress(self, user_id, topic_id):
+        """دریافت پیشرفت یک موضوع برای کاربر"""
+        row = self._connect().execute(SELECT_PROGRESS, (str(user_id), int(topic_id))).fetchone()
+        if row is None:
+            # پیش‌فرض: هر موضوع از روز ۱ شروع می‌شود
+            return TopicProgress().to_dict()
+
+        current_day, started, mask = row
+        return TopicProgress(current_day, bool(started), mask).to_dict()
+
+    def set_topic_day(self, user_id, topic_id, day_number):
+        """تنظیم روز فعلی برای یک موضوع"""
+        day_number = max(1, min(MAX_DAY, day_number))  # محدود به ۱-۲۸
+
+        conn = self._connect()
+        with conn:
+            conn.execute(UPSERT_DAY, (str(user_id), int(topic_id), day_number))
+        return day_number
+
+    def complete_day(self, user_id, topic_id, day_number):
+        """علامت‌گذاری روز به عنوان تکمیل شده"""
+        if not 1 <= day_number <= MAX_DAY:
+            return False
+
+        next_day = min(day_number + 1, MAX_DAY)
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(UPSERT_COMPLETE, (str(user_id), int(topic_id), next_day, 1 << (day_number - 1)))
+        return cursor.rowcount > 0
+
+
+class SQLiteAccessStore(SQLiteDatabase):
+    """رکوردهای دسترسی روزانه با کلید (user_id, topic_id) و ایندکس next_reset_at"""
+
+    schema = ACCESS_SCHEMA
+
+    def get(self, user_id, topic_id):
+        row = self._connect().execute(SELECT_ACCESS, (str(user_id), int(topic_id))).fetchone()
+        if row is None:
+            return None
+
+        last_access, last_day, next_reset_at = row
+        return {
+            "last_access": last_access,
+            "last_day": last_day,
+            "last_access_human": datetime.fromtimestamp(last_access).strftime("%Y-%m-%d %H:%M:%S"),
+            "next_reset_at": next_reset_at,
+            "next_reset_human": datetime.fromtimestamp(next_reset_at).strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def put(self, user_id, topic_id, record):
+        conn = self._connect()
+        with conn:
+            conn.execute(UPSERT_ACCESS, (
+                str(user_id), int(topic_id),
+                record["last_access"], record["last_day"], record["next_reset_at"]
+            ))
+
+    def delete(self, user_id, topic_id):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(DELETE_ACCESS, (str(user_id), int(topic_id)))
+        return cursor.rowcount > 0
+
+    def eligible_between(self, start, end):
+        """کاربرانی که next_reset_at آن‌ها در بازه [start, end) است (پیمایش ایندکس)"""
+        return [(user_id, topic_id) for user_id, topic_id in self._connect().execute(SELECT_ELIGIBLE, (start, end))]
+
+
+class SQLiteKeyedStore(SQLiteDatabase):
+    """دیکشنری ماندگار (مقادیر JSON) برای داده‌های TimeManager، جدا شده با namespace"""
+
+    schema = KEYED_SCHEMA
+
+    def __init__(self, namespace: str, db_path: str = None):
+        self.namespace = namespace
+        super().__init__(db_path)
+
+    def get(self, key, default=None):
+        row = self._connect().execute(SELECT_KEYED, (self.namespace, key)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value):
+        conn = self._connect()
+        with conn:
+            conn.execute(UPSERT_KEYED, (self.namespace, key, json.dumps(value, ensure_ascii=False)))
+
+    def delete(self, key):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(DELETE_KEYED, (self.namespace, key))
+        return cursor.rowcount > 0
+
+
+# ==================== انتقال از JSON ====================
+
+def migrate_json_progress(progress_dir: str, db_path: str, batch_size: int = 1000) -> dict:
+    """
+    انتقال همه فایل‌های data/user_progress/*.json به SQLite
+
+    فایل‌های JSON دست نمی‌خورند؛ اجرای دوباره همان ردیف‌ها را بازنویسی می‌کند.
+    """
+    manager = SQLiteProgressManager(db_path)
+    conn = manager._connect()
+    stats = {"files": 0, "rows": 0, "errors": 0}
+    rows = []
+
+    def flush():
+        with conn:
+            conn.executemany(INSERT_MIGRATED, rows)
+        stats["rows"] += len(rows)
+        rows.clear()
+
+    for user_id, path in iter_progress_files(progress_dir):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for topic_id, progress in UserProgress.from_json(data).topics.items():
+                rows.append((user_id, topic_id, progress.current_day,
+                             1 if progress.started else 0, progress.completed_mask))
+            stats["files"] += 1
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"⚠️ خطا در انتقال {user_id}: {e}")
+
+        if len(rows) >= batch_size:
+            flush()
+
+    if rows:
+        flush()
+    manager.close()
+    return stats
+
+
+def migrate_json_access(access_file: str, db_path: str) -> dict:
+    """انتقال data/daily_reset/user_access.json به جدول access_records"""
+    store = SQLiteAccessStore(db_path)
+    conn = store._connect()
+    stats = {"rows": 0, "errors": 0}
+
+    with open(access_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    rows = []
+    for user_key, record in data.items():
+        try:
+            user_id, _, topic_id = user_key.rpartition("_")
+            rows.append((
+                user_id, int(topic_id),
+                float(record.get("last_access", 0)), int(record.get("last_day", 0)),
+                float(record.get("next_reset_at", 0))
+            ))
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"⚠️ خطا در انتقال {user_key}: {e}")
+
+    with conn:
+        conn.executemany(UPSERT_ACCESS, rows)
+    stats["rows"] = len(rows)
+    store.close()
+    return stats
+
+
+
+def migrate_keyed_values(file_path: str, namespace: str, db_path: str) -> dict:
+    """انتقال یک فایل LogStore (snapshot و لاگ) به جدول keyed_values"""
+    store = SQLiteKeyedStore(namespace, db_path)
+    conn = store._connect()
+    rows = [(namespace, key, json.dumps(value, ensure_ascii=False))
+            for key, value in read_log_store(file_path).items()]
+    with conn:
+        conn.executemany(UPSERT_KEYED, rows)
+    store.close()
+    return {"rows": len(rows)}
+
+
+def _is_empty(store, query, *params) -> bool:
+    try:
+        return store._connect().execute(query, params).fetchone() is None
+    finally:
+        store.close()
+
+
+def import_legacy_data(data_dir: str, db_path: str) -> dict:
+    """
+    انتقال خودکار داده‌های json به پایگاه در اولین باز شدن
+
+    هر بخش فقط وقتی منتقل می‌شود که جدول آن در پایگاه خالی باشد؛ داده‌ای
+    که پیش‌تر (PROGRESS_BACKEND=sqlite یا RESET_BACKEND=sqlite) در پایگاه
+    نوشته شده دست نمی‌خورد. فایل‌های json دست نمی‌خورند و پس از پایان فایل
+    نشانه {db_path}.imported ساخته می‌شود تا انتقال دوباره اجرا نشود.
+    """
+    marker = f"{db_path}{IMPORTED_MARKER}"
+    if os.path.exists(marker):
+        return {}
+
+    stats = {}
+    progress_dir = os.path.join(data_dir, "user_progress")
+    if os.path.isdir(progress_dir) and _is_empty(
+            SQLiteProgressManager(db_path), "SELECT 1 FROM topic_progress LIMIT 1"):
+        stats["progress"] = migrate_json_progress(progress_dir, db_path)["rows"]
+
+    access_file = os.path.join(data_dir, "daily_reset", "user_access.json")
+    if os.path.exists(access_file) and _is_empty(
+            SQLiteAccessStore(db_path), "SELECT 1 FROM access_records LIMIT 1"):
+        stats["access"] = migrate_json_access(access_file, db_path)["rows"]
+
+    for namespace, file_name in KEYED_FILES.items():
+        file_path = os.path.join(data_dir, file_name)
+        if (os.path.exists(file_path) or os.path.exists(f"{file_path}.log")) and _is_empty(
+                SQLiteKeyedStore(namespace, db_path), "SELECT 1 FROM keyed_values WHERE namespace = ? LIMIT 1", namespace):
+            stats[namespace] = migrate_keyed_values(file_path, namespace, db_path)["rows"]
+
+    if any(stats.values()):
+        print(f"🔄 انتقال داده‌های json به {db_path}: " + "، ".join(f"{k} {v}" for k, v in stats.items()))
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    with open(marker, 'w', encoding='utf-8') as f:
+        f.write(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    return stats
+
+
+if __name__ == "__main__":
+    commands = ("migrate", "migrate-access")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("استفاده: python sqlite_store.py migrate [progress_dir] [db_path]")
+        print("         python sqlite_store.py migrate-access [access_file] [db_path]")
+        sys.exit(1)
+
+    data_dir = os.getenv('BOT_DATA_DIR', 'data')
+    target = sys.argv[3] if len(sys.argv) > 3 else get_database_path()
+
+    if sys.argv[1] == "migrate":
+        source = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, "user_progress")
+        print(f"🔄 انتقال {source} ← {target}")
+        result = migrate_json_progress(source, target)
+        print(f"✅ {result['files']} فایل، {result['rows']} ردیف منتقل شد ({result['errors']} خطا)")
+    else:
+        source = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, "daily_reset", "user_access.json")
+        print(f"🔄 انتقال {source} ← {target}")
+        result = migrate_json_access(source, target)
+        print(f"✅ {result['rows']} رکورد منتقل شد ({result['errors']} خطا)")
\ No newline at end of file
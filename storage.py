@@ -0,0 +1,374 @@
+"""
+storage.py - رابط یکسان پشتوانه‌های ذخیره‌سازی ربات
+
+هر پشتوانه سه بخش دارد که مدیرهای موجود از آن‌ها استفاده می‌کنند:
+
+    progress        رابط UserProgressManager (get_user_progress، get_topic_progress،
+                    set_topic_day، complete_day)
+    access          store دسترسی DailyResetManager (get، put، delete، eligible_between)
+    keyed(name)     دیکشنری ماندگار TimeManager (get، set، delete) برای
+                    "next_day" و "locks"
+
+پیاده‌سازی‌ها:
+
+    memory      فقط حافظه (برای تست و بنچمارک)
+    json        فایل پیشرفت هر کاربر (با کش)، user_access.json و لاگ‌های TimeManager (پیش‌فرض)
+    mmap        جدول اسلات ثابت پیشرفت (mmap_progress)؛ دسترسی و زمان‌ها مثل json
+    sqlite      همه داده‌ها در یک پایگاه SQLite (DATABASE_PATH)
+    user        رکورد یکپارچه هر کاربر (user_state) در data/users/
+
+همه مدیرها (UserProgressManager، DailyResetManager، TimeManager) از همان
+پشتوانه‌ای استفاده می‌کنند که STORAGE_BACKEND انتخاب می‌کند. تنظیمات قدیمی
+PROGRESS_BACKEND، RESET_BACKEND و STATE_BACKEND فقط وقتی STORAGE_BACKEND
+تنظیم نشده باشد به یکی از همین نام‌ها نگاشت می‌شوند.
+
+    python storage_conformance.py              سناریوهای یکسان روی همه پشتوانه‌ها
+    python benchmark_storage.py --backends memory,json,mmap,sqlite,user
+"""
+
+import os
+import threading
+from typing import Protocol
+
+from progress_record import UserProgress
+
+BACKENDS = ("memory", "json", "mmap", "sqlite", "user")
+
+KEYED_FILES = {
+    "next_day": "user_next_day_times.json",
+    "locks": "daily_locks.json"
+}
+
+
+class ProgressStore(Protocol):
+    def get_user_progress(self, user_id) -> UserProgress: ...
+    def get_topic_progress(self, user_id, topic_id) -> dict: ...
+    def set_topic_day(self, user_id, topic_id, day_number) -> int: ...
+    def complete_day(self, user_id, topic_id, day_number) -> bool: ...
+
+
+class AccessStore(Protocol):
+    def get(self, user_id, topic_id): ...
+    def put(self, user_id, topic_id, record: dict): ...
+    def delete(self, user_id, topic_id) -> bool: ...
+    def eligible_between(self, start: float, end: float) -> list: ...
+
+
+class KeyedStore(Protocol):
+    def get(self, key, default=None): ...
+    def set(self, key, value): ...
+    def delete(self, key) -> bool: ...
+
+
+class StorageBackend(Protocol):
+    name: str
+    progress: ProgressStore
+    access: AccessStore
+
+    def keyed(self, name: str) -> KeyedStore: ...
+    def flush(self): ...
+    def close(self): ...
+
+
+# ==================== memory ====================
+
+class MemoryProgressStore:
+    """پیشرفت کاربران فقط در حافظه"""
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def _user(self, user_id):
+        progress = self._users.get(user_id)
+        if progress is None:
+            progress = self._users[user_id] = UserProgress()
+        return progress
+
+    def get_user_progress(self, user_id):
+        with self._lock:
+            progress = self._users.get(str(user_id))
+            return progress.copy() if progress else UserProgress()
+
+    def get_topic_progress(self, user_id, topic_id):
+        return self.get_user_progress(user_id).topic(topic_id).to_dict()
+
+    def set_topic_day(self, user_id, topic_id, day_number):
+        with self._lock:
+            return self._user(str(user_id)).ensure(topic_id).set_day(day_number)
+
+    def complete_day(self, user_id, topic_id, day_number):
+        with self._lock:
+            return self._user(str(user_id)).ensure(topic_id).complete(day_number)
+
+
+class MemoryAccessStore:
+    """رکوردهای دسترسی روزانه فقط در حافظه"""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, topic_id):
+        record = self._records.get((str(user_id), int(topic_id)))
+        return dict(record) if record else None
+
+    def put(self, user_id, topic_id, record):
+        with self._lock:
+            self._records.setdefault((str(user_id), int(topic_id)), {}).update(record)
+
+    def delete(self, user_id, topic_id):
+        with self._lock:
+            return self._records.pop((str(user_id), int(topic_id)), None) is not None
+
+    def eligible_between(self, start, end):
+        with self._lock:
+            return [key for key, record in self._records.items()
+                    if start <= record.get("next_reset_at", 0) < end]
+
+
+class MemoryKeyedStore:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def close(self):
+        pass
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, data_dir: str = None):
+        self.progress = MemoryProgressStore()
+        self.access = MemoryAccessStore()
+        self._keyed = {}
+
+    def keyed(self, name):
+        if name not in self._keyed:
+            self._keyed[name] = MemoryKeyedStore()
+        return self._keyed[name]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# ==================== json ====================
+
+class JsonBackend:
+    """فایل‌های فعلی: پیشرفت هر کاربر (با کش)، user_access.json و لاگ‌های TimeManager"""
+
+    name = "json"
+
+    def __init__(self, data_dir: str = None):
+        from daily_reset import JsonAccessStore
+
+        self.data_dir = data_dir or os.getenv('BOT_DATA_DIR', 'data')
+        self.progress = self._create_progress()
+        self.access = JsonAccessStore(os.path.join(self.data_dir, "daily_reset"))
+        self._keyed = {}
+        self._lock = threading.Lock()
+
+    def _create_progress(self):
+        from static.content.loader import UserProgressManager
+
+        manager = UserProgressManager(os.path.join(self.data_dir, "user_progress"))
+        if os.getenv('PROGRESS_CACHE', '1') == "0":
+            return manager
+
+        from progress_cache import CachedProgressManager
+        return CachedProgressManager(
+            manager,
+            max_users=int(os.getenv('PROGRESS_CACHE_SIZE', '10000')),
+            flush_interval=float(os.getenv('PROGRESS_FLUSH_INTERVAL', '1')),
+            max_dirty_age=float(os.getenv('PROGRESS_MAX_DIRTY_AGE', '5'))
+        )
+
+    def keyed(self, name):
+        from log_store import LogStore
+
+        with self._lock:
+            if name not in self._keyed:
+                file_name = KEYED_FILES.get(name, f"{name}.json")
+                self._keyed[name] = LogStore(os.path.join(self.data_dir, file_name))
+            return self._keyed[name]
+
+    def flush(self):
+        if hasattr(self.progress, "flush"):
+            self.progress.flush()
+
+    def close(self):
+        if hasattr(self.progress, "close"):
+            self.progress.close()
+        for store in self._keyed.values():
+            store.close()
+
+
+# ==================== mmap ====================
+
+class MmapBackend(JsonBackend):
+    """پیشرفت در جدول mmap (data/progress_table)؛ دسترسی و زمان‌ها مثل json"""
+
+    name = "mmap"
+
+    def _create_progress(self):
+        from mmap_progress import MmapProgressManager
+        return MmapProgressManager(os.path.join(self.data_dir, "progress_table"))
+
+
+# ==================== sqlite ====================
+
+class SQLiteBackend:
+    """همه داده‌ها در یک پایگاه SQLite (DATABASE_PATH)"""
+
+    name = "sqlite"
+
+    def __init__(self, data_dir: str = None):
+        from sqlite_store import SQLiteAccessStore, SQLiteProgressManager, get_database_path
+
+        from sqlite_store import import_legacy_data
+
+        if data_dir:
+            self.db_path = os.path.join(data_dir, "bot_data.db")
+        else:
+            self.db_path = get_database_path()
+        # بار اول: داده‌های json که هنوز در پایگاه نیستند (تنظیمات قدیمی ترکیبی)
+        import_legacy_data(data_dir or os.getenv('BOT_DATA_DIR', 'data'), self.db_path)
+        self.progress = SQLiteProgressManager(self.db_path)
+        self.access = SQLiteAccessStore(self.db_path)
+        self._keyed = {}
+        self._lock = threading.Lock()
+
+    def keyed(self, name):
+        from sqlite_store import SQLiteKeyedStore
+
+        with self._lock:
+            if name not in self._keyed:
+                self._keyed[name] = SQLiteKeyedStore(name, self.db_path)
+            return self._keyed[name]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        for store in (self.progress, self.access, *self._keyed.values()):
+            store.close()
+
+
+# ==================== user ====================
+
+class UserStateBackend:
+    """رکورد یکپارچه هر کاربر: پیشرفت، دسترسی، زمان‌ها و قفل‌ها در یک فایل"""
+
+    name = "user"
+
+    def __init__(self, data_dir: str = None):
+        from user_state import StateAccessStore, StateProgressManager, get_state_store
+
+        self.store = get_state_store(data_dir)
+        self.progress = StateProgressManager(self.store)
+        self.access = StateAccessStore(self.store)
+        self._keyed = {}
+        self._lock = threading.Lock()
+
+    def keyed(self, name):
+        from user_state import StateKeyedStore
+
+        with self._lock:
+            if name not in self._keyed:
+                self._keyed[name] = StateKeyedStore(name, self.store)
+            return self._keyed[name]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+_BACKEND_CLASSES = {
+    "memory": MemoryBackend,
+    "json": JsonBackend,
+    "mmap": MmapBackend,
+    "sqlite": SQLiteBackend,
+    "user": UserStateBackend
+}
+
+_storages = {}
+_storages_lock = threading.Lock()
+_legacy_warned = set()
+
+
+def create_storage(name: str, data_dir: str = None) -> StorageBackend:
+    """ساخت یک پشتوانه جدید (یکی از BACKENDS)"""
+    try:
+        backend_class = _BACKEND_CLASSES[name.lower()]
+    except KeyError:
+        raise ValueError(f"پشتوانه ناشناخته: {name} (مقادیر مجاز: {', '.join(BACKENDS)})")
+    return backend_class(data_dir)
+
+
+def get_backend_name() -> str:
+    """
+    نام پشتوانه انتخاب‌شده: STORAGE_BACKEND، یا نگاشت تنظیمات قدیمی
+
+        STATE_BACKEND=user              -> user
+        PROGRESS_BACKEND=mmap / sqlite  -> mmap / sqlite
+        RESET_BACKEND=sqlite            -> sqlite (پیشرفت json بار اول به پایگاه منتقل می‌شود)
+    """
+    name = os.getenv('STORAGE_BACKEND', '').lower()
+    if name:
+        return name
+
+    progress = os.getenv('PROGRESS_BACKEND', 'json').lower()
+    reset = os.getenv('RESET_BACKEND', 'json').lower()
+    if os.getenv('STATE_BACKEND', 'split').lower() == "user":
+        name = "user"
+    elif progress in ("mmap", "sqlite"):
+        name = progress
+    elif reset == "sqlite":
+        name = "sqlite"
+    else:
+        return "json"
+
+    if name not in _legacy_warned:
+        _legacy_warned.add(name)
+        print(f"⚠️ PROGRESS_BACKEND/RESET_BACKEND/STATE_BACKEND منسوخ شده‌اند؛ STORAGE_BACKEND={name} را تنظیم کنید")
+        if name == "mmap" and reset == "sqlite":
+            print("⚠️ پشتوانه mmap رکوردهای دسترسی را در daily_reset/user_access.json نگه می‌دارد، نه SQLite")
+    return name
+
+
+def get_storage() -> StorageBackend:
+    """پشتوانه انتخاب‌شده (برای هر نام و BOT_DATA_DIR فقط یک نمونه)"""
+    key = (get_backend_name(), os.getenv('BOT_DATA_DIR', 'data'))
+    storage = _storages.get(key)
+    if storage is not None:
+        return storage
+
+    with _storages_lock:
+        storage = _storages.get(key)
+        if storage is None:
+            storage = _storages[key] = create_storage(key[0])
+            print(f"🗄️ پشتوانه ذخیره‌سازی: {storage.name}")
+        return storage
+
+
+def flush_storages():
+    """نوشتن تغییرات معوق همه پشتوانه‌های باز (هنگام توقف ربات)"""
+    for storage in list(_storages.values()):
+        storage.flush()
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+storage_conformance.py - سناریوهای یکسان برای همه پشتوانه‌های storage.py
+
+هر سناریو روی یک نمونه تازه از هر پشتوانه (در پوشه موقت) اجرا می‌شود.
+پشتوانه جدید باید همه سناریوها را بدون تغییر بگذراند.
+
+    python storage_conformance.py
+    python storage_conformance.py --backends json,sqlite
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from progress_record import MAX_DAY
+from storage import BACKENDS, create_storage
+
+
+# ==================== سناریوها ====================
+
+def scenario_unknown_user(storage, reopen):
+    """کاربر ناشناخته: پیشرفت پیش‌فرض و بدون رکورد دسترسی"""
+    progress = storage.progress.get_topic_progress("nobody", 1)
+    assert progress == {"current_day": 1, "started": False, "completed_days": []}, progress
+    assert not storage.progress.get_user_progress("nobody").topics
+    assert storage.access.get("nobody", 1) is None
+    assert storage.keyed("next_day").get("nobody_1", 0) == 0
+
+
+def scenario_set_topic_day(storage, reopen):
+    """شروع موضوع و محدود شدن شماره روز به ۱ تا MAX_DAY"""
+    assert storage.progress.set_topic_day("u1", 1, 5) == 5
+    assert storage.progress.set_topic_day("u1", 2, 0) == 1
+    assert storage.progress.set_topic_day("u1", 3, MAX_DAY + 10) == MAX_DAY
+
+    progress = storage.progress.get_topic_progress("u1", 1)
+    assert progress["current_day"] == 5 and progress["started"], progress
+    assert sorted(storage.progress.get_user_progress("u1").topics) == [1, 2, 3]
+
+
+def scenario_complete_day(storage, reopen):
+    """تکمیل روز فقط یک بار؛ روز بعدِ آخرین تکمیل فعال می‌شود و ترتیب روزها حفظ می‌شود"""
+    storage.progress.set_topic_day("u1", 1, 1)
+    assert storage.progress.complete_day("u1", 1, 3) is True
+    assert storage.progress.complete_day("u1", 1, 3) is False
+    assert storage.progress.complete_day("u1", 1, 1) is True
+
+    progress = storage.progress.get_topic_progress("u1", 1)
+    assert progress["completed_days"] == [1, 3], progress
+    assert progress["current_day"] == 2, progress
+
+    assert storage.progress.complete_day("u1", 1, MAX_DAY) is True
+    assert storage.progress.get_topic_progress("u1", 1)["current_day"] == MAX_DAY
+
+
+def scenario_isolation(storage, reopen):
+    """تغییرات یک کاربر یا موضوع روی بقیه اثر ندارد"""
+    storage.progress.set_topic_day("u1", 1, 7)
+    storage.progress.complete_day("u1", 1, 2)
+    storage.progress.set_topic_day("u2", 1, 3)
+
+    assert storage.progress.get_topic_progress("u1", 2)["started"] is False
+    assert storage.progress.get_topic_progress("u2", 1)["completed_days"] == []
+    # نسخه برگشتی نباید روی داده ذخیره‌شده اثر بگذارد
+    storage.progress.get_user_progress("u1").ensure(5).set_day(9)
+    assert 5 not in storage.progress.get_user_progress("u1").topics
+
+
+def scenario_access_records(storage, reopen):
+    """رکورد دسترسی: ذخیره، به‌روزرسانی، حذف و جستجوی بازه next_reset_at"""
+    now = time.time()
+    storage.access.put("u1", 1, {"last_access": now, "last_day": 2, "next_reset_at": now + 100})
+    storage.access.put("u2", 1, {"last_access": now, "last_day": 1, "next_reset_at": now + 500})
+    storage.access.put("u1", 2, {"last_access": now, "last_day": 4, "next_reset_at": now - 100})
+
+    record = storage.access.get("u1", 1)
+    assert record["last_day"] == 2 and abs(record["next_reset_at"] - (now + 100)) < 1e-3, record
+
+    storage.access.put("u1", 1, {"last_access": now, "last_day": 3, "next_reset_at": now + 200})
+    assert storage.access.get("u1", 1)["last_day"] == 3
+
+    assert sorted(storage.access.eligible_between(now, now + 1000)) == [("u1", 1), ("u2", 1)]
+    assert storage.access.eligible_between(now - 200, now) == [("u1", 2)]
+
+    assert storage.access.delete("u2", 1) is True
+    assert storage.access.delete("u2", 1) is False
+    assert storage.access.get("u2", 1) is None
+
+
+def scenario_keyed(storage, reopen):
+    """دیکشنری‌های TimeManager: مقدار عددی و دیکشنری، جدا بودن namespace ها"""
+    times = storage.keyed("next_day")
+    locks = storage.keyed("locks")
+
+    times.set("u1_1", 1700000000.5)
+    locks.set("u1_1", {"day": 3, "locked_at": 1700000000.5, "locked_date": "2023-11-14"})
+    assert times.get("u1_1") == 1700000000.5
+    assert locks.get("u1_1")["day"] == 3
+    assert locks.get("u1_2", {}) == {}
+
+    assert times.delete("u1_1") is True
+    assert times.delete("u1_1") is False
+    assert times.get("u1_1", 0) == 0
+    assert locks.get("u1_1")["locked_date"] == "2023-11-14"
+
+
+def scenario_persistence(storage, reopen):
+    """داده پس از بستن و باز کردن دوباره باقی می‌ماند (به جز memory)"""
+    storage.progress.set_topic_day("u1", 4, 6)
+    storage.progress.complete_day("u1", 4, 6)
+    storage.access.put("u1", 4, {"last_access": 1.0, "last_day": 6, "next_reset_at": 2.0})
+    storage.keyed("next_day").set("u1_4", 3.0)
+
+    storage = reopen()
+    if storage.name == "memory":
+        return
+
+    assert storage.progress.get_topic_progress("u1", 4) == {"current_day": 7, "started": True, "completed_days": [6]}
+    assert storage.access.get("u1", 4)["last_day"] == 6
+    assert storage.keyed("next_day").get("u1_4") == 3.0
+
+
+def scenario_concurrent_completion(storage, reopen):
+    """تکمیل همزمان روزهای مختلف یک کاربر از چند thread بدون از دست رفتن تغییر"""
+    storage.progress.set_topic_day("u1", 1, 1)
+
+    def worker(days):
+        for day in days:
+            assert storage.progress.complete_day("u1", 1, day)
+
+    threads = [threading.Thread(target=worker, args=(range(start, MAX_DAY + 1, 4),)) for start in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert storage.progress.get_topic_progress("u1", 1)["completed_days"] == list(range(1, MAX_DAY + 1))
+
+
+def scenario_header_only_table(storage, reopen):
+    """جدول mmap فقط با سرآیند (قطع هنگام ساخت) دوباره باز و نوشته می‌شود"""
+    if storage.name != "mmap":
+        return
+
+    from mmap_progress import HEADER
+
+    table_path = storage.progress.table_path
+    storage = reopen()
+    with open(table_path, 'r+b') as f:
+        f.truncate(HEADER.size)
+
+    storage = reopen()
+    assert storage.progress.capacity == 0
+    assert storage.progress.set_topic_day("u1", 1, 3) == 3
+    assert storage.progress.get_topic_progress("u1", 1)["current_day"] == 3
+    assert os.path.getsize(table_path) > HEADER.size
+
+
+SCENARIOS = [
+    scenario_unknown_user,
+    scenario_set_topic_day,
+    scenario_complete_day,
+    scenario_isolation,
+    scenario_access_records,
+    scenario_keyed,
+    scenario_persistence,
+    scenario_concurrent_completion,
+    scenario_header_only_table
+]
+
+
+# ==================== اجرا ====================
+
+def run_scenario(backend, scenario) -> bool:
+    data_dir = tempfile.mkdtemp(prefix=f"storage_{backend}_")
+    opened = [create_storage(backend, data_dir)]
+
+    def reopen():
+        opened[-1].close()
+        opened.append(create_storage(backend, data_dir))
+        return opened[-1]
+
+    try:
+        scenario(opened[0], reopen)
+        return True
+    except Exception:
+        traceback.print_exc()
+        return False
+    finally:
+        opened[-1].close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def run(backends) -> int:
+    failures = 0
+    for backend in backends:
+        print(f"\n🗄️ {backend}")
+        for scenario in SCENARIOS:
+            ok = run_scenario(backend, scenario)
+            failures += not ok
+            print(f"   {'✅' if ok else '❌'} {scenario.__name__[len('scenario_'):]:<24} {scenario.__doc__.strip()}")
+
+    print(f"\n{'✅ همه سناریوها موفق' if not failures else f'❌ {failures} سناریو ناموفق'}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="سناریوهای یکسان برای پشتوانه‌های ذخیره‌سازی")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="پشتوانه‌ها، جدا با کاما")
+    args = parser.parse_args()
+
+    sys.exit(1 if run([name for name in args.backends.split(",") if name]) else 0)
\ No newline at end of file
@@ -0,0 +1,451 @@
+"""
+templates.py - متن پیام‌های ربات در یک جا
+
+پیام‌های بدون مقدار متغیر ثابت‌های متنی‌اند (HELP، CONTACT، ...). پیام‌های
+دارای مقدار تابع‌هایی‌اند که کل متن را با یک f-string می‌سازند:
+
+    templates.day_completed(topic_emoji="💚", day_number=3, ...)
+    templates.HELP
+
+همه متن‌ها با HTML نوشته شده‌اند (parse_mode ربات).
+
+    python benchmark_templates.py
+"""
+
+_PROGRESS_BARS = {}
+
+
+def progress_bar(value: int, total: int, length: int) -> str:
+    """نوار پیشرفت «█░» (نوار همه مقادیر ۰ تا total یک بار ساخته می‌شود)"""
+    bars = _PROGRESS_BARS.get((total, length))
+    if bars is None:
+        bars = _PROGRESS_BARS[total, length] = tuple(
+            "█" * filled + "░" * (length - filled)
+            for filled in (int((value / total) * length) for value in range(total + 1))
+        )
+    if 0 <= value <= total:
+        return bars[value]
+    return bars[0] if value < 0 else bars[total]
+
+
+# ==================== پیام‌های ربات ====================
+
+# خوش‌آمد (/start)
+WELCOME = """
+✨💫🙏💚💰😊🕊️🎯🏠🌿💖
+<b>✨ سلام! به ربات معجزه شکرگزاری خوش آمدید</b> ✨
+
+📖 بر اساس کتاب «معجزه شکرگزاری» اثر <i>راندا برن</i>
+
+🎯 <b>۸ حوزه اصلی زندگی برای شکرگزاری:</b>
+
+هر موضوع ۲۸ روز تمرین اختصاصی دارد
+هر روز ۱۰ شکرگزاری زیبا و مخصوص
+هر هفته سطح جدیدی از شکرگزاری را تجربه می‌کنید
+
+
+👨‍💻 <b>ساخته شده توسط فرزاد قجری</b>
+
+💖 <b>درباره توسعه‌دهنده:</b>
+من فرزاد قجری هستم، برنامه‌نویس و توسعه‌دهنده این ربات.
+باور دارم که شکرگزاری می‌تواند زندگی هر انسانی را متحول کند.
+این ربات هدیه‌ای از طرف من به همه کسانی است که می‌خواهند زندگی بهتری داشته باشند.
+
+🌟 <b>یادت باشه:</b>
+«هر روزی که شکرگزار باشی، روزی است که زندگی کرده‌ای»
+
+
+💫 <b>بیایید با شکرگزاری، زندگی را متحول کنیم!</b>
+"""
+
+
+# گزینه‌های شروع
+START_OPTIONS = """
+🎯 <b>برای شروع کار با ربات، یکی از گزینه‌های زیر را انتخاب کنید:</b>
+
+• <b>استفاده رایگان:</b> تمام محتوای ربات به صورت کاملاً رایگان در دسترس شماست
+• <b>حمایت داوطلبانه:</b> اگر از ربات راضی هستید و می‌خواهید از توسعه‌دهنده حمایت کنید
+
+💝 <i>ربات به صورت کاملاً رایگان ارائه می‌شود. حمایت شما اختیاری و داوطلبانه است.</i>
+"""
+
+
+# انتخاب مبلغ حمایت
+SUPPORT_OPTIONS = """
+💖 <b>انتخاب مبلغ حمایت</b>
+
+لطفاً یکی از مبالغ زیر را انتخاب کنید یا مبلغ دلخواه خود را وارد کنید:
+
+🌟 <b>گزینه‌های موجود:</b>
+• ۱۰,۰۰۰ تومان
+• ۲۰,۰۰۰ تومان  
+• ۵۰,۰۰۰ تومان
+• ۱۰۰,۰۰۰ تومان
+• یا هر مبلغ دلخواه دیگری
+
+🙏 <i>هر مبلغی که مایل باشید قابل قبول است. هدف فقط حمایت و قدردانی است.</i>
+"""
+
+
+# مبلغ دلخواه حمایت
+SUPPORT_CUSTOM = """
+💰 <b>مبلغ دلخواه برای حمایت</b>
+
+لطفاً مبلغ مورد نظر خود را به <b>تومان</b> وارد کنید:
+
+مثال:
+• برای ۵۰,۰۰۰ تومان: <code>50000</code>
+• برای ۱۵,۰۰۰ تومان: <code>15000</code>
+• برای ۱,۰۰۰ تومان: <code>1000</code>
+
+💖 <i>هر مبلغی که مایل باشید قابل قبول است.</i>
+"""
+
+
+# تشکر پس از پرداخت موفق
+def payment_thanks(amount_toman):
+    return f"""
+💖 <b>با تشکر از حمایت شما!</b>
+
+✅ مبلغ <b>{amount_toman:,.0f} تومان</b> با موفقیت دریافت شد
+🌟 حمایت شما انگیزه‌ای برای توسعه ربات است
+🙏 از لطف و همراهی شما سپاسگزاریم
+
+📞 برای پیگیری: @farzadQ_ir
+"""
+
+
+# صفحه روز (بدون موارد و بخش‌های اختیاری)
+def day_page(topic_emojis, week_title, author_quote, topic_name, day_number, week_number, intro, topic_emoji):
+    return f"""
+{topic_emojis}
+<b>{week_title}</b>
+📖 {author_quote}
+
+<b>{topic_name}</b>
+📅 روز {day_number} از ۲۸ • هفته {week_number}
+🕕 بازنشانی بعدی: ساعت ۶ صبح
+
+<i>{intro}</i>
+
+──────────────
+{topic_emoji} <b>۱۰ شکرگزاری امروز:</b>
+"""
+
+
+# بازخوانی روز تکمیل‌شده
+def review_page(day_number, topic_name, week_title, intro, topic_emoji):
+    return f"""
+📖 <b>بازخوانی روز {day_number}: {topic_name}</b>
+
+🎯 {week_title}
+<i>{intro}</i>
+
+──────────────
+{topic_emoji} <b>۱۰ شکرگزاری این روز:</b>
+"""
+
+
+# صفحه روز GraphicsHandler
+def graphics_day_page(topic_emojis, topic_name, day_number, week_title, author_quote, intro, topic_emoji):
+    return f"""
+{topic_emojis}
+<b>{topic_name}</b>
+📅 روز {day_number} از ۲۸ • {week_title}
+
+📖 {author_quote}
+
+<i>{intro}</i>
+
+──────────────
+{topic_emoji} <b>۱۰ شکرگزاری امروز:</b>
+"""
+
+
+# روز بعد هنوز باز نشده
+def locked_day(topic_emoji, last_day, remaining_text, next_day, next_reset_human):
+    return f"""
+⏰ <b>زمان برای روز جدید هنوز نرسیده!</b>
+
+{topic_emoji} <b>سیستم روزانه شکرگزاری</b>
+
+✅ آخرین روزی که کامل کردید: <b>روز {last_day}</b>
+🕕 بازنشانی روزانه: <b>ساعت ۶ صبح</b>
+⏳ زمان باقیمانده: <b>{remaining_text}</b>
+
+📅 <i>برای مشاهده روز {next_day}:</i>
+
+1️⃣ تا ساعت <b>{next_reset_human}</b> صبر کنید
+2️⃣ سپس دوباره این موضوع را انتخاب کنید
+
+🌟 <b>چرا سیستم ساعت ۶ صبح؟</b>
+• ایجاد نظم صبحگاهی در شکرگزاری
+• شروع روز با انرژی مثبت
+• تبدیل به عادت پایدار روزانه
+
+💡 <i>شما می‌توانید روزهای قبلی را مرور کنید...</i>
+"""
+
+
+# تکمیل یک روز
+def day_completed(topic_emoji, day_number, topic_name, next_reset_human, next_day):
+    return f"""
+{topic_emoji} <b>تبریک! روز {day_number} {topic_name} را کامل کردید!</b>
+
+✅ <b>تمرین امروز ثبت شد</b>
+✨ شما یک گام دیگر به سوی تحول زندگی برداشتید
+
+🎯 <b>سیستم روزانه شکرگزاری (ساعت ۶ صبح):</b>
+<i>برای بهترین نتیجه، این روند را دنبال کنید:</i>
+
+1️⃣ <b>فردا ساعت {next_reset_human} به ربات مراجعه کنید</b>
+2️⃣ موضوع "{topic_name}" را انتخاب کنید  
+3️⃣ محتوای روز {next_day} برای شما نمایش داده می‌شود
+
+⏰ <i>این سیستم به شما کمک می‌کند:</i>
+• شکرگزاری صبحگاهی را به عادت تبدیل کنید
+• روز خود را با انرژی مثبت شروع کنید
+• نتایج پایدار و ماندگار بگیرید
+
+🌟 <b>تا فردا صبح، تأثیرات شکرگزاری امروز را در زندگی خود مشاهده کنید...</b>
+"""
+
+
+# پایان دوره ۲۸ روزه
+def course_completed(topic_name, topic_emojis):
+    return f"""
+🎊 <b>شکوه‌آمیز! دوره ۲۸ روزه {topic_name} کامل شد!</b>
+
+{topic_emojis}
+
+🌟 <b>دستاورد بزرگ شما:</b>
+✅ ۲۸ روز تمرین مستمر شکرگزاری
+✅ ۲۸۰ مورد شکرگزاری ثبت شده  
+✅ ۴ هفته تحول ذهنی
+✅ تبدیل شکرگزاری به سبک زندگی
+
+🎯 <b>حالا می‌توانید:</b>
+
+🔄 همین موضوع را از اول شروع کنید
+➡️ موضوع جدیدی را انتخاب کنید  
+📊 پیشرفت کلی خود را ببینید
+
+💝 <i>"شما تبدیل به آنچه شکرگزارش هستید، می‌شوید" - راندا برن</i>
+"""
+
+
+# شروع مجدد موضوع
+def restart_topic(name, emojis):
+    return f"""
+🔄 <b>شروع مجدد {name}</b>
+
+{emojis}
+
+✅ زمان‌بندی شما بازنشانی شد
+🎯 حالا می‌توانید از روز ۱ شروع کنید
+
+🌟 <i>این بار با تجربه بیشتر و عمق افزون‌تر...</i>
+"""
+
+
+# پیشرفت یک موضوع
+def topic_progress(emoji, name, completed, current_day, percentage, progress_bar, footer):
+    return f"""
+{emoji} <b>پیشرفت در {name}</b>
+
+✅ روزهای تکمیل‌شده: {completed} از ۲۸
+📅 روز جاری: {current_day}
+📈 پیشرفت: {percentage:.1f}%
+
+{progress_bar}
+
+{footer}"""
+
+
+# پیشرفت کلی: یک خط برای هر موضوع و جمع‌بندی
+def overall_progress_line(emoji, name, progress_bar, completed):
+    return f"{emoji} {name}: {progress_bar} {completed}/۲۸\n"
+
+
+def overall_progress(lines, total_completed, total_days, total_percentage, footer):
+    return f"""<b>📊 پیشرفت کلی شما</b>
+
+{lines}
+✅ کل روزهای تکمیل‌شده: {total_completed} از {total_days}
+📈 درصد کلی: {total_percentage:.1f}%{footer}"""
+
+
+# پیام تشویقی یک موضوع
+def encourage_topic(emoji, name):
+    return f"""
+{emoji} <b>انگیزه برای ادامه {name}</b>
+
+"هر شکرگزاری قدمی است به سوی تحول زندگی.
+هر روز که سپاسگزاری می‌کنید،
+یک لایه از محدودیت‌ها را می‌کنید."
+
+🌟 تمرین امروز را با عشق انجام دهید
+🎯 بر نکات مثبت تمرکز کنید
+💖 از قلب خود تشکر کنید
+
+<i>شما در مسیر درستی قرار دارید...</i>
+"""
+
+
+# پیام تشویقی عمومی
+ENCOURAGE = """
+✨ <b>پیام تشویقی</b>
+
+"شکرگزاری معجزه‌ای است که زندگیتان را متحول می‌کند."
+
+💖 هر روز ۱۰ دقیقه وقت بگذارید
+🎯 روی نکات مثبت تمرکز کنید
+🌟 معجزه را در زندگی خود ببینید
+
+<i>ادامه دهید... هر روز نزدیک‌تر</i>
+"""
+
+
+# راهنمای کامل
+HELP = """
+📚 <b>راهنمای کامل ربات معجزه شکرگزاری</b>
+
+🎯 <b>سیستم ۲۸ روزه:</b>
+• ۸ موضوع اصلی زندگی
+• هر موضوع: ۲۸ روز تمرین
+• هر روز: ۱۰ مورد شکرگزاری
+
+⏰ <b>سیستم زمان‌بندی:</b>
+• بازنشانی روزانه: <b>ساعت ۶ صبح</b>
+• هر روز فقط یک بار می‌توانید تمرین کنید
+• هدف: ایجاد عادت روزانه
+
+📱 <b>نحوه استفاده:</b>
+1️⃣ یک موضوع انتخاب کنید
+2️⃣ ۱۰ مورد شکرگزاری را بخوانید
+3️⃣ تمرین روزانه را انجام دهید
+4️⃣ دکمه "امروز شکرگزار بودم" را فشار دهید
+5️⃣ فردا ساعت ۶ صبح برای روز بعدی برگردید
+
+💖 <b>حمایت داوطلبانه:</b>
+• ربات کاملاً رایگان است
+• حمایت مالی اختیاری است
+• هر مبلغی قابل قبول است
+• برای تشکر و کمک به توسعه
+
+🌟 <b>نکات مهم:</b>
+• با احساس عمیق شکرگزاری کنید
+• بر نکات مثبت تمرکز کنید
+• شکرگزاری را به سبک زندگی تبدیل کنید
+
+📞 <b>پشتیبانی:</b>
+برای سوالات و مشکلات با توسعه‌دهنده تماس بگیرید.
+"""
+
+
+# ارتباط با توسعه‌دهنده
+CONTACT = """
+👨‍💻 <b>ارتباط با توسعه‌دهنده</b>
+
+
+💎 <b>توسعه‌دهنده:</b>  
+فـــرزاد قــجری  
+
+📞 <b>تماس مستقیم:</b>  
+۰۹۳۰۲۴۴۶۱۴۱ 
+
+📧 <b>ایمیل:</b>  
+farzadq.ir@gmail.com 
+
+🆔 <b>آیدی‌های ارتباطی:</b>  
+<b>ایتا:</b> farzadQ_ir@  
+<b>تلگرام:</b> farzadQ_ir@  
+<b>بله:</b> farzadQ_ir@  
+<b>روبیکا:</b> farzadQ_ir@  
+
+---
+
+🎯 <b>حوزه‌های تخصصی و خدمات:</b>  
+✅ طراحی و ساخت ربات‌های تلگرام و وب‌سایت‌های پویا  
+✅ توسعه اپلیکیشن‌های موبایل (Android/iOS) و نرم‌افزارهای دسکتاپ  
+✅ برنامه‌نویسی پایتون، فریم‌ورک‌های Django و Flask  
+✅ طراحی و توسعه API و سیستم‌های پایگاه‌داده  
+✅ مشاوره، پشتیبانی فنی و دوره‌های آموزشی برنامه‌نویسی  
+
+    🌍<b>www.danekar.ir</b>
+---
+
+✨ <i>برای شروع پروژه، دریافت مشاوره یا همکاری، از طریق راه‌های فوق در ارتباط باشید.</i>
+
+
+"""
+
+
+# راهنمای GraphicsHandler
+GUIDE = """
+❓ <b>راهنمای استفاده از ربات</b>
+
+📌 <b>دستورات اصلی:</b>
+/start - شروع سفر شکرگزاری  
+/help - این راهنما
+/progress - پیشرفت کلی
+
+📌 <b>۸ حوزه اصلی شکرگزاری:</b>
+💚 سلامتی و تندرستی
+👨‍👩‍👧‍👦 خانواده و روابط  
+💰 ثروت و فراوانی
+😊 شادی و آرامش
+🎯 اهداف و موفقیت
+🏠 زندگی مطلوب
+🌿 طبیعت و کائنات
+💖 عشق و معنویت
+
+📌 <b>نحوه کار:</b>
+۱. یک موضوع از ۸ موضوع انتخاب کنید
+۲. هر روز ۱۰ مورد شکرگزاری مخصوص دریافت می‌کنید
+۳. هر مورد را با دقت بخوانید و برای آن شکرگزاری کنید
+۴. پس از اتمام، دکمه "امروز شکرگزار بودم" را فشار دهید
+
+📌 <b>توصیه‌ها:</b>
+- بهترین زمان: اول صبح
+- مکان آرام
+- تمرکز کامل
+- هر روز ۱۰-۱۵ دقیقه وقت بگذارید
+- با احساس واقعی شکرگزاری کنید
+
+👨‍💻 <b>پشتیبانی:</b>
+اگر سوالی دارید یا نیاز به کمک دارید:
+از دکمه "ارتباط با من" استفاده کنید
+
+💫 <b>تعهد ۲۸ روزه = تحول زندگی</b>
+"""
+
+
+# معرفی توسعه‌دهنده در GraphicsHandler
+PROFILE = """
+👨‍💻 <b>ارتباط با توسعه‌دهنده</b>
+
+<b>📛 نام کامل:</b>
+<code>فرزاد قجری</code>
+
+<b>📱 تماس مستقیم:</b>
+<code>09302446141</code>
+
+<b>📧 ایمیل:</b>
+<code>farzadq.ir@gmail.com</code>
+
+<b>🎯 خدمات تخصصی:</b>
+✅ ساخت انواع ربات تلگرام و وب‌سایت
+✅ طراحی اپلیکیشن موبایل و دسکتاپ
+✅ برنامه‌نویسی پایتون، Django، Flask
+✅ توسعه API و پایگاه داده
+✅ پشتیبانی و آموزش
+
+<b>💡 درباره من:</b>
+من یک برنامه‌نویس پرشور و علاقه‌مند به ساخت ابزارهای مفید هستم.
+باور دارم تکنولوژی باید زندگی مردم را بهتر کند.
+این ربات یکی از پروژه‌های مورد علاقه‌ام است که با عشق ساخته شده.
+
+<b>🌟 پیام من به شما:</b>
+«شکرگزاری را شروع کنید و معجزه آن را در زندگی خود ببینید»
+"""
\ No newline at end of file
@@ -1,9 +1,14 @@
 """
 time_manager.py - مدیریت زمان روز بعد برای کاربران
+
+داده‌ها در store های keyed پشتوانه STORAGE_BACKEND (storage.py) نگهداری
+می‌شوند. در پشتوانه json (پیش‌فرض) این store یک LogStore است: هر تغییر یک
+خط به لاگ اضافه می‌کند و فایل‌های JSON قبلی به عنوان snapshot در پس‌زمینه
+بازنویسی می‌شوند.
 """
 
-import json
 import os
+import threading
 import time
 from datetime import datetime, timedelta
 
@@ -12,41 +17,44 @@ class TimeManager:
     """مدیریت زمان دسترسی به روز بعد"""
 
     def __init__(self):
-        self.data_dir = "data"
-        self.time_file = os.path.join(self.data_dir, "user_next_day_times.json")
-        self.lock_file = os.path.join(self.data_dir, "daily_locks.json")
+        self.data_dir = os.getenv('BOT_DATA_DIR', 'data')
         os.makedirs(self.data_dir, exist_ok=True)
-
-    def _load_json(self, file_path):
-        """بارگذاری فایل JSON"""
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-
-    def _save_json(self, file_path, data):
-        """ذخیره فایل JSON"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self._times = None
+        self._locks = None
+        self._lock = threading.Lock()
+
+    def _open_store(self, name):
+        from storage import get_storage
+        return get_storage().keyed(name)
+
+    @property
+    def times(self):
+        # باز کردن با تأخیر: بازخوانی لاگ فقط در اولین استفاده
+        if self._times is None:
+            with self._lock:
+                if self._times is None:
+                    self._times = self._open_store("next_day")
+        return self._times
+
+    @property
+    def locks(self):
+        if self._locks is None:
+            with self._lock:
+                if self._locks is None:
+                    self._locks = self._open_store("locks")
+        return self._locks
 
     def get_next_day_time(self, user_id, topic_id):
         """دریافت زمان فعال شدن روز بعد"""
-        data = self._load_json(self.time_file)
         user_key = f"{user_id}_{topic_id}"
-        return data.get(user_key, 0)
+        return self.times.get(user_key, 0)
 
     def set_next_day_time(self, user_id, topic_id, hours=24):
         """تنظیم زمان برای روز بعد"""
-        data = self._load_json(self.time_file)
         user_key = f"{user_id}_{topic_id}"
 
         next_time = time.time() + (hours * 3600)
-        data[user_key] = next_time
-
-        self._save_json(self.time_file, data)
+        self.times.set(user_key, next_time)
         return next_time
 
     def can_access_next_day(self, user_id, topic_id):
@@ -64,13 +72,8 @@ class TimeManager:
 
     def reset_user_time(self, user_id, topic_id):
         """بازنشانی زمان کاربر (برای شروع مجدد)"""
-        data = self._load_json(self.time_file)
         user_key = f"{user_id}_{topic_id}"
-
-        if user_key in data:
-            del data[user_key]
-            self._save_json(self.time_file, data)
-
+        self.times.delete(user_key)
         return True
 
     def format_next_time(self, timestamp):
@@ -109,22 +112,18 @@ class TimeManager:
 
     def get_daily_lock(self, user_id, topic_id):
         """دریافت قفل روزانه"""
-        data = self._load_json(self.lock_file)
         user_key = f"{user_id}_{topic_id}"
-        return data.get(user_key, {})
+        return self.locks.get(user_key, {})
 
     def set_daily_lock(self, user_id, topic_id, day_number):
         """تنظیم قفل روزانه"""
-        data = self._load_json(self.lock_file)
         user_key = f"{user_id}_{topic_id}"
 
-        data[user_key] = {
+        self.locks.set(user_key, {
             "last_day": day_number,
             "last_access": time.time(),
             "date": datetime.now().strftime("%Y-%m-%d")
-        }
-
-        self._save_json(self.lock_file, data)
+        })
         return True
 
     def check_daily_access(self, user_id, topic_id):
@@ -144,6 +143,12 @@ class TimeManager:
 
         return True, 0
 
+    def close(self):
+        """بستن لاگ‌ها (پس از پایان فشرده‌سازی در جریان)"""
+        for store in (self._times, self._locks):
+            if store is not None:
+                store.close()
+
 
 # نمونه جهانی
 time_manager = TimeManager()
\ No newline at end of file
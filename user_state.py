@@ -0,0 +1,368 @@
+"""
+user_state.py - رکورد یکپارچه وضعیت هر کاربر
+
+پیشرفت موضوعات، دسترسی روزانه (daily_reset) و زمان‌ها/قفل‌های TimeManager
+یک کاربر در یک فایل data/users/{user_id}.json نگهداری می‌شوند:
+
+    {"progress": {"1": [day, mask, started]},
+     "access": {"1": [last_access, last_day, next_reset_at]},
+     "next_day": {"1": timestamp},
+     "locks": {"1": {"last_day": 3, "last_access": ..., "date": "2025-01-01"}}}
+
+با STORAGE_BACKEND=user پردازش هر آپدیت داخل user_session انجام
+می‌شود: رکورد یک بار خوانده می‌شود، همه هندلرها روی همان نسخه حافظه کار
+می‌کنند و در پایان فقط یک بار (در صورت تغییر) نوشته می‌شود.
+
+بار اول، داده‌های ساختار قبلی (user_progress/، daily_reset/user_access.json،
+user_next_day_times.json و daily_locks.json) خودکار منتقل می‌شوند:
+
+    python user_state.py migrate
+"""
+
+import json
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+from log_store import read_log_store
+from progress_layout import iter_progress_files
+from progress_record import UserProgress
+
+LOCK_STRIPES = 256
+MIGRATED_MARKER = ".migrated"
+
+
+def is_enabled() -> bool:
+    from storage import get_backend_name
+    return get_backend_name() == "user"
+
+
+def _split_user_key(user_key):
+    """کلید قدیمی "{user_id}_{topic_id}" -> (user_id, topic_id)"""
+    user_id, _, topic_id = user_key.rpartition("_")
+    return user_id, int(topic_id)
+
+
+class UserState:
+    """همه وضعیت ماندگار یک کاربر"""
+
+    __slots__ = ("progress", "access", "next_day", "locks", "dirty")
+
+    def __init__(self, progress: UserProgress = None, access: dict = None,
+                 next_day: dict = None, locks: dict = None):
+        self.progress = progress or UserProgress()
+        self.access = access or {}       # topic_id -> [last_access, last_day, next_reset_at]
+        self.next_day = next_day or {}   # topic_id -> timestamp
+        self.locks = locks or {}         # topic_id -> dict
+        self.dirty = False
+
+    def to_json(self) -> dict:
+        data = {"progress": self.progress.to_json()}
+        if self.access:
+            data["access"] = {str(k): v for k, v in sorted(self.access.items())}
+        if self.next_day:
+            data["next_day"] = {str(k): v for k, v in sorted(self.next_day.items())}
+        if self.locks:
+            data["locks"] = {str(k): v for k, v in sorted(self.locks.items())}
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict):
+        return cls(
+            UserProgress.from_json(data.get("progress", {})),
+            {int(k): v for k, v in data.get("access", {}).items()},
+            {int(k): v for k, v in data.get("next_day", {}).items()},
+            {int(k): v for k, v in data.get("locks", {}).items()}
+        )
+
+
+def _write_state(users_dir, user_id, state: UserState):
+    """ذخیره اتمیک (فایل موقت و جایگزینی)"""
+    file_path = os.path.join(users_dir, f"{user_id}.json")
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state.to_json(), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, file_path)
+    state.dirty = False
+
+
+class UserStateStore:
+    """فایل JSON یکپارچه برای هر کاربر"""
+
+    def __init__(self, data_dir: str = None):
+        self.data_dir = data_dir or os.getenv('BOT_DATA_DIR', 'data')
+        self.users_dir = os.path.join(self.data_dir, "users")
+        os.makedirs(self.users_dir, exist_ok=True)
+        self._locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+
+        if not os.path.exists(os.path.join(self.users_dir, MIGRATED_MARKER)):
+            migrate_legacy_state(self.data_dir)
+
+    def get_user_file(self, user_id):
+        return os.path.join(self.users_dir, f"{user_id}.json")
+
+    def lock_for(self, user_id):
+        return self._locks[zlib.crc32(str(user_id).encode('utf-8')) % LOCK_STRIPES]
+
+    def load(self, user_id) -> UserState:
+        file_path = self.get_user_file(user_id)
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return UserState.from_json(json.load(f))
+            except Exception as e:
+                print(f"⚠️ خطا در خواندن وضعیت کاربر {user_id}: {e}")
+        return UserState()
+
+    def save(self, user_id, state: UserState):
+        _write_state(self.users_dir, user_id, state)
+
+    def iter_users(self):
+        """(user_id, state) همه کاربران (پیمایش کامل پوشه)"""
+        for entry in os.scandir(self.users_dir):
+            if entry.name.endswith(".json"):
+                user_id = entry.name[:-len(".json")]
+                yield user_id, self.load(user_id)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_state_store(data_dir: str = None) -> UserStateStore:
+    """store مشترک برای یک پوشه داده (پیش‌فرض: BOT_DATA_DIR)"""
+    data_dir = data_dir or os.getenv('BOT_DATA_DIR', 'data')
+    store = _stores.get(data_dir)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(data_dir)
+            if store is None:
+                store = _stores[data_dir] = UserStateStore(data_dir)
+    return store
+
+
+# ==================== نشست هر آپدیت ====================
+
+@contextmanager
+def user_session(user_id):
+    """
+    بارگذاری یک‌باره وضعیت کاربر برای پردازش یک آپدیت و ذخیره یک‌باره در پایان
+
+    اگر پشتوانه user انتخاب نشده باشد کاری انجام نمی‌دهد.
+    """
+    if not is_enabled():
+        yield None
+        return
+
+    user_id = str(user_id)
+    store = get_state_store()
+    session = getattr(_local, "session", None)
+    if session is not None and session[:2] == (store, user_id):
+        # نشست تودرتو برای همان کاربر
+        yield session[2]
+        return
+
+    with store.lock_for(user_id):
+        state = store.load(user_id)
+        _local.session = (store, user_id, state)
+        try:
+            yield state
+        finally:
+            _local.session = session
+            if state.dirty:
+                store.save(user_id, state)
+
+
+@contextmanager
+def open_state(user_id, store: UserStateStore = None):
+    """
+    وضعیت کاربر: از نشست فعلی، یا خواندن مستقیم از فایل
+
+    فراخواننده پس از تغییر state.dirty = True می‌گذارد؛ بیرون از نشست
+    همان لحظه ذخیره می‌شود و داخل نشست در پایان آپدیت.
+    """
+    user_id = str(user_id)
+    store = store or get_state_store()
+    session = getattr(_local, "session", None)
+    if session is not None and session[:2] == (store, user_id):
+        yield session[2]
+        return
+
+    with store.lock_for(user_id):
+        state = store.load(user_id)
+        yield state
+        if state.dirty:
+            store.save(user_id, state)
+
+
+# ==================== رابط‌های سازگار با مدیرهای قبلی ====================
+
+class StateProgressManager:
+    """رابط UserProgressManager روی رکورد یکپارچه"""
+
+    def __init__(self, store: UserStateStore = None):
+        self.store = store
+
+    def get_user_progress(self, user_id) -> UserProgress:
+        with open_state(user_id, self.store) as state:
+            return state.progress.copy()
+
+    def get_topic_progress(self, user_id, topic_id):
+        """دریافت پیشرفت یک موضوع برای کاربر"""
+        with open_state(user_id, self.store) as state:
+            return state.progress.topic(topic_id).to_dict()
+
+    def set_topic_day(self, user_id, topic_id, day_number):
+        """تنظیم روز فعلی برای یک موضوع"""
+        with open_state(user_id, self.store) as state:
+            state.dirty = True
+            return state.progress.ensure(topic_id).set_day(day_number)
+
+    def complete_day(self, user_id, topic_id, day_number):
+        """علامت‌گذاری روز به عنوان تکمیل شده"""
+        with open_state(user_id, self.store) as state:
+            if not state.progress.ensure(topic_id).complete(day_number):
+                return False
+            state.dirty = True
+            return True
+
+
+def _access_record(values):
+    last_access, last_day, next_reset_at = values
+    return {
+        "last_access": last_access,
+        "last_day": last_day,
+        "last_access_human": datetime.fromtimestamp(last_access).strftime("%Y-%m-%d %H:%M:%S"),
+        "next_reset_at": next_reset_at,
+        "next_reset_human": datetime.fromtimestamp(next_reset_at).strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+class StateAccessStore:
+    """رابط store دسترسی DailyResetManager روی رکورد یکپارچه"""
+
+    def __init__(self, store: UserStateStore = None):
+        self.store = store
+
+    def get(self, user_id, topic_id):
+        with open_state(user_id, self.store) as state:
+            values = state.access.get(int(topic_id))
+        return _access_record(values) if values else None
+
+    def put(self, user_id, topic_id, record):
+        with open_state(user_id, self.store) as state:
+            state.access[int(topic_id)] = [record["last_access"], record["last_day"], record["next_reset_at"]]
+            state.dirty = True
+
+    def delete(self, user_id, topic_id):
+        with open_state(user_id, self.store) as state:
+            if state.access.pop(int(topic_id), None) is None:
+                return False
+            state.dirty = True
+            return True
+
+    def eligible_between(self, start, end):
+        """کاربرانی که next_reset_at آن‌ها در بازه [start, end) است (پیمایش همه کاربران)"""
+        result = []
+        for user_id, state in (self.store or get_state_store()).iter_users():
+            for topic_id, (_, _, next_reset_at) in state.access.items():
+                if start <= next_reset_at < end:
+                    result.append((user_id, topic_id))
+        return result
+
+
+class StateKeyedStore:
+    """رابط LogStore (کلید "{user_id}_{topic_id}") برای زمان‌ها و قفل‌های TimeManager"""
+
+    def __init__(self, field: str, store: UserStateStore = None):
+        self.field = field   # "next_day" یا "locks"
+        self.store = store
+
+    def get(self, user_key, default=None):
+        user_id, topic_id = _split_user_key(user_key)
+        with open_state(user_id, self.store) as state:
+            return getattr(state, self.field).get(topic_id, default)
+
+    def set(self, user_key, value):
+        user_id, topic_id = _split_user_key(user_key)
+        with open_state(user_id, self.store) as state:
+            getattr(state, self.field)[topic_id] = value
+            state.dirty = True
+
+    def delete(self, user_key):
+        user_id, topic_id = _split_user_key(user_key)
+        with open_state(user_id, self.store) as state:
+            if getattr(state, self.field).pop(topic_id, None) is None:
+                return False
+            state.dirty = True
+            return True
+
+    def close(self):
+        pass
+
+
+# ==================== انتقال از ساختار قبلی ====================
+
+def migrate_legacy_state(data_dir: str) -> dict:
+    """
+    ساخت فایل‌های data/users/ از فایل‌های ساختار قبلی
+
+    فایل‌های قبلی دست نمی‌خورند. پس از پایان، فایل نشانه .migrated ساخته
+    می‌شود تا انتقال دوباره اجرا نشود.
+    """
+    users_dir = os.path.join(data_dir, "users")
+    os.makedirs(users_dir, exist_ok=True)
+    states = {}
+
+    def state_for(user_id):
+        state = states.get(user_id)
+        if state is None:
+            state = states[user_id] = UserState()
+        return state
+
+    progress_dir = os.path.join(data_dir, "user_progress")
+    if os.path.isdir(progress_dir):
+        for user_id, path in iter_progress_files(progress_dir):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    state_for(user_id).progress = UserProgress.from_json(json.load(f))
+            except Exception as e:
+                print(f"⚠️ خطا در انتقال {user_id}: {e}")
+
+    access_file = os.path.join(data_dir, "daily_reset", "user_access.json")
+    if os.path.exists(access_file):
+        with open(access_file, 'r', encoding='utf-8') as f:
+            for user_key, record in json.load(f).items():
+                user_id, topic_id = _split_user_key(user_key)
+                state_for(user_id).access[topic_id] = [
+                    record.get("last_access", 0), record.get("last_day", 0), record.get("next_reset_at", 0)
+                ]
+
+    for file_name, field in (("user_next_day_times.json", "next_day"), ("daily_locks.json", "locks")):
+        for user_key, value in read_log_store(os.path.join(data_dir, file_name)).items():
+            user_id, topic_id = _split_user_key(user_key)
+            getattr(state_for(user_id), field)[topic_id] = value
+
+    if states:
+        print(f"🔄 انتقال وضعیت {len(states)} کاربر به {users_dir}")
+    for user_id, state in states.items():
+        _write_state(users_dir, user_id, state)
+
+    with open(os.path.join(users_dir, MIGRATED_MARKER), 'w', encoding='utf-8') as f:
+        f.write(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    return {"users": len(states)}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("استفاده: python user_state.py migrate [data_dir]")
+        sys.exit(1)
+
+    target = sys.argv[2] if len(sys.argv) > 2 else os.getenv('BOT_DATA_DIR', 'data')
+    result = migrate_legacy_state(target)
+    print(f"✅ وضعیت {result['users']} کاربر منتقل شد")
\ No newline at end of file
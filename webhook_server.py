@@ -0,0 +1,78 @@
+"""
+webhook_server.py - سرور دریافت آپدیت‌ها از طریق webhook بله
+
+بله آپدیت‌ها را با POST به WEBHOOK_URL می‌فرستد. سرور توکن مخفی را
+بررسی می‌کند، آپدیت را به موتور پردازش می‌سپارد و بلافاصله پاسخ می‌دهد.
+"""
+
+import hmac
+import threading
+import time
+from urllib.parse import urlparse
+
+from flask import Flask, request, jsonify, abort
+
+# هدر استاندارد توکن مخفی (سازگار با API تلگرام)
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def get_webhook_path(webhook_url: str) -> str:
+    """استخراج مسیر محلی از آدرس عمومی webhook"""
+    path = urlparse(webhook_url or "").path
+    return path if path and path != "/" else "/webhook"
+
+
+def create_app(submit_update, secret_key: str = None, path: str = "/webhook"):
+    """
+    ساخت اپلیکیشن Flask برای دریافت آپدیت‌ها
+
+    Args:
+        submit_update: تابعی که آپدیت را برای پردازش در صف می‌گذارد (نباید مسدود کند)
+        secret_key: توکن مخفی که باید در هدر درخواست باشد
+        path: مسیر endpoint
+    """
+    app = Flask(__name__)
+    stats = {
+        "received": 0,
+        "rejected": 0,
+        "invalid": 0,
+        "started_at": time.time()
+    }
+    # Flask هر درخواست را در thread جدا اجرا می‌کند (threaded=True)
+    stats_lock = threading.Lock()
+    secret = secret_key.encode('utf-8') if secret_key else None
+
+    def count(name):
+        with stats_lock:
+            stats[name] += 1
+
+    @app.route(path, methods=["POST"])
+    def webhook():
+        if secret:
+            # مقایسه بایتی: compare_digest روی str با نویسه غیر ASCII خطا می‌دهد
+            token = request.headers.get(SECRET_HEADER, "").encode('utf-8')
+            if not hmac.compare_digest(token, secret):
+                count("rejected")
+                abort(403)
+
+        update = request.get_json(silent=True)
+        if not isinstance(update, dict) or "update_id" not in update:
+            count("invalid")
+            return jsonify({"ok": False}), 400
+
+        # تأیید فوری؛ پردازش در موتور انجام می‌شود
+        submit_update(update)
+        count("received")
+        return jsonify({"ok": True})
+
+    @app.route("/health", methods=["GET"])
+    def health():
+        return jsonify({
+            "ok": True,
+            "received": stats["received"],
+            "rejected": stats["rejected"],
+            "uptime": int(time.time() - stats["started_at"])
+        })
+
+    app.config["WEBHOOK_STATS"] = stats
+    return app
\ No newline at end of file